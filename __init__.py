@@ -3,9 +3,13 @@ import os
 
 from services.supabase.supabase_client import get_supabase
 from util.auth import get_access_token
+from util.json_provider import AppJSONProvider
+from util.static_assets import build_static_command, static_assets
+from util.templates import PRECOMPILE_TEMPLATES, configure_template_cache, precompile_templates
 
 def create_app(config_object=None):
     app = Flask(__name__, instance_relative_config=True)
+    app.json = AppJSONProvider(app)
 
     app.config.from_mapping(
         SECRET_KEY=os.environ.get('SECRET_KEY'),
@@ -42,4 +46,16 @@ def create_app(config_object=None):
     app.register_blueprint(admin_bp, url_prefix='/admin')
     app.register_blueprint(cms_bp, url_prefix='/cms')
 
+    # Compile templates before the first request rather than during it, sharing bytecode across workers
+    configure_template_cache(app)
+    if PRECOMPILE_TEMPLATES:
+        precompile_templates(app)
+
+    # Hashed, precompressed assets from `flask build-static`; development serves the sources as edited
+    static_assets.init_app(app, use_builds=os.environ.get('FLASK_ENV') != 'development')
+
+    from features.jobs.rankings import materialize_rankings_command
+    app.cli.add_command(materialize_rankings_command)
+    app.cli.add_command(build_static_command)
+
     return app
\ No newline at end of file
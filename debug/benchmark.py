@@ -0,0 +1,174 @@
+"""
+Benchmarks for job scoring, response parsing, card rendering and JSON serialization over synthetic catalogs.
+
+    python -m debug.benchmark --sizes 1000 10000 100000 --output benchmark_results.jsonl
+
+Each run appends one JSON line with every measurement, so results can be compared between commits.
+"""
+import argparse
+from datetime import datetime, timezone
+import gc
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+from types import SimpleNamespace
+from typing import Callable
+from unittest import mock
+
+from flask import Flask
+
+from debug.util.synthetic_data import generate_jobs, generate_profiles, generate_responses
+from features.jobs import api
+from features.jobs.routes import get_rendered_job_cards, jobs_bp
+from features.jobs.util import job_scoring as scoring
+from features.jobs.util.catalog_features import JobList
+from features.jobs.util.compatibility_cache import compatibility_cache
+from features.jobs.util.fragment_cache import fragment_cache
+from features.jobs.util.parse_response import parse_jobs_response
+from util.classes.result import Result
+from util.json_provider import AppJSONProvider
+from util.models.common import Site
+from util.models.user_profile_model import UserProfile
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+DEFAULT_OUTPUT = 'benchmark_results.jsonl'
+PROFILES = 5
+
+def run_benchmarks(sizes: list[int], repeat: int = 3, seed: int = 0) -> list[dict]:
+    app = _benchmark_app()
+    profiles = [UserProfile.from_supabase_dict(row) for row in generate_profiles(PROFILES, seed)]
+    all_jobs = [_job_from_row(row) for row in generate_jobs(max(sizes), seed)]
+    responses = generate_responses(max(sizes), seed)
+    results = []
+    for size in sorted(sizes):
+        jobs = all_jobs[:size]
+        # Fit the qualifications index for this catalog up front; scoring is measured without it
+        scoring.calculate_jobs_compatibility(jobs, profiles[0])
+        scored = scoring.calculate_jobs_compatibility(jobs, profiles[0])
+
+        def score_cold(run: int):
+            compatibility_cache.clear()
+            scoring.calculate_jobs_compatibility(jobs, profiles[run % len(profiles)])
+
+        # Factor matrices are cached per catalog snapshot, whose jobs come as a JobList
+        catalog_jobs = JobList(jobs)
+
+        def score_cached(run: int):
+            scoring.calculate_jobs_compatibility(catalog_jobs, profiles[0])
+
+        def render_cards(run: int):
+            with app.test_request_context('/jobs?include_compatibility=true'), \
+                    mock.patch.object(api, 'fetch_jobs_with_compatibility', return_value=Result(success=True, data=scored)):
+                get_rendered_job_cards(include_compatibility=True)
+
+        def render_cards_cold(run: int):
+            fragment_cache.clear()
+            render_cards(run)
+
+        benchmarks: dict[str, Callable[[int], None]] = {
+            'calculate_jobs_compatibility': score_cold,
+            'calculate_jobs_compatibility_cached': score_cached,
+            'parse_jobs_response': lambda run: parse_jobs_response(Site.INDEED, responses[:size]),
+            'get_rendered_job_cards': render_cards_cold,
+            'get_rendered_job_cards_cached': render_cards,
+            'json_serialization': lambda run: app.json.dumps(scored)
+        }
+        for name, benchmark in benchmarks.items():
+            seconds = _time(benchmark, repeat)
+            peak = _peak_memory(benchmark)
+            results.append({
+                'benchmark': name,
+                'size': size,
+                'seconds': seconds,
+                'items_per_second': size / seconds if seconds else None,
+                'peak_memory_bytes': peak
+            })
+            print(f"{name:<38} {size:>8} {seconds:>10.4f}s {size / seconds:>14,.0f}/s {peak / 2**20:>10.1f} MiB")
+    return results
+
+def write_results(path: str, results: list[dict]) -> dict:
+    record = {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results
+    }
+    with open(path, 'a') as f:
+        f.write(json.dumps(record) + '\n')
+    return record
+
+def compare_with_previous(path: str, record: dict, threshold: float = 0.25) -> list[str]:
+    """Benchmarks at least `threshold` slower than in the previous run recorded in path"""
+    previous = None
+    try:
+        with open(path) as f:
+            lines = f.read().splitlines()
+        if len(lines) >= 2:
+            previous = json.loads(lines[-2])
+    except FileNotFoundError:
+        pass
+    if previous is None:
+        return []
+    before = {(r['benchmark'], r['size']): r['seconds'] for r in previous['results']}
+    regressions = []
+    for result in record['results']:
+        old = before.get((result['benchmark'], result['size']))
+        if old and result['seconds'] > old * (1 + threshold):
+            regressions.append(
+                f"{result['benchmark']} @ {result['size']}: {old:.4f}s -> {result['seconds']:.4f}s "
+                f"(since {previous.get('commit') or previous['timestamp']})"
+            )
+    return regressions
+
+def _benchmark_app() -> Flask:
+    # Only the jobs templates are needed; create_app would also need supabase credentials
+    app = Flask(__name__)
+    app.json = AppJSONProvider(app)
+    app.register_blueprint(jobs_bp)
+    return app
+
+def _job_from_row(row: dict) -> SimpleNamespace:
+    # Same attributes fetch_jobs reads from a jobs row
+    return SimpleNamespace(**{k: v for k, v in row.items() if k in api.JOB_FIELDS})
+
+def _time(benchmark: Callable[[int], None], repeat: int) -> float:
+    best = float('inf')
+    for run in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        benchmark(run)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def _peak_memory(benchmark: Callable[[int], None]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        benchmark(0)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='Catalog sizes to benchmark.')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per benchmark; the best is recorded.')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the synthetic catalog.')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='JSON lines file the run is appended to.')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Slowdown versus the previous run that is reported.')
+    args = parser.parse_args()
+
+    record = write_results(args.output, run_benchmarks(args.sizes, args.repeat, args.seed))
+    for regression in compare_with_previous(args.output, record, args.threshold):
+        print(f"Slower than previous run: {regression}")
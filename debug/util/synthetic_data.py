@@ -0,0 +1,148 @@
+import copy
+import random
+from datetime import datetime, timedelta, timezone
+
+from debug.util.mock_data import MOCK_JOB, MOCK_RESPONSE, MOCK_USER_PROFILE
+
+# Value pools with skewed weights so catalogs look like real listings: a few big metros and
+# common accommodations dominate, with a long tail behind them.
+CITIES = [
+    ("New York", "NY"), ("San Francisco", "CA"), ("Los Angeles", "CA"), ("Chicago", "IL"), ("Austin", "TX"),
+    ("Seattle", "WA"), ("Boston", "MA"), ("Denver", "CO"), ("Atlanta", "GA"), ("Miami", "FL"),
+    ("Portland", "OR"), ("Phoenix", "AZ"), ("Pittsburgh", "PA"), ("Raleigh", "NC"), ("Madison", "WI"),
+    ("Columbus", "OH"), ("Nashville", "TN"), ("Salt Lake City", "UT"), ("Minneapolis", "MN"), ("Richmond", "VA")
+]
+STATE_NAMES = {
+    "NY": "New York", "CA": "California", "IL": "Illinois", "TX": "Texas", "WA": "Washington",
+    "MA": "Massachusetts", "CO": "Colorado", "GA": "Georgia", "FL": "Florida", "OR": "Oregon",
+    "AZ": "Arizona", "PA": "Pennsylvania", "NC": "North Carolina", "WI": "Wisconsin", "OH": "Ohio",
+    "TN": "Tennessee", "UT": "Utah", "MN": "Minnesota", "VA": "Virginia"
+}
+INTERNATIONAL = ["Toronto, Ontario, Canada", "London, UK", "Pune, India", "Bangalore, India", "Sydney, Australia",
+                 "Berlin, Germany", "Dublin, Ireland"]
+WORK_MODES = (["remote", "hybrid", "in-person", None], [30, 30, 35, 5])
+WEEKLY_HOURS = ([10, 20, 25, 30, 35, 40, 45, 50, None], [3, 8, 4, 8, 10, 45, 8, 4, 10])
+INDUSTRIES = ["Technology", "Healthcare", "Education", "Finance", "Retail", "Manufacturing", "Government",
+              "Nonprofit", "Hospitality", "Media"]
+ACCOMMODATIONS = [
+    "Flexible work hours", "Wheelchair accessible office", "Remote work option", "Screen reader compatible software",
+    "Sign language interpreter", "Quiet workspace", "Ergonomic equipment", "Service animals welcome",
+    "Adjustable desk", "Captioned meetings", "Written instructions", "Extended breaks", "Accessible parking",
+    "Assistive listening devices", "Job coach support", "Modified training materials", "Elevator access",
+    "Braille signage", "Noise-cancelling headphones", "Part-time schedule"
+]
+QUALIFICATIONS = [
+    "Bachelor's degree in Computer Science or related field", "High school diploma or equivalent",
+    "Associate degree in Business Administration", "Master's degree in Data Science", "Registered Nurse license",
+    "Experience with Python and SQL", "Customer service experience", "Teaching certification",
+    "Certified Public Accountant", "Project management experience", "Proficiency in Microsoft Office",
+    "Bachelor's degree in Marketing", "Experience with React and TypeScript", "Forklift certification",
+    "Strong written and verbal communication skills", "Bachelor's degree in Mechanical Engineering",
+    "Experience in retail sales", "CompTIA Security+ certification", "Graphic design portfolio",
+    "Bilingual in English and Spanish"
+]
+ROLES = ["Software Engineer", "Data Analyst", "Registered Nurse", "Customer Support Specialist", "Teacher",
+         "Accountant", "Project Manager", "Marketing Coordinator", "Warehouse Associate", "Graphic Designer",
+         "Mechanical Engineer", "Sales Associate", "Security Analyst", "Administrative Assistant", "Product Manager"]
+COMPANIES = [f"{prefix} {suffix}" for prefix in ["Tech", "Blue", "North", "Bright", "Civic", "Summit", "Harbor", "Prairie"]
+             for suffix in ["Innovations Inc.", "Labs", "Health", "Partners", "Group", "Systems"]]
+SENTENCES = [sentence.strip() + "." for sentence in MOCK_RESPONSE[0]["description"].split(".") if sentence.strip()]
+AGE_RANGES = ["18-24", "25-34", "35-44", "45-54", "55-64", "65+"]
+
+def _zipf_weights(n: int) -> list[float]:
+    return [1 / (rank + 1) for rank in range(n)]
+
+_CITY_WEIGHTS = _zipf_weights(len(CITIES))
+_ACCOMMODATION_WEIGHTS = _zipf_weights(len(ACCOMMODATIONS))
+_QUALIFICATION_WEIGHTS = _zipf_weights(len(QUALIFICATIONS))
+
+def generate_location(rng: random.Random) -> str | None:
+    roll = rng.random()
+    if roll < 0.03:
+        return None
+    if roll < 0.12:
+        return rng.choice(INTERNATIONAL)
+    city, state = rng.choices(CITIES, _CITY_WEIGHTS)[0]
+    # Mostly "City, ST", sometimes spelled out or with the country appended
+    if roll < 0.22:
+        return f"{city}, {STATE_NAMES[state]}"
+    if roll < 0.30:
+        return f"{city}, {state}, USA"
+    return f"{city}, {state}"
+
+def _sample(rng: random.Random, pool: list[str], weights: list[float], low: int, high: int) -> list[str]:
+    picked = rng.choices(pool, weights, k=rng.randint(low, high))
+    return list(dict.fromkeys(picked))
+
+def generate_jobs(n: int, seed: int = 0) -> list[dict]:
+    """Job rows shaped like the supabase `jobs` table (see MOCK_JOB)"""
+    rng = random.Random(seed)
+    updated = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    jobs = []
+    for i in range(n):
+        start = updated + timedelta(days=rng.randint(0, 180))
+        job = dict(MOCK_JOB)
+        job.update({
+            "id": str(i + 1),
+            "company_profile_id": str(rng.randint(1, 500)),
+            "company_name": rng.choice(COMPANIES),
+            "role_name": rng.choice(ROLES),
+            "industry": _sample(rng, INDUSTRIES, [1] * len(INDUSTRIES), 1, 2),
+            "weekly_hours": rng.choices(*WEEKLY_HOURS)[0],
+            "work_mode": rng.choices(*WORK_MODES)[0],
+            "location": generate_location(rng),
+            "qualifications": _sample(rng, QUALIFICATIONS, _QUALIFICATION_WEIGHTS, 1, 4),
+            "accommodations": _sample(rng, ACCOMMODATIONS, _ACCOMMODATION_WEIGHTS, 0, 4),
+            "application_period_start": start.isoformat(),
+            "application_period_end": (start + timedelta(days=rng.randint(14, 60))).isoformat(),
+            "application_status": rng.choices(["Open", "Closed"], [80, 20])[0],
+            "job_description": " ".join(rng.sample(SENTENCES, rng.randint(2, 8))),
+            "updated_at": (updated + timedelta(minutes=i)).isoformat()
+        })
+        jobs.append(job)
+    return jobs
+
+def generate_profiles(n: int, seed: int = 0) -> list[dict]:
+    """User profile rows shaped like the supabase `user_profiles` table (see MOCK_USER_PROFILE)"""
+    rng = random.Random(seed)
+    profiles = []
+    for i in range(n):
+        preferences = [rng.random() < p for p in (0.5, 0.4, 0.4)]
+        if not any(preferences):
+            preferences[rng.randrange(3)] = True
+        profile = dict(MOCK_USER_PROFILE)
+        profile.update({
+            "id": i + 1,
+            "user_id": str(1000 + i),
+            "age_range": rng.choice(AGE_RANGES),
+            "hours_per_week": rng.choices(*WEEKLY_HOURS)[0],
+            "location": generate_location(rng) or "New York, NY",
+            "accommodations": _sample(rng, ACCOMMODATIONS, _ACCOMMODATION_WEIGHTS, 0, 3),
+            "educational_background": ", ".join(_sample(rng, QUALIFICATIONS, _QUALIFICATION_WEIGHTS, 1, 3)),
+            "remote_preference": preferences[0],
+            "hybrid_preference": preferences[1],
+            "in_person_preference": preferences[2]
+        })
+        profiles.append(profile)
+    return profiles
+
+def generate_responses(n: int, seed: int = 0) -> list[dict]:
+    """Job board responses for parse_jobs_response, varied from the MOCK_RESPONSE entries"""
+    rng = random.Random(seed)
+    posted = int(datetime(2025, 7, 1, tzinfo=timezone.utc).timestamp() * 1000)
+    responses = []
+    for i in range(n):
+        template = MOCK_RESPONSE[i % len(MOCK_RESPONSE)]
+        response = copy.deepcopy(template)
+        prefix = template["id"].split("-")[0]
+        response.update({
+            "id": f"{prefix}-{i + 1}",
+            "title": rng.choice(ROLES),
+            "company": rng.choice(COMPANIES),
+            "location": generate_location(rng),
+            "is_remote": rng.random() < 0.3,
+            "date_posted": posted - rng.randint(0, 90) * 86_400_000 if rng.random() < 0.8 else None,
+            "description": " ".join(rng.sample(SENTENCES, rng.randint(2, 12))) if template["description"] else None
+        })
+        responses.append(response)
+    return responses
@@ -1,5 +1,8 @@
-from flask import Blueprint, render_template
+from flask import Blueprint, jsonify, render_template
 
+from features.jobs.api import interaction_buffer, job_catalog, search_index
+from features.jobs.util.compatibility_cache import compatibility_cache
+from features.jobs.util.fragment_cache import fragment_cache
 from services.api.jobspy import jobspy_fetch_jobs
 from util.decorators import role_required
 
@@ -26,3 +29,34 @@ def admin_dashboard():
         print(f"Error fetching jobs: {e}")
         return render_template('admin_dashboard.html', error="Failed to fetch jobs data: " + str(e))
     return render_template('admin_dashboard.html', response_items=data)
+
+@admin_bp.route('/compatibility-cache')
+@role_required(['admin'])
+def compatibility_cache_stats():
+    return jsonify(compatibility_cache.stats())
+
+@admin_bp.route('/job-catalog')
+@role_required(['admin'])
+def job_catalog_stats():
+    if job_catalog is None:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **job_catalog.stats()})
+
+@admin_bp.route('/interaction-buffer')
+@role_required(['admin'])
+def interaction_buffer_stats():
+    if interaction_buffer is None:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **interaction_buffer.stats()})
+
+@admin_bp.route('/search-index')
+@role_required(['admin'])
+def search_index_stats():
+    if search_index is None:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **search_index.stats()})
+
+@admin_bp.route('/fragment-cache')
+@role_required(['admin'])
+def fragment_cache_stats():
+    return jsonify(fragment_cache.stats())
@@ -1,6 +1,9 @@
 from flask import Blueprint, render_template, request, flash, redirect, url_for
 from datetime import datetime, timezone
 
+from features.jobs.api import job_catalog
+from features.jobs.util.compatibility_cache import compatibility_cache
+from features.jobs.util.qualifications_index import update_qualifications_index
 from services.supabase.supabase_client import get_supabase
 from util.decorators import role_required, sb_login_required
 
@@ -9,6 +12,14 @@ ELEVATED_CONTENT_MANAGER_GROUPS = ['admin', 'elevated_content_manager']
 
 cms_bp = Blueprint('cms', __name__, template_folder='templates', static_folder='static')
 
+def _job_written(job_id, qualifications: list[str]):
+    """Bring the job caches up to date with a job just added or edited here"""
+    # Appended to the fitted index rather than refitting it, so only this job's cached scores go stale
+    update_qualifications_index({job_id: ','.join(qualifications)})
+    compatibility_cache.invalidate_job(job_id)
+    if job_catalog is not None:
+        job_catalog.mark_stale()
+
 @cms_bp.route('/')
 @sb_login_required
 @role_required(CONTENT_MANAGER_GROUPS)
@@ -62,6 +73,7 @@ def edit_job(job_id):
             'updated_at': datetime.now(timezone.utc).isoformat()
         }
         supabase.table('jobs').update(update_data).eq('id', job_id).execute()
+        _job_written(job_id, update_data['qualifications'])
         flash('Job updated successfully!', 'message')
         return redirect(url_for('cms.manage_jobs'))
     return render_template('edit_job.html', job=job)
@@ -151,7 +163,9 @@ def add_job():
               'application_period_end': application_period_end.isoformat() if application_period_end else None,
             }
 
-            supabase.table('jobs').insert(job_data).execute()
+            insert_resp = supabase.table('jobs').insert(job_data).execute()
+            for row in insert_resp.data or []:
+                _job_written(row['id'], qualifications_list)
 
             flash('Job added successfully!', 'message') 
             return redirect(url_for('cms.manage_jobs'))
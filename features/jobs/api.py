@@ -1,23 +1,86 @@
+import atexit
+import base64
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
 from enum import Enum
-from flask import Blueprint, jsonify, request
+import hashlib
+import itertools
+import json
+import operator
+import os
+import re
+from typing import Optional
+
+from flask import Blueprint, Response, current_app, g, has_request_context, jsonify, request, stream_with_context
 
 from features.jobs.util import job_scoring as scoring
+from features.jobs.util.facet_index import FacetIndex
+from features.jobs.util.interaction_buffer import InteractionBuffer
+from features.jobs.util.job_catalog import JobCatalog, sort_key
+from features.jobs.util.qualifications_index import qualifications_index_version, set_catalog_documents
+from features.jobs.util.search_index import SearchIndex
 from util.classes.result import Result
-from util.models.job_model import Job, JobWithCompatibility, JobWithCompatibilityFactors
-from util.models.user_profile_model import UserProfile
-from services.supabase.supabase_client import get_supabase
-from util.decorators import sb_login_required
+from util.models.job_model import Job, ScoredJob
+from services.supabase.supabase_client import get_supabase, service_key
+from util.decorators import conditional_get, sb_login_required, skip_etag
+from util.user_profile import current_user_id, load_user_profile
 
 JOB_FIELDS = [
     'id', 'company_profile_id', 'company_name', 'role_name', 'industry', 'weekly_hours', 'work_mode', 'location',
     'qualifications', 'accommodations', 'application_period_start', 'application_period_end', 'application_status',
-    'job_type', 'application_materials', 'job_description', 'application_link'
+    'job_type', 'application_materials', 'job_description', 'application_link', 'updated_at'
 ]
 
+JOB_FIELD_SET = frozenset(JOB_FIELDS)
+
+# Columns each view asks PostgREST for. Cards show everything but the long description;
+# scoring needs only the factor inputs; details need every job field.
+SCORING_FIELDS = ['id', 'weekly_hours', 'work_mode', 'location', 'qualifications', 'accommodations', 'updated_at']
+CARD_FIELDS = [field for field in JOB_FIELDS if field not in ('company_profile_id', 'job_type', 'job_description')]
+JOB_PROJECTIONS = {
+  'card': ','.join(CARD_FIELDS),
+  'scoring': ','.join(SCORING_FIELDS),
+  'detail': ','.join(JOB_FIELDS)
+}
+
 LIST_FIELDS = [
   'industry', 'qualifications', 'accommodations', 'application_materials'
 ]
 
+# Fields /api/jobs/facets counts values of
+FACET_FIELDS = LIST_FIELDS + ['work_mode']
+
+# Range filters run as PostgREST predicates: query parameter -> (column, operator)
+RANGE_FILTERS = {
+  'min_weekly_hours': ('weekly_hours', 'gte'),
+  'max_weekly_hours': ('weekly_hours', 'lte'),
+  'application_start_after': ('application_period_start', 'gte'),
+  'application_start_before': ('application_period_start', 'lte'),
+  'application_end_after': ('application_period_end', 'gte'),
+  'application_end_before': ('application_period_end', 'lte')
+}
+
+# Keyset pagination orders by one of these columns, then by id to break ties
+SORT_KEYS = ['id', 'updated_at']
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+# Page size of format=ndjson streams when no limit is given
+STREAM_PAGE_SIZE = 200
+# Most ids one GET /api/jobs?ids= request may ask for
+MAX_BATCH_IDS = int(os.environ.get('JOBS_BATCH_MAX_IDS', 100))
+
+# Rankings stored by `flask materialize-rankings`
+RANKINGS_TABLE = 'user_job_rankings'
+# Recommendations use stored rankings computed within this many seconds for the user's current profile
+# and the current weights; 0 (the default, for databases without the table) always ranks live
+RANKINGS_MAX_AGE = float(os.environ.get('RANKINGS_MAX_AGE_SECONDS', 0))
+
+@dataclass
+class JobsPage:
+  jobs: list[Job]
+  next_cursor: Optional[str] = None
+
 class InteractionType(Enum):
   DETAILS_CLICK = 'details_click'
   APPLY_CLICK = 'apply_click'
@@ -25,108 +88,467 @@ class InteractionType(Enum):
 
 jobs_api_bp = Blueprint('jobs_api', __name__)
 
-def fetch_jobs() -> Result[list[Job]]:
+def fetch_jobs(view: str = 'detail') -> Result[list[Job]]:
+    if job_catalog is not None:
+        return _fetch_cached_jobs()
     try:
         supabase = get_supabase()
-        query = supabase.table('jobs').select('*')
-        for field in JOB_FIELDS:
-            value = request.args.get(field)
-            if value is not None:
-                if field in LIST_FIELDS:
-                    values = [v.strip() for v in value.split(',') if v.strip()]
-                    if values:
-                       query = query.contains(field, values)
-                else:
-                    query = query.eq(field, value)
+        query = _apply_job_filters(supabase.table('jobs').select(JOB_PROJECTIONS[view]))
         jobs_resp = query.execute()
         if not jobs_resp or not jobs_resp.data:
             print("No jobs found.")
             return Result(success=False, error="No jobs found", data=[])
         jobs_data = jobs_resp.data
-        jobs = [Job(**{k: v for k, v in job.items() if k in JOB_FIELDS}) for job in jobs_data]
+        jobs = [decode_job(job) for job in jobs_data]
         return Result(success=True, data=jobs)
     except Exception as e:
         print(f"Error fetching jobs: {e}")
         return Result(success=False, error=str(e), data=[])
 
-def fetch_jobs_with_compatibility() -> Result[list[Result[JobWithCompatibility]]]:
+def fetch_jobs_page(limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None, sort: str = 'id',
+                    view: str = 'detail') -> Result[JobsPage]:
+    """
+    One page of jobs after `cursor` (from a previous page's next_cursor), ordered by `sort` then id.
+    Seeks past the cursor in the database, so every page costs the same however deep it is.
+    Fetched at most once per request, so the ETag and the handler read the same page.
+    """
+    if not has_request_context():
+        return _fetch_jobs_page(limit, cursor, sort, view)
+    pages = g.setdefault('job_pages', {})
+    key = (limit, cursor, sort, view)
+    if key not in pages:
+        page_res = _fetch_jobs_page(limit, cursor, sort, view)
+        if not page_res.is_success():
+            return page_res
+        pages[key] = page_res
+    return pages[key]
+
+def _fetch_jobs_page(limit: int, cursor: Optional[str], sort: str, view: str) -> Result[JobsPage]:
     try:
-        supabase = get_supabase()
-        jobs_res = fetch_jobs()
-        if not jobs_res.is_success():
-            return Result(success=False, error=jobs_res.error, data=[])
-        jobs_data = jobs_res.data
-        try:
-            user_profile_resp = supabase.table('user_profiles').select('*').limit(1).execute()
-            if not user_profile_resp or not user_profile_resp.data:
-                print("User profile not found.")
-                return Result(success=False, error="User profile not found", data=[])
-        except Exception as e:
-            print(f"Error fetching user profile: {e}")
+        after = decode_cursor(cursor, sort) if cursor else None
+    except ValueError as e:
+        return Result(success=False, error=str(e))
+    try:
+        if job_catalog is not None:
+            snapshot = job_catalog.snapshot()
+            rows = _cached_rows_page(snapshot, limit, after, sort)
+            jobs = [snapshot.get(row['id']) for row in rows[:limit]]
+        else:
+            supabase = get_supabase()
+            query = _apply_job_filters(supabase.table('jobs').select(JOB_PROJECTIONS[view]))
+            if after is not None:
+                value, job_id = after
+                if sort == 'id':
+                    query = query.gt('id', job_id)
+                elif value is None:
+                    # NULLs sort last, so only NULL rows with a larger id follow
+                    query = query.is_(sort, 'null').gt('id', job_id)
+                else:
+                    query = query.or_(
+                        f'{sort}.gt."{value}",and({sort}.eq."{value}",id.gt.{job_id}),{sort}.is.null'
+                    )
+            if sort != 'id':
+                query = query.order(sort)
+            jobs_resp = query.order('id').limit(limit + 1).execute()
+            rows = jobs_resp.data or []
+            jobs = [decode_job(job) for job in rows[:limit]]
+        next_cursor = encode_cursor(rows[limit - 1], sort) if len(rows) > limit else None
+        return Result(success=True, data=JobsPage(jobs=jobs, next_cursor=next_cursor))
+    except Exception as e:
+        print(f"Error fetching jobs page: {e}")
+        return Result(success=False, error=str(e))
+
+def decode_job(row: dict) -> Job:
+    # Projected rows hold only job fields and are passed straight through
+    if JOB_FIELD_SET.issuperset(row):
+        return Job(**row)
+    return Job(**{k: v for k, v in row.items() if k in JOB_FIELD_SET})
+
+def encode_cursor(row: dict, sort: str) -> str:
+    payload = json.dumps([sort, row[sort], row['id']], separators=(',', ':'), default=str)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor: str, sort: str) -> tuple:
+    """(sort value, id) of the last job of the previous page"""
+    try:
+        cursor_sort, value, job_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if cursor_sort != sort:
+        raise ValueError(f"Cursor was issued for sort={cursor_sort}")
+    # Both end up in a PostgREST filter string, so only values of the column's type are let through
+    if not _is_job_id(job_id) or not (_is_job_id(value) if sort == 'id' else value is None or _is_timestamp(value)):
+        raise ValueError("Invalid cursor")
+    return value, job_id
+
+_JOB_ID = re.compile(r'\d{1,19}')
+_TIMESTAMP = re.compile(r'[0-9TZ:+\-. ]{10,40}')
+
+def _is_job_id(value) -> bool:
+    if isinstance(value, bool):
+        return False
+    return isinstance(value, int) or isinstance(value, str) and _JOB_ID.fullmatch(value) is not None
+
+def _is_timestamp(value) -> bool:
+    if not isinstance(value, str) or _TIMESTAMP.fullmatch(value) is None:
+        return False
+    try:
+        datetime.fromisoformat(value)
+    except ValueError:
+        return False
+    return True
+
+# Reads come from this process-wide copy of the jobs table when JOB_CATALOG_CACHE=true. It is shared by
+# every user, so it syncs as the anon role and holds only the jobs RLS makes public; enable it only
+# where every job a signed-in user may see is public.
+job_catalog: Optional[JobCatalog] = (
+    JobCatalog(JOB_PROJECTIONS['detail'], decode_job)
+    if os.environ.get('JOB_CATALOG_CACHE', 'false').lower() == 'true' else None
+)
+
+def _catalog_qualifications() -> Optional[dict]:
+    """Qualifications document of every job, which the shared TF-IDF index is fitted over"""
+    if job_catalog is not None:
+        return {job.id: ','.join(job.qualifications or []) for job in job_catalog.snapshot().jobs}
+    if not has_request_context():
+        return None
+    rows = get_supabase().table('jobs').select('id,qualifications').execute().data or []
+    return {row['id']: ','.join(row.get('qualifications') or []) for row in rows}
+
+set_catalog_documents(_catalog_qualifications)
+
+# Keyword search runs over this index of the catalog, so it needs the catalog too
+search_index: Optional[SearchIndex] = SearchIndex() if job_catalog is not None else None
+
+# Facet counts come from bitmaps of the catalog, rebuilt once per catalog version
+facet_index: Optional[FacetIndex] = FacetIndex(FACET_FIELDS) if job_catalog is not None else None
+
+# Clicks are queued here and upserted in batches by a background thread, which writes with the
+# service role key; without it they are upserted in the request as before.
+interaction_buffer: Optional[InteractionBuffer] = (
+    InteractionBuffer('job_clicks', ('job_id', 'user_profile_id', 'interaction_type'))
+    if service_key and os.environ.get('INTERACTION_BUFFER', 'true').lower() == 'true' else None
+)
+if interaction_buffer is not None:
+    atexit.register(interaction_buffer.close)
+
+def record_interaction(job_id, user_profile_id, interaction_type: InteractionType):
+    """Response for a job interaction: 202 once queued, 503 when the buffer is full, 200 once upserted"""
+    interaction_data = {
+        'job_id': job_id,
+        'user_profile_id': user_profile_id,
+        'interaction_type': interaction_type.value
+    }
+    if interaction_buffer is not None:
+        # The buffer skips RLS, so the row is checked here against the profile loaded through it
+        profile_res = load_user_profile()
+        if not profile_res.is_success() or str(profile_res.data.id) != str(user_profile_id):
+            return jsonify({'error': 'Job clicks can only be recorded for your own profile'}), 403
+        if not interaction_buffer.add(interaction_data):
+            return jsonify({'error': 'Too many job clicks, try again shortly'}), 503, {'Retry-After': '1'}
+        return jsonify({'success': True}), 202
+    try:
+        get_supabase().table('job_clicks').upsert(
+            interaction_data, on_conflict='job_id, user_profile_id, interaction_type'
+        ).execute()
+    except Exception as e:
+        print(f"Error upserting job click: {e}")
+        return jsonify({'error': 'Failed to record job click'}), 500
+    return jsonify({'success': True})
+
+def _job_filters() -> list[tuple[str, str, object]]:
+    """(column, PostgREST operator, value) for each filter in the request arguments"""
+    filters = []
+    for field in JOB_FIELDS:
+        value = request.args.get(field)
+        if value is not None:
+            if field in LIST_FIELDS:
+                values = [v.strip() for v in value.split(',') if v.strip()]
+                if values:
+                   filters.append((field, 'contains', values))
+            else:
+                filters.append((field, 'eq', value))
+    for param, (column, operator_name) in RANGE_FILTERS.items():
+        value = request.args.get(param)
+        if value:
+            filters.append((column, operator_name, value))
+    return filters
+
+def _apply_job_filters(query):
+    for column, operator_name, value in _job_filters():
+        query = getattr(query, operator_name)(column, value)
+    return query
+
+_COMPARISONS = {'gte': operator.ge, 'lte': operator.le}
+
+def _row_matches(row: dict, filters: list[tuple[str, str, object]]) -> bool:
+    """Evaluates _job_filters against a cached row the way PostgREST would"""
+    for column, operator_name, value in filters:
+        field = row.get(column)
+        if operator_name == 'contains':
+            if not isinstance(field, list) or not set(value).issubset(field):
+                return False
+        elif field is None:
+            return False
+        elif operator_name == 'eq':
+            if (str(field).lower() if isinstance(field, bool) else str(field)) != value:
+                return False
+        elif isinstance(field, (int, float)):
+            try:
+                if not _COMPARISONS[operator_name](field, float(value)):
+                    return False
+            except ValueError:
+                return False
+        elif not _COMPARISONS[operator_name](str(field), value):
+            return False
+    return True
+
+def _candidate_positions(snapshot, filters: list[tuple[str, str, object]], start: int = 0) -> list[int]|range:
+    """
+    Positions from start of the snapshot rows that may match filters, in id order. Accommodations filters
+    are answered from the catalog's accommodations index; callers still check each row with _row_matches.
+    """
+    positions = _accommodation_positions(snapshot, filters)
+    if positions is None:
+        return range(start, len(snapshot.rows))
+    return positions[bisect_left(positions, start):]
+
+def _accommodation_positions(snapshot, filters: list[tuple[str, str, object]]) -> Optional[list[int]]:
+    """Sorted positions of rows offering every filtered accommodation, None without accommodations filters"""
+    accommodations = [
+        item for column, operator_name, value in filters
+        if column == 'accommodations' and operator_name == 'contains' for item in value
+    ]
+    if not accommodations:
+        return None
+    return snapshot.jobs.features().accommodations_index.rows_with_all(accommodations).tolist()
+
+def _fetch_cached_jobs() -> Result[list[Job]]:
+    try:
+        snapshot = job_catalog.snapshot()
+    except Exception as e:
+        print(f"Error fetching jobs: {e}")
+        return Result(success=False, error=str(e), data=[])
+    filters = _job_filters()
+    # Unfiltered reads share the snapshot's JobList, whose scoring features are built once per version
+    jobs = snapshot.jobs if not filters else [
+        snapshot.jobs[position] for position in _candidate_positions(snapshot, filters)
+        if _row_matches(snapshot.rows[position], filters)
+    ]
+    if not jobs:
+        print("No jobs found.")
+        return Result(success=False, error="No jobs found", data=[])
+    return Result(success=True, data=jobs)
+
+def _cached_rows_page(snapshot, limit: int, after: Optional[tuple], sort: str) -> list[dict]:
+    """
+    Up to limit + 1 filtered rows past `after`, in the order of the database query. Seeks past the cursor
+    in an order kept with the snapshot and filters only until the page is full, so any page costs the same.
+    """
+    filters = _job_filters()
+    if sort == 'id':
+        # Snapshot rows are ordered by id
+        start = bisect_right(snapshot.rows, after[1], key=lambda row: row['id']) if after is not None else 0
+        positions = _candidate_positions(snapshot, filters, start)
+    else:
+        order = snapshot.order(sort)
+        start = bisect_right(
+            order, (after[0] is None, after[0] if after[0] is not None else '', after[1]),
+            key=lambda position: sort_key(snapshot.rows[position], sort)
+        ) if after is not None else 0
+        candidates = _accommodation_positions(snapshot, filters)
+        allowed = set(candidates) if candidates is not None else None
+        positions = (
+            position for position in itertools.islice(order, start, None)
+            if allowed is None or position in allowed
+        )
+    rows = []
+    for position in positions:
+        row = snapshot.rows[position]
+        if _row_matches(row, filters):
+            rows.append(row)
+            if len(rows) > limit:
+                break
+    return rows
+
+def fetch_jobs_with_compatibility(jobs: Optional[list[Job]] = None, view: str = 'detail') -> Result[list[Result[ScoredJob]]]:
+    try:
+        if jobs is None:
+            jobs_res = fetch_jobs(view)
+            if not jobs_res.is_success():
+                return Result(success=False, error=jobs_res.error, data=[])
+            jobs = jobs_res.data
+        jobs_data = jobs
+        profile_res = load_user_profile()
+        if not profile_res.is_success():
             return Result(success=False, error="User profile not found", data=[])
-        user_profile_dict = user_profile_resp.data[0]
-        user_profile = UserProfile.from_supabase_dict(user_profile_dict)
+        user_profile = profile_res.data
         jobs_with_compat = scoring.calculate_jobs_compatibility(jobs_data, user_profile)
         return Result(success=True, data=jobs_with_compat)
     except Exception as e:
         print(f"Error fetching jobs with compatibility: {e}")
         return Result(success=False, error=str(e), data=[])
 
-def fetch_jobs_with_compatibility_factors() -> Result[list[Result[JobWithCompatibilityFactors]]]:
+def fetch_jobs_with_compatibility_factors(jobs: Optional[list[Job]] = None, view: str = 'detail') -> Result[list[Result[ScoredJob]]]:
+    if jobs is None:
+        jobs_res = fetch_jobs(view)
+        if not jobs_res.is_success():
+            return Result(success=False, error=jobs_res.error, data=[])
+        jobs = jobs_res.data
+    jobs_data = jobs
+    profile_res = load_user_profile()
+    if not profile_res.is_success():
+        return Result(success=False, error=profile_res.error, data=[])
+    try:
+        compat_results = scoring.calculate_jobs_compatibility_factors(jobs_data, profile_res.data)
+        return Result(success=True, data=compat_results)
+    except Exception as e:
+        print(f"Error calculating compatibility: {e}")
+        return Result(success=False, error=str(e), data=[])
+
+def fetch_top_jobs_with_compatibility_factors(k: int) -> Result[list[ScoredJob]]:
+    """
+    The user's stored rankings when they are current, rescored for their factors. Otherwise ranks
+    the scoring projection of every job, then reads the detail projection of the top k only.
+    """
     supabase = get_supabase()
-    jobs_res = fetch_jobs()
+    profile_res = load_user_profile()
+    if not profile_res.is_success():
+        return Result(success=False, error=profile_res.error, data=[])
+    if RANKINGS_MAX_AGE > 0:
+        ranked = _fetch_ranked_jobs(profile_res.data, k)
+        if ranked is not None:
+            return Result(success=True, data=ranked)
+    jobs_res = fetch_jobs('scoring')
     if not jobs_res.is_success():
         return Result(success=False, error=jobs_res.error, data=[])
     jobs_data = jobs_res.data
     try:
-        user_profile_resp = supabase.table('user_profiles').select('*').limit(1).execute()
-        if not user_profile_resp or not user_profile_resp.data:
-            return Result(success=False, error="User profile not found", data=[])
-        user_profile_dict = user_profile_resp.data[0]
-        user_profile = UserProfile.from_supabase_dict(user_profile_dict)
-        compat_results = [scoring.calculate_job_compatibility_factors(job, user_profile) for job in jobs_data]
-        return Result(success=True, data=compat_results)
+        top_res = scoring.calculate_top_jobs_compatibility_factors(jobs_data, profile_res.data, k)
+        # Cached catalog jobs already carry every detail column
+        if not top_res.is_success() or not top_res.data or job_catalog is not None:
+            return top_res
+        details_resp = supabase.table('jobs').select(JOB_PROJECTIONS['detail']).in_(
+            'id', [scored.job.id for scored in top_res.data]
+        ).execute()
+        details = {str(row['id']): decode_job(row) for row in details_resp.data or []}
+        return Result(success=True, data=[
+            ScoredJob(details.get(str(scored.job.id), scored.job), scored.compatibility_score, scored.factors)
+            for scored in top_res.data
+        ])
     except Exception as e:
-        print(f"Error fetching user profile or calculating compatibility: {e}")
+        print(f"Error calculating compatibility: {e}")
         return Result(success=False, error=str(e), data=[])
 
+def _fetch_ranked_jobs(user_profile, k: int) -> Optional[list[ScoredJob]]:
+    """
+    The k jobs of the user's stored rankings, best first. None when fewer than k rankings were stored
+    for this profile and these weights within RANKINGS_MAX_AGE, or a ranked job is gone or cannot be scored.
+    """
+    try:
+        computed_after = datetime.now(timezone.utc) - timedelta(seconds=RANKINGS_MAX_AGE)
+        rankings = get_supabase().table(RANKINGS_TABLE).select('job_id').eq(
+            'user_profile_id', user_profile.id
+        ).eq('profile_hash', user_profile.content_hash()).eq(
+            'weights_version', scoring.WEIGHTS_VERSION
+        ).gte('computed_at', computed_after.isoformat()).order('rank').limit(k).execute().data or []
+    except Exception as e:
+        print(f"Error reading stored rankings: {e}")
+        return None
+    job_ids = [str(row['job_id']) for row in rankings]
+    if len(job_ids) < k:
+        return None
+    jobs_res = fetch_jobs_by_ids(job_ids)
+    if not jobs_res.is_success() or len(jobs_res.data) < len(job_ids):
+        return None
+    # Rescored so the factors shown are current; rank order is kept for equal scores
+    scored = scoring.calculate_jobs_compatibility_factors([jobs_res.data[job_id] for job_id in job_ids], user_profile)
+    if not all(result.is_success() for result in scored):
+        return None
+    return sorted((result.data for result in scored), key=lambda job: -job.compatibility_score)
+
+def fetch_jobs_by_ids(job_ids: list, view: str = 'detail') -> Result[dict[str, Job]]:
+    """
+    Jobs keyed by str(id), read with one in_ query. Ids with no job, or that are not job ids, are left out.
+    Fetched at most once per request, so the ETag and the handler read the same jobs.
+    """
+    if not has_request_context():
+        return _fetch_jobs_by_ids(job_ids, view)
+    batches = g.setdefault('job_batches', {})
+    key = (tuple(str(job_id) for job_id in job_ids), view)
+    if key not in batches:
+        jobs_res = _fetch_jobs_by_ids(job_ids, view)
+        if not jobs_res.is_success():
+            return jobs_res
+        batches[key] = jobs_res
+    return batches[key]
+
+def _fetch_jobs_by_ids(job_ids: list, view: str) -> Result[dict[str, Job]]:
+    jobs: dict[str, Job] = {}
+    missing = [str(job_id) for job_id in job_ids if _is_job_id(str(job_id))]
+    if job_catalog is not None:
+        try:
+            snapshot = job_catalog.snapshot()
+            for job_id in missing:
+                job = snapshot.get(job_id)
+                if job is not None:
+                    jobs[job_id] = job
+            # Jobs created since the last sync are looked up below
+            missing = [job_id for job_id in missing if job_id not in jobs]
+        except Exception as e:
+            print(f"Error reading job catalog: {e}")
+    if not missing:
+        return Result(success=True, data=jobs)
+    try:
+        supabase = get_supabase()
+        jobs_resp = supabase.table('jobs').select(JOB_PROJECTIONS[view]).in_('id', missing).execute()
+        for row in jobs_resp.data or []:
+            jobs[str(row['id'])] = decode_job(row)
+        return Result(success=True, data=jobs)
+    except Exception as e:
+        print(f"Error fetching jobs by id: {e}")
+        return Result(success=False, error=str(e), data={})
+
 def fetch_job(job_id) -> Result[Job|None]:
+    """The job, or data=None when there is no job with that id"""
+    if not _is_job_id(job_id):
+        return Result(success=True, data=None)
+    if job_catalog is not None:
+        try:
+            job = job_catalog.snapshot().get(job_id)
+            # Not synced yet when just created; the query below finds it
+            if job is not None:
+                return Result(success=True, data=job)
+        except Exception as e:
+            print(f"Error reading job catalog: {e}")
     supabase = get_supabase()
     try:
-        job_resp = supabase.table('jobs').select('*').eq('id', job_id).single().execute()
+        job_resp = supabase.table('jobs').select(JOB_PROJECTIONS['detail']).eq('id', job_id).maybe_single().execute()
     except Exception as e:
         print(f"Error fetching job: {e}")
         return Result(success=False, error=str(e))
-    if not job_resp:
+    if not job_resp or not job_resp.data:
         print(f"Job with ID {job_id} not found.")
-        return Result(success=False, error=f"Job with ID {job_id} not found.")
+        return Result(success=True, data=None)
     try:
-        job_data = job_resp.data
-        if not job_data:
-            print(f"Job with ID {job_id} not found.")
-            return Result(success=False, error=f"Job with ID {job_id} not found.")
-        job = Job(**{k: v for k, v in job_data.items() if k in JOB_FIELDS})
+        job = decode_job(job_resp.data)
     except Exception as e:
         print(f"Error processing job data: {e}")
         return Result(success=False, error=str(e))
     return Result(success=True, data=job)
 
-def fetch_job_with_compatibility(job_id) -> Result[JobWithCompatibility|None]:
+def fetch_job_with_compatibility(job_id) -> Result[ScoredJob|None]:
     job_result = fetch_job(job_id)
     if not job_result.is_success():
         return Result(success=False, data=None, error=job_result.error)
     job = job_result.data
     if job is None:
-        return Result(success=False, data=None, error="Job not found")
-    supabase = get_supabase()
+        return Result(success=True, data=None)
+    profile_res = load_user_profile()
+    if not profile_res.is_success():
+        return Result(success=False, error="User profile not found.")
     try:
-        user_profile_resp = supabase.table('user_profiles').select('*').limit(1).execute()
-        if not user_profile_resp or not user_profile_resp.data:
-            print("User profile not found.")
-            return Result(success=False, error="User profile not found.")
-        user_profile_dict = user_profile_resp.data[0]
-        user_profile = UserProfile.from_supabase_dict(user_profile_dict)
-        compat_result = scoring.calculate_job_compatibility_factors(job, user_profile)
+        compat_result = scoring.calculate_job_compatibility_factors(job, profile_res.data)
         if compat_result.is_success():
             job_with_factors = compat_result.data
             return Result(success=True, data=job_with_factors)
@@ -134,25 +556,21 @@ def fetch_job_with_compatibility(job_id) -> Result[JobWithCompatibility|None]:
             print(f"Error calculating compatibility factors: {compat_result.error}")
             return Result(success=False, error=compat_result.error)
     except Exception as e:
-        print(f"Error fetching user profile or calculating compatibility: {e}")
+        print(f"Error calculating compatibility: {e}")
         return Result(success=False, error=str(e))
 
-def fetch_job_with_compatibility_factors(job_id) -> Result[JobWithCompatibilityFactors|None]:
+def fetch_job_with_compatibility_factors(job_id) -> Result[ScoredJob|None]:
     job_result = fetch_job(job_id)
     if not job_result.is_success():
         return Result(success=False, error=job_result.error)
     if job_result.data is None:
-        return Result(success=False, error="Job not found")
+        return Result(success=True, data=None)
     job = job_result.data
-    supabase = get_supabase()
+    profile_res = load_user_profile()
+    if not profile_res.is_success():
+        return Result(success=False, error="User profile not found.")
     try:
-        user_profile_resp = supabase.table('user_profiles').select('*').limit(1).execute()
-        if not user_profile_resp or not user_profile_resp.data:
-            print("User profile not found.")
-            return Result(success=False, error="User profile not found.")
-        user_profile_dict = user_profile_resp.data[0]
-        user_profile = UserProfile.from_supabase_dict(user_profile_dict)
-        compat_result = scoring.calculate_job_compatibility_factors(job, user_profile)
+        compat_result = scoring.calculate_job_compatibility_factors(job, profile_res.data)
         if compat_result.is_success():
             job_with_factors = compat_result.data
             return Result(success=True, data=job_with_factors)
@@ -160,50 +578,375 @@ def fetch_job_with_compatibility_factors(job_id) -> Result[JobWithCompatibilityF
             print(f"Error calculating compatibility factors: {compat_result.error}")
             return Result(success=False, error=compat_result.error)
     except Exception as e:
-        print(f"Error fetching user profile or calculating compatibility: {e}")
+        print(f"Error calculating compatibility: {e}")
         return Result(success=False, error=str(e))
 
+def jobs_etag(include_scores: bool, job_id=None, salt: str = '', paged: bool = False,
+              view: str = 'scoring') -> Optional[str]:
+    """
+    Strong ETag over the ids and updated_at of the jobs a request reads, its arguments and user and,
+    for scored responses, the profile content, scoring weights and qualifications index fit.
+    Costs no scoring or rendering. With paged, only the requested page is read, in the view the
+    handler reads it in, so the handler reuses it and the cost does not grow with the catalog.
+    """
+    try:
+        versions = _job_versions(job_id, paged, view)
+    except Exception as e:
+        print(f"Error computing jobs ETag: {e}")
+        return None
+    return _etag({'jobs': versions, 'salt': salt}, include_scores)
+
+def catalog_etag(include_scores: bool, index=None) -> Optional[str]:
+    """
+    Strong ETag of a response computed from the job catalog: the snapshot version, the version of the
+    index it was answered from, the request arguments and user, and the scoring parts of jobs_etag.
+    Reads no rows, so it costs the same however large the catalog is.
+    """
+    if job_catalog is None:
+        return None
+    try:
+        snapshot = job_catalog.snapshot()
+    except Exception as e:
+        print(f"Error computing catalog ETag: {e}")
+        return None
+    parts = {
+        'catalog': [job_catalog.instance_id, snapshot.version],
+        'index': index.version if index is not None else None
+    }
+    return _etag(parts, include_scores)
+
+def _etag(parts: dict, include_scores: bool) -> Optional[str]:
+    parts = {
+        **parts,
+        'path': request.path,
+        'args': sorted(request.args.items(multi=True)),
+        'user': current_user_id()
+    }
+    if include_scores:
+        profile_res = load_user_profile()
+        if not profile_res.is_success():
+            return None
+        parts['profile'] = profile_res.data.content_hash()
+        parts['weights'] = scoring.WEIGHTS_VERSION
+        parts['qualifications'] = qualifications_index_version()
+    return hashlib.sha256(json.dumps(parts, default=str, separators=(',', ':')).encode()).hexdigest()
+
+def _job_versions(job_id=None, paged: bool = False, view: str = 'scoring') -> list[list]:
+    """
+    [id, updated_at] of one job, of the jobs in ?ids=, of the requested page of a paginated request,
+    or of every job matching the request filters
+    """
+    if job_id is None and paged:
+        try:
+            limit, cursor, sort = parse_page_args()
+        except ValueError:
+            return []
+        if view not in JOB_PROJECTIONS:
+            return []
+        page_res = fetch_jobs_page(limit=limit, cursor=cursor, sort=sort, view=view)
+        if not page_res.is_success():
+            raise RuntimeError(page_res.error)
+        return [[job.id, getattr(job, 'updated_at', None)] for job in page_res.data.jobs]
+    if job_id is None and 'ids' in request.args:
+        try:
+            job_ids = _parse_ids()
+        except ValueError:
+            return []
+        if view not in JOB_PROJECTIONS:
+            return []
+        jobs = fetch_jobs_by_ids(job_ids, view)
+        if not jobs.is_success():
+            raise RuntimeError(jobs.error)
+        return [[job_id, getattr(jobs.data.get(job_id), 'updated_at', None)] for job_id in job_ids]
+    if job_catalog is not None:
+        snapshot = job_catalog.snapshot()
+        if job_id is None:
+            filters = _job_filters()
+            return [
+                [row['id'], row.get('updated_at')]
+                for row in (snapshot.rows[position] for position in _candidate_positions(snapshot, filters))
+                if _row_matches(row, filters)
+            ]
+        row = snapshot.get_row(job_id)
+        if row is not None:
+            return [[row['id'], row.get('updated_at')]]
+    query = get_supabase().table('jobs').select('id,updated_at')
+    query = query.eq('id', job_id) if job_id is not None else _apply_job_filters(query)
+    return [[row['id'], row.get('updated_at')] for row in query.order('id').execute().data or []]
+
+def is_paginated_request() -> bool:
+    """A single page of a list (limit or cursor given) rather than the whole list or an NDJSON stream"""
+    return ('limit' in request.args or 'cursor' in request.args) and request.args.get('format') != 'ndjson'
+
+def _includes_scores() -> bool:
+    return any(request.args.get(arg, 'false').lower() == 'true' for arg in ('include_compatibility', 'include_factors'))
+
+def _jobs_list_etag() -> Optional[str]:
+    # A stream would be tagged before its first line, so errors written later would be cached with it
+    if request.args.get('format') == 'ndjson':
+        return None
+    return jobs_etag(
+        _includes_scores(), paged=is_paginated_request() and 'ids' not in request.args, view=request.args.get('view', 'detail')
+    )
+
 @jobs_api_bp.route('/jobs', methods=['GET'])
 @sb_login_required
+@conditional_get(_jobs_list_etag)
 def get_jobs():
     include_compatibility = request.args.get('include_compatibility', 'false').lower() == 'true'
     include_factors = request.args.get('include_factors', 'false').lower() == 'true'
+    view = request.args.get('view', 'detail')
+    if view not in ('card', 'detail'):
+        return jsonify({'error': 'view must be card or detail'}), 400
+    if 'ids' in request.args:
+        try:
+            job_ids = _parse_ids()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return _get_jobs_by_ids(job_ids, view, include_compatibility, include_factors)
+    try:
+        limit, cursor, sort = parse_page_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if request.args.get('format') == 'ndjson':
+        if 'limit' not in request.args:
+            limit = STREAM_PAGE_SIZE
+        lines = _stream_jobs_ndjson(limit, cursor, sort, view, include_compatibility, include_factors)
+        return Response(stream_with_context(lines), mimetype='application/x-ndjson')
+    # Without limit or cursor the whole (filtered) catalog is returned as a plain array, as before
+    paginated = is_paginated_request()
+    page = None
+    if paginated:
+        page_res = fetch_jobs_page(limit=limit, cursor=cursor, sort=sort, view=view)
+        if not page_res.is_success():
+            return jsonify({'error': page_res.error}), 500
+        page = page_res.data
+        if not page.jobs:
+            return jsonify({'jobs': [], 'next_cursor': None})
+    jobs = page.jobs if page else None
     if include_factors:
-        result = fetch_jobs_with_compatibility_factors()
-    else:
-        result = fetch_jobs_with_compatibility() if include_compatibility else fetch_jobs()
-    if result.is_success():
-        return jsonify(result.data)
+        result = fetch_jobs_with_compatibility_factors(jobs, view)
+    elif include_compatibility:
+        result = fetch_jobs_with_compatibility(jobs, view)
     else:
+        result = Result(success=True, data=jobs) if page else fetch_jobs(view)
+    if not result.is_success():
         return jsonify({'error': result.error}), 500
+    if page:
+        return jsonify({'jobs': result.data, 'next_cursor': page.next_cursor})
+    return jsonify(result.data)
+
+def _parse_ids() -> list[str]:
+    """Distinct ids of ?ids=, in request order"""
+    job_ids = list(dict.fromkeys(v.strip() for v in request.args.get('ids', '').split(',') if v.strip()))
+    if not job_ids:
+        raise ValueError('ids must list at least one job id')
+    if len(job_ids) > MAX_BATCH_IDS:
+        raise ValueError(f'At most {MAX_BATCH_IDS} ids can be requested at once')
+    return job_ids
+
+def _get_jobs_by_ids(job_ids: list[str], view: str, include_compatibility: bool, include_factors: bool):
+    """One item per requested id, in order: the job (scored if asked) or {job_id, error}"""
+    jobs_res = fetch_jobs_by_ids(job_ids, view)
+    if not jobs_res.is_success():
+        return jsonify({'error': jobs_res.error}), 500
+    found = [jobs_res.data[job_id] for job_id in job_ids if job_id in jobs_res.data]
+    results: dict[str, Result] = {str(job.id): Result(success=True, data=job) for job in found}
+    if found and (include_compatibility or include_factors):
+        if include_factors:
+            scored_res = fetch_jobs_with_compatibility_factors(found, view)
+        else:
+            scored_res = fetch_jobs_with_compatibility(found, view)
+        if not scored_res.is_success():
+            return jsonify({'error': scored_res.error}), 500
+        results = {str(job.id): result for job, result in zip(found, scored_res.data)}
+    items = []
+    for job_id in job_ids:
+        result = results.get(job_id)
+        if not _is_job_id(job_id):
+            items.append({'job_id': job_id, 'error': 'Invalid job id'})
+        elif result is None:
+            items.append({'job_id': job_id, 'error': 'Job not found'})
+        elif result.is_success():
+            items.append(result.data)
+        else:
+            skip_etag()
+            items.append({'job_id': job_id, 'error': result.error})
+    return jsonify(items)
+
+def parse_page_args() -> tuple[int, Optional[str], str]:
+    sort = request.args.get('sort', 'id')
+    if sort not in SORT_KEYS:
+        raise ValueError(f"sort must be one of {', '.join(SORT_KEYS)}")
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f'limit must be between 1 and {MAX_PAGE_SIZE}')
+    cursor = request.args.get('cursor') or None
+    if cursor:
+        decode_cursor(cursor, sort)
+    return limit, cursor, sort
+
+def iter_job_pages(limit: int = STREAM_PAGE_SIZE, cursor: Optional[str] = None, sort: str = 'id',
+                   view: str = 'detail', include_compatibility: bool = False, include_factors: bool = False):
+    """
+    Result of (page, one Result per job) for each page of jobs matching the request filters, scored
+    if asked. Pages are read lazily; iteration stops after the last page or a failed one.
+    """
+    while True:
+        page_res = fetch_jobs_page(limit=limit, cursor=cursor, sort=sort, view=view)
+        if not page_res.is_success():
+            yield Result(success=False, error=page_res.error)
+            return
+        page = page_res.data
+        if page.jobs and (include_compatibility or include_factors):
+            if include_factors:
+                scored_res = fetch_jobs_with_compatibility_factors(page.jobs, view)
+            else:
+                scored_res = fetch_jobs_with_compatibility(page.jobs, view)
+            if not scored_res.is_success():
+                yield Result(success=False, error=scored_res.error)
+                return
+            results = scored_res.data
+        else:
+            results = [Result(success=True, data=job) for job in page.jobs]
+        yield Result(success=True, data=(page, results))
+        if page.next_cursor is None:
+            return
+        cursor = page.next_cursor
+
+def iter_job_results(limit: int = STREAM_PAGE_SIZE, cursor: Optional[str] = None, sort: str = 'id',
+                     view: str = 'detail', include_compatibility: bool = False, include_factors: bool = False):
+    """
+    (job, Result) for every job matching the request filters, read and scored a page at a time so the
+    first jobs are available before later pages are fetched. A failed page read ends the iteration
+    with (None, failed Result).
+    """
+    for page_res in iter_job_pages(limit, cursor, sort, view, include_compatibility, include_factors):
+        if not page_res.is_success():
+            yield None, page_res
+            return
+        page, results = page_res.data
+        yield from zip(page.jobs, results)
+
+def _stream_jobs_ndjson(limit: int, cursor: Optional[str], sort: str, view: str,
+                        include_compatibility: bool, include_factors: bool):
+    """
+    One JSON line per job from iter_job_results. A job that fails to score becomes
+    an {"job_id", "error"} line; a failed page read ends the stream with an {"error"} line.
+    """
+    dumps = current_app.json.dumps
+    for job, item in iter_job_results(limit, cursor, sort, view, include_compatibility, include_factors):
+        if job is None:
+            yield dumps({'error': item.error}) + '\n'
+            return
+        try:
+            if item.is_success():
+                yield dumps(item.data) + '\n'
+            else:
+                yield dumps({'job_id': job.id, 'error': item.error}) + '\n'
+        except Exception as e:
+            yield dumps({'job_id': job.id, 'error': str(e)}) + '\n'
 
 @jobs_api_bp.route('/job_click', methods=['POST']) 
 @sb_login_required
 def job_click():
-    supabase = get_supabase()
     data = request.get_json()
     job_id = data.get('job_id')
     if not job_id:
         return jsonify({'error': 'Missing job_id'}), 400
-    user_profile_resp = supabase.table('user_profiles').select('id').limit(1).execute()
-    if not user_profile_resp:
+    profile_res = load_user_profile()
+    if not profile_res.is_success():
         return jsonify({'error': 'User profile not found'}), 404
-    user_profile_id = user_profile_resp.data[0]['id']
+    return record_interaction(job_id, profile_res.data.id, InteractionType.APPLY_CLICK)
+
+@jobs_api_bp.route('/jobs/search', methods=['GET'])
+@sb_login_required
+@conditional_get(lambda: catalog_etag(_includes_scores(), search_index))
+def search_jobs():
+    """BM25-ranked keyword search over role_name, qualifications and job_description, narrowed by the usual filters"""
+    if search_index is None:
+        return jsonify({'error': 'Search needs the job catalog, which is not enabled'}), 503
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'Missing q'}), 400
+    include_compatibility = request.args.get('include_compatibility', 'false').lower() == 'true'
+    include_factors = request.args.get('include_factors', 'false').lower() == 'true'
+    view = request.args.get('view', 'detail')
+    if view not in ('card', 'detail'):
+        return jsonify({'error': 'view must be card or detail'}), 400
+    try:
+        limit, _, _ = parse_page_args()
+        offset = int(request.args.get('offset', 0))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if offset < 0:
+        return jsonify({'error': 'offset must not be negative'}), 400
     try:
-        supabase.table('job_clicks').upsert({
-            'job_id': job_id,
-            'user_profile_id': user_profile_id,
-            'interaction_type': InteractionType.APPLY_CLICK.value
-        }, on_conflict='job_id, user_profile_id, interaction_type').execute()
+        snapshot = job_catalog.snapshot()
     except Exception as e:
-        print(f"Error upserting job click: {e}")
-        return jsonify({'error': 'Failed to record job click'}), 500
-    return jsonify({'success': True})
+        print(f"Error searching jobs: {e}")
+        return jsonify({'error': str(e)}), 500
+    if not search_index.ready:
+        search_index.build_in_background(snapshot)
+        return jsonify({'error': 'Search index is being built, try again shortly'}), 503, {'Retry-After': '5'}
+    filters = _job_filters()
+    page = search_index.search(
+        snapshot, query, offset, limit, matches=(lambda row: _row_matches(row, filters)) if filters else None
+    )
+    if not page.hits:
+        return jsonify({'results': [], 'next_offset': None})
+    jobs = [snapshot.get(job_id) for job_id, _ in page.hits]
+    if include_factors:
+        result = fetch_jobs_with_compatibility_factors(jobs, view)
+    elif include_compatibility:
+        result = fetch_jobs_with_compatibility(jobs, view)
+    else:
+        result = Result(success=True, data=jobs)
+    if not result.is_success():
+        return jsonify({'error': result.error}), 500
+    return jsonify({
+        'results': [{'score': score, 'job': job} for (_, score), job in zip(page.hits, result.data)],
+        'next_offset': page.next_offset
+    })
+
+@jobs_api_bp.route('/jobs/facets', methods=['GET'])
+@sb_login_required
+@conditional_get(lambda: catalog_etag(False))
+def get_job_facets():
+    """Job counts per value of each facet field (top facet_limit values), under the same filters as GET /api/jobs"""
+    if facet_index is None:
+        return jsonify({'error': 'Facets need the job catalog, which is not enabled'}), 503
+    fields = [v.strip() for v in request.args.get('facets', '').split(',') if v.strip()] or FACET_FIELDS
+    unknown = [field for field in fields if field not in FACET_FIELDS]
+    if unknown:
+        return jsonify({'error': f"facets must be among {', '.join(FACET_FIELDS)}"}), 400
+    try:
+        limit = int(request.args['facet_limit']) if 'facet_limit' in request.args else None
+    except ValueError:
+        return jsonify({'error': 'facet_limit must be an integer'}), 400
+    try:
+        snapshot = job_catalog.snapshot()
+        total, facets = facet_index.facets(snapshot, _job_filters(), fields, _row_matches, limit)
+    except Exception as e:
+        print(f"Error counting job facets: {e}")
+        return jsonify({'error': str(e)}), 500
+    # Lists keep the largest-first order, which jsonify's sorted keys would lose
+    return jsonify({
+        'total': total,
+        'facets': {field: [{'value': value, 'count': count} for value, count in counts.items()]
+                   for field, counts in facets.items()}
+    })
 
 @jobs_api_bp.route('/jobs/<job_id>', methods=['GET'])
 @sb_login_required
+@conditional_get(lambda job_id: jobs_etag(False, job_id))
 def get_job(job_id):
     result = fetch_job(job_id)
     if not result.is_success():
-        return jsonify({"error": result.error or "Job not found or failed to calculate compatibility"}), 404
+        return jsonify({"error": result.error or "Failed to fetch job"}), 500
+    if result.data is None:
+        return jsonify({"error": "Job not found"}), 404
     return jsonify(result.data)
\ No newline at end of file
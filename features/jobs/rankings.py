@@ -0,0 +1,152 @@
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+import json
+import os
+import time
+from typing import Optional
+
+import click
+
+from features.jobs.api import JOB_PROJECTIONS, RANKINGS_TABLE, decode_job
+from features.jobs.util import job_scoring as scoring
+from features.jobs.util.catalog_features import CatalogFeatures
+from services.supabase.supabase_client import get_service_supabase
+from util.classes.result import Result
+from util.models.job_model import Job
+from util.models.user_profile_model import UserProfile
+
+# Replaces the rankings of a set of users in one transaction; see supabase/migrations
+REPLACE_RANKINGS_FUNCTION = 'replace_user_job_rankings'
+DEFAULT_TOP_N = 50
+USERS_PER_CHUNK = 64
+PAGE_SIZE = 1000
+
+# Per-worker catalog, built once by the pool initializer instead of being pickled with every chunk
+_worker_catalog: Optional[CatalogFeatures] = None
+
+def materialize_rankings(top_n: int = DEFAULT_TOP_N, workers: Optional[int] = None,
+                         chunk_size: int = USERS_PER_CHUNK, output: Optional[str] = None) -> Result[dict]:
+    """
+    Score every user profile against every job and store each user's top_n jobs,
+    either in RANKINGS_TABLE or, when output is given, as JSON lines in a local file.
+    """
+    started = time.perf_counter()
+    try:
+        supabase = get_service_supabase()
+        job_rows = _fetch_all(supabase, 'jobs', JOB_PROJECTIONS['scoring'])
+        profile_rows = _fetch_all(supabase, 'user_profiles')
+    except Exception as e:
+        print(f"Error loading jobs or user profiles: {e}")
+        return Result(success=False, error=str(e))
+    jobs = [decode_job(row) for row in job_rows]
+    chunks = [profile_rows[i:i + chunk_size] for i in range(0, len(profile_rows), chunk_size)]
+
+    rankings: list[dict] = []
+    errors: list[str] = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(jobs,)) as pool:
+        for chunk_rankings, chunk_errors in pool.map(_rank_chunk, chunks, [top_n] * len(chunks)):
+            rankings.extend(chunk_rankings)
+            errors.extend(chunk_errors)
+
+    if output:
+        write_res = _write_rankings_file(output, rankings)
+    else:
+        write_res = _write_rankings_table(supabase, [int(row['id']) for row in profile_rows], rankings, top_n)
+    if not write_res.is_success():
+        return write_res
+    return Result(success=True, data={
+        'jobs': len(jobs),
+        'users': len(profile_rows),
+        'rankings': len(rankings),
+        'errors': errors,
+        'seconds': round(time.perf_counter() - started, 2)
+    })
+
+def _fetch_all(supabase, table: str, columns: str = '*') -> list[dict]:
+    rows: list[dict] = []
+    while True:
+        resp = supabase.table(table).select(columns).order('id').range(len(rows), len(rows) + PAGE_SIZE - 1).execute()
+        page = resp.data or []
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            return rows
+
+def _init_worker(jobs: list[Job]):
+    global _worker_catalog
+    _worker_catalog = CatalogFeatures.from_jobs(jobs)
+
+def _rank_chunk(profile_rows: list[dict], top_n: int) -> tuple[list[dict], list[str]]:
+    catalog = _worker_catalog
+    computed_at = datetime.now(timezone.utc).isoformat()
+    rankings: list[dict] = []
+    errors: list[str] = []
+    for row in profile_rows:
+        user_profile = UserProfile.from_supabase_dict(row)
+        profile_hash = user_profile.content_hash()
+        top_res = scoring.calculate_catalog_top_k(catalog, user_profile, top_n, use_cache=False)
+        if not top_res.is_success():
+            errors.append(f"User profile {user_profile.id}: {top_res.error}")
+            continue
+        indices, _, scores = top_res.data
+        for rank, (i, score) in enumerate(zip(indices.tolist(), scores.tolist()), start=1):
+            rankings.append({
+                'user_profile_id': user_profile.id,
+                'job_id': catalog.jobs[i].id,
+                'rank': rank,
+                'compatibility_score': score,
+                'profile_hash': profile_hash,
+                'weights_version': scoring.WEIGHTS_VERSION,
+                'computed_at': computed_at
+            })
+    return rankings, errors
+
+def _write_rankings_file(path: str, rankings: list[dict]) -> Result[None]:
+    try:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            for ranking in rankings:
+                f.write(json.dumps(ranking) + '\n')
+        os.replace(tmp_path, path)
+        return Result(success=True)
+    except Exception as e:
+        print(f"Error writing rankings file: {e}")
+        return Result(success=False, error=str(e))
+
+def _write_rankings_table(supabase, profile_ids: list, rankings: list[dict], top_n: int) -> Result[None]:
+    """
+    Replace the stored rankings of every profile, about PAGE_SIZE rows per call. Each call swaps its users'
+    rows in one transaction, so ranks past a shorter new list go too; profiles without rankings are cleared.
+    """
+    by_user: dict = {}
+    for ranking in rankings:
+        by_user.setdefault(ranking['user_profile_id'], []).append(ranking)
+    users_per_call = max(1, PAGE_SIZE // max(top_n, 1))
+    try:
+        for i in range(0, len(profile_ids), users_per_call):
+            user_ids = profile_ids[i:i + users_per_call]
+            supabase.rpc(REPLACE_RANKINGS_FUNCTION, {
+                'p_user_profile_ids': user_ids,
+                'p_rankings': [ranking for user_id in user_ids for ranking in by_user.get(user_id, [])]
+            }).execute()
+        return Result(success=True)
+    except Exception as e:
+        print(f"Error writing rankings table: {e}")
+        return Result(success=False, error=str(e))
+
+@click.command('materialize-rankings')
+@click.option('--top-n', default=DEFAULT_TOP_N, show_default=True, help='Jobs stored per user.')
+@click.option('--workers', default=None, type=int, help='Worker processes (default: CPU count).')
+@click.option('--chunk-size', default=USERS_PER_CHUNK, show_default=True, help='User profiles per task.')
+@click.option('--output', default=None, help=f'Write JSON lines to this file instead of {RANKINGS_TABLE}.')
+def materialize_rankings_command(top_n, workers, chunk_size, output):
+    """Precompute every user's top job rankings."""
+    result = materialize_rankings(top_n=top_n, workers=workers, chunk_size=chunk_size, output=output)
+    if not result.is_success():
+        raise click.ClickException(result.error)
+    summary = result.data
+    for error in summary['errors']:
+        click.echo(error, err=True)
+    click.echo(
+        f"Ranked {summary['jobs']} jobs for {summary['users']} users "
+        f"({summary['rankings']} rows) in {summary['seconds']}s"
+    )
@@ -1,54 +1,143 @@
-from flask import Blueprint, jsonify, render_template, request
+import hashlib
+import os
+
+from flask import Blueprint, get_flashed_messages, jsonify, render_template, request, stream_template
 
 from util.auth import check_has_profile, get_access_token
-from util.decorators import profile_required, sb_login_required
+from util.decorators import conditional_get, profile_required, sb_login_required, skip_etag
 from features.jobs import api
+from features.jobs.util.fragment_cache import fragment_cache
+
+RECOMMENDED_JOBS_LIMIT = 10
+# Cards per page of the jobs list, for the first page and each page loaded on scroll
+JOB_CARDS_PAGE_SIZE = 24
+
+def _templates_version() -> str:
+    """Hash of the template sources, so rendered pages get new ETags when a template changes"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for folder in (os.path.join(here, 'templates'), os.path.join(here, '..', '..', 'templates')):
+        for dirpath, dirnames, filenames in os.walk(folder):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                path = os.path.join(dirpath, filename)
+                digest.update(os.path.relpath(path, folder).encode())
+                with open(path, 'rb') as f:
+                    digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+TEMPLATES_VERSION = _templates_version()
 
 jobs_bp = Blueprint('jobs', __name__, template_folder='templates', static_folder='static', static_url_path='/static/jobs')
 
 def get_rendered_job_cards(include_compatibility=False, include_factors=False):
     if include_compatibility and include_factors:
-        jobs_res = api.fetch_jobs_with_compatibility_factors()
+        jobs_res = api.fetch_jobs_with_compatibility_factors(view='card')
     elif include_compatibility:
-        jobs_res = api.fetch_jobs_with_compatibility()
+        jobs_res = api.fetch_jobs_with_compatibility(view='card')
     else:
-        jobs_res = api.fetch_jobs()
+        jobs_res = api.fetch_jobs('card')
     if not jobs_res.is_success():
+        skip_etag()
         return [render_template('components/job_error.html', msg=jobs_res.error)]
     jobs = jobs_res.data
     if include_factors or include_compatibility:
         render_jobs = []
         for job in jobs:
             if job.is_success():
-                render_jobs.append(render_template('components/job_card.html', job=job.data))
+                render_jobs.append(fragment_cache.render('components/job_card.html', job.data))
             else:
+                skip_etag()
                 render_jobs.append(render_template('components/job_error.html', msg=job.error))
         return render_jobs
     else:
-        return [render_template('components/job_card.html', job=job, include_compatibility=include_compatibility) for job in jobs]
+        return [
+            fragment_cache.render('components/job_card.html', job, include_compatibility=include_compatibility)
+            for job in jobs
+        ]
+
+def iter_rendered_job_cards(include_compatibility=False, include_factors=False, limit=api.STREAM_PAGE_SIZE,
+                            cursor=None, sort='id', pages=None, paging=None):
+    """
+    Rendered cards of the filtered jobs, produced a page of jobs at a time as the caller consumes them.
+    Stops after `pages` pages if given; paging['next_cursor'] then holds the cursor of the page after.
+    """
+    scored = include_compatibility or include_factors
+    job_pages = api.iter_job_pages(limit, cursor, sort, 'card', include_compatibility, include_factors)
+    for count, page_res in enumerate(job_pages, 1):
+        if not page_res.is_success():
+            skip_etag()
+            yield render_template('components/job_error.html', msg=page_res.error)
+            return
+        page, results = page_res.data
+        for job, result in zip(page.jobs, results):
+            if not result.is_success():
+                skip_etag()
+                yield render_template('components/job_error.html', msg=result.error)
+            elif scored:
+                yield fragment_cache.render('components/job_card.html', result.data)
+            else:
+                yield fragment_cache.render('components/job_card.html', job, include_compatibility=False)
+        if paging is not None:
+            paging['next_cursor'] = page.next_cursor
+        if pages is not None and count >= pages:
+            return
 
 @jobs_bp.route('/jobs')
 @sb_login_required
 def all_jobs():
     include_compatibility = request.args.get('include_compatibility', 'false').lower() == 'true'
-    rendered_jobs = get_rendered_job_cards(include_compatibility=include_compatibility)
     access_token = get_access_token()
     has_profile = check_has_profile(access_token) if access_token else False
-    return render_template('all_jobs.html', rendered_jobs=rendered_jobs, has_profile=has_profile)
+    # Streamed, so the page head and first cards are sent while they are fetched and scored. Only the
+    # first page is rendered here; the page script loads the rest from /rendered/job_cards on scroll.
+    paging = {'next_cursor': None}
+    rendered_jobs = iter_rendered_job_cards(
+        include_compatibility=include_compatibility, limit=JOB_CARDS_PAGE_SIZE, pages=1, paging=paging
+    )
+    # The session cookie is sent before the template runs, so flashes are taken from it now; the
+    # template's get_flashed_messages then reads the ones kept on the request
+    get_flashed_messages(with_categories=True)
+    return stream_template(
+        'all_jobs.html',
+        rendered_jobs=rendered_jobs,
+        paging=paging,
+        page_size=JOB_CARDS_PAGE_SIZE,
+        has_profile=has_profile
+    )
 
 @jobs_bp.route('/rendered/job_cards')
 @sb_login_required
+@conditional_get(lambda: api.jobs_etag(
+    request.args.get('include_compatibility', 'false').lower() == 'true',
+    salt=TEMPLATES_VERSION,
+    paged=api.is_paginated_request(),
+    view='card'
+))
 def rendered_job_cards():
     include_compatibility = request.args.get('include_compatibility', 'false').lower() == 'true'
-    rendered = get_rendered_job_cards(include_compatibility)
-    return jsonify(rendered)
+    if not api.is_paginated_request():
+        # Without limit or cursor every card is returned as a plain array, as before
+        return jsonify(get_rendered_job_cards(include_compatibility))
+    try:
+        limit, cursor, sort = api.parse_page_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    paging = {'next_cursor': None}
+    cards = list(iter_rendered_job_cards(
+        include_compatibility=include_compatibility, limit=limit, cursor=cursor, sort=sort, pages=1, paging=paging
+    ))
+    return jsonify({'cards': cards, 'next_cursor': paging['next_cursor']})
 
 @jobs_bp.route('/jobs/<job_id>')
 @sb_login_required
+@conditional_get(lambda job_id: api.jobs_etag(True, job_id, TEMPLATES_VERSION))
 def job_details(job_id):
     job_res = api.fetch_job_with_compatibility_factors(job_id)
     if not job_res.is_success():
-        return render_template('job_details.html', err=job_res.error)
+        return render_template('job_details.html', err=job_res.error), 500
+    if job_res.data is None:
+        return render_template('job_details.html', err='Job not found'), 404
     job = job_res.data
     return render_template('job_details.html', job=job)
 
@@ -56,15 +145,12 @@ def job_details(job_id):
 @sb_login_required
 @profile_required
 def recommended_jobs():
-    jobs_res = api.fetch_jobs_with_compatibility_factors()
+    jobs_res = api.fetch_top_jobs_with_compatibility_factors(RECOMMENDED_JOBS_LIMIT)
     if not jobs_res.is_success():
         return render_template('recommended_jobs.html', err=jobs_res.error)
-    jobs = jobs_res.data
-    successful_jobs = [job_res.data for job_res in jobs if job_res.is_success()]
-    sorted_jobs = sorted(successful_jobs, key=lambda j: j.compatibility_score, reverse=True)[:10]
     rendered_jobs = [
-        render_template('components/detailed_job_card.html', job=job)
-        for job in sorted_jobs
+        fragment_cache.render('components/detailed_job_card.html', job)
+        for job in jobs_res.data
     ]
     return render_template(
         'recommended_jobs.html',
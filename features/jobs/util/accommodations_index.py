@@ -0,0 +1,63 @@
+import numpy as np
+
+def normalize_accommodation(accommodation: str) -> str:
+    return ' '.join(accommodation.lower().split())
+
+class AccommodationsIndex:
+    """
+    Inverted index from normalized accommodation terms to the sorted catalog rows that offer them.
+    Posting lists are stored back to back in `indices`, term t's rows being indices[indptr[t]:indptr[t + 1]].
+    """
+
+    def __init__(self, size: int, terms: list[str], indices: np.ndarray, indptr: np.ndarray):
+        self.size = size
+        self.terms = terms
+        self.term_ids = {term: t for t, term in enumerate(terms)}
+        self.indices = indices
+        self.indptr = indptr
+
+    @classmethod
+    def from_lists(cls, accommodation_lists: list[list[str]]) -> 'AccommodationsIndex':
+        """Build from one list of already normalized terms per catalog row"""
+        rows_by_term: dict[str, list[int]] = {}
+        for row, terms in enumerate(accommodation_lists):
+            for term in set(terms):
+                rows_by_term.setdefault(term, []).append(row)
+        terms = list(rows_by_term)
+        lengths = [len(rows_by_term[term]) for term in terms]
+        indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        indices = np.fromiter(
+            (row for term in terms for row in rows_by_term[term]), dtype=np.int32, count=int(indptr[-1])
+        )
+        return cls(size=len(accommodation_lists), terms=terms, indices=indices, indptr=indptr)
+
+    def postings(self, term_id: int) -> np.ndarray:
+        return self.indices[self.indptr[term_id]:self.indptr[term_id + 1]]
+
+    def resolve(self, accommodation: str) -> list[int]:
+        """Ids of indexed terms containing the accommodation, the same substring rule as the per-job match"""
+        needle = normalize_accommodation(accommodation)
+        return [t for t, term in enumerate(self.terms) if needle in term]
+
+    def rows_with_all(self, accommodations: list[str]) -> np.ndarray:
+        """
+        Sorted rows offering every accommodation exactly after normalization: a superset of the rows
+        a `contains` filter matches, which compares without normalizing
+        """
+        rows = np.arange(self.size, dtype=np.int32)
+        for accommodation in accommodations:
+            term_id = self.term_ids.get(normalize_accommodation(accommodation))
+            if term_id is None:
+                return rows[:0]
+            rows = np.intersect1d(rows, self.postings(term_id), assume_unique=True)
+        return rows
+
+def match_postings(indices: np.ndarray, indptr: np.ndarray, term_ids: list[int], start: int, end: int) -> np.ndarray:
+    """Mask over rows [start, end) of rows in any of the terms' posting lists"""
+    mask = np.zeros(end - start, dtype=bool)
+    for t in term_ids:
+        postings = indices[indptr[t]:indptr[t + 1]]
+        lo, hi = np.searchsorted(postings, [start, end])
+        mask[postings[lo:hi] - start] = True
+    return mask
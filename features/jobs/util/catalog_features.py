@@ -0,0 +1,151 @@
+from dataclasses import dataclass, replace
+import itertools
+from typing import Optional
+
+import numpy as np
+from scipy import sparse
+
+from features.jobs.util.accommodations_index import AccommodationsIndex, normalize_accommodation
+from features.jobs.util.locations import MISSING, location_table
+from features.jobs.util.qualifications_index import (
+    QualificationsIndex, get_qualifications_index, is_current, qualifications_document
+)
+from util.models.job_model import Job
+
+WORK_MODES = ['remote', 'hybrid', 'in-person']
+
+# Work mode codes: 0 = missing, 1..len(WORK_MODES) = WORK_MODES, last = anything else
+WORK_MODE_MISSING = 0
+WORK_MODE_OTHER = len(WORK_MODES) + 1
+
+_catalog_ids = itertools.count()
+
+class JobList(list):
+    """
+    Jobs that are scored repeatedly without changing, such as a cached catalog snapshot.
+    Keeps the CatalogFeatures built for it; must not be mutated.
+    """
+    _features: Optional['CatalogFeatures'] = None
+
+    def features(self) -> 'CatalogFeatures':
+        if self._features is None:
+            self._features = CatalogFeatures.from_jobs(self, catalog_id=next(_catalog_ids))
+        elif not is_current(self._features.qualifications_index):
+            # Per-job scoring reads the shared index, so batch scores follow it when it is refit
+            self._features = self._features.with_current_qualifications()
+        return self._features
+
+@dataclass
+class CatalogFeatures:
+    """Column-oriented encoding of a job catalog, used to score every job against a profile at once"""
+    jobs: list[Job]
+    errors: list[Optional[str]]
+    valid: np.ndarray
+    locations: np.ndarray
+    hours: np.ndarray
+    work_modes: np.ndarray
+    accommodations_index: AccommodationsIndex
+    qualifications_index: QualificationsIndex
+    qualification_matrix: sparse.csr_matrix
+    # Identifies the features of a JobList, which outlive a request; scores of these are cached
+    catalog_id: Optional[int] = None
+
+    @property
+    def size(self) -> int:
+        return len(self.jobs)
+
+    def arrays(self) -> dict[str, np.ndarray]:
+        """Plain numeric columns read by the batch factor kernels; what gets shared with scoring workers"""
+        return {
+            'valid': self.valid,
+            'locations': self.locations,
+            'hours': self.hours,
+            'work_modes': self.work_modes,
+            'accommodation_indices': self.accommodations_index.indices,
+            'accommodation_indptr': self.accommodations_index.indptr,
+            'qualification_data': self.qualification_matrix.data,
+            'qualification_indices': self.qualification_matrix.indices,
+            'qualification_indptr': self.qualification_matrix.indptr
+        }
+
+    def with_current_qualifications(self) -> 'CatalogFeatures':
+        """The same features with qualification rows from the shared index as it is now"""
+        documents = {
+            job.id: qualifications_document(job) for job, error in zip(self.jobs, self.errors) if error is None
+        }
+        qualifications_index = get_qualifications_index(documents)
+        job_ids = [job.id if error is None else None for job, error in zip(self.jobs, self.errors)]
+        return replace(
+            self,
+            qualifications_index=qualifications_index,
+            qualification_matrix=qualifications_index.select(job_ids)
+        )
+
+    @classmethod
+    def for_jobs(cls, jobs: list[Job]) -> 'CatalogFeatures':
+        """Features of jobs, reusing those of a JobList"""
+        if isinstance(jobs, JobList):
+            return jobs.features()
+        return cls.from_jobs(jobs)
+
+    @classmethod
+    def from_jobs(cls, jobs: list[Job], catalog_id: Optional[int] = None) -> 'CatalogFeatures':
+        n = len(jobs)
+        errors: list[Optional[str]] = [None] * n
+        locations = np.full((n, 3), MISSING, dtype=np.int32)
+        hours = np.full(n, np.nan)
+        work_modes = np.full(n, WORK_MODE_MISSING, dtype=np.int8)
+        accommodations: list[list[str]] = [[] for _ in range(n)]
+        qualification_docs = [''] * n
+
+        for i, job in enumerate(jobs):
+            try:
+                # Same order as calculate_job_compatibility_factors so errors read the same
+                qualification_docs[i] = qualifications_document(job)
+                locations[i] = location_table.intern(job.location)
+                job_hours = parse_hours(job.weekly_hours)
+                if job_hours is not None:
+                    hours[i] = job_hours
+                accommodations[i] = [normalize_accommodation(acc) for acc in job.accommodations]
+                work_modes[i] = _encode_work_mode(job.work_mode)
+            except Exception as e:
+                errors[i] = str(e)
+                locations[i] = MISSING
+                hours[i] = np.nan
+                qualification_docs[i] = ''
+                # Kept for filtering by accommodation, which covers jobs that cannot be scored
+                try:
+                    accommodations[i] = [normalize_accommodation(acc) for acc in job.accommodations]
+                except Exception:
+                    accommodations[i] = []
+
+        qualifications_index = get_qualifications_index({
+            job.id: doc for job, doc, error in zip(jobs, qualification_docs, errors) if error is None
+        })
+        job_ids = [job.id if error is None else None for job, error in zip(jobs, errors)]
+
+        return cls(
+            jobs=jobs,
+            errors=errors,
+            valid=np.fromiter((error is None for error in errors), dtype=bool, count=n),
+            locations=locations,
+            hours=hours,
+            work_modes=work_modes,
+            accommodations_index=AccommodationsIndex.from_lists(accommodations),
+            qualifications_index=qualifications_index,
+            qualification_matrix=qualifications_index.select(job_ids),
+            catalog_id=catalog_id
+        )
+
+def parse_hours(value) -> Optional[float]:
+    """Weekly hours as a number, None when missing or zero. Rows may hold them as text, e.g. "40"."""
+    if value is None or value == '':
+        return None
+    return float(value) or None
+
+def _encode_work_mode(work_mode) -> int:
+    if not work_mode:
+        return WORK_MODE_MISSING
+    if work_mode in WORK_MODES:
+        return WORK_MODES.index(work_mode) + 1
+    return WORK_MODE_OTHER
@@ -0,0 +1,147 @@
+from collections import OrderedDict
+import os
+import threading
+from typing import Optional
+
+import numpy as np
+
+# Each entry holds a key tuple and a tuple of factor scores, a few hundred bytes
+MAX_ENTRIES = int(os.environ.get('COMPATIBILITY_CACHE_MAX_ENTRIES', 200_000))
+# Catalog factor matrices take 40 bytes per job, so the default holds a few hundred profiles of a 10k job catalog
+MAX_CATALOG_BYTES = int(os.environ.get('COMPATIBILITY_CACHE_MAX_CATALOG_BYTES', 128 * 2**20))
+
+class CompatibilityCache:
+    """
+    LRU caches of compatibility factors, both keyed by user profile, profile content hash, weights version
+    and qualifications index fit, so a refit of the TF-IDF index never serves scores from an earlier fit:
+    single job rows, also keyed by (job id, job updated_at), and whole factor matrices of a catalog snapshot.
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, max_catalog_bytes: int = MAX_CATALOG_BYTES):
+        self.max_entries = max_entries
+        self.max_catalog_bytes = max_catalog_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.catalog_hits = 0
+        self.catalog_misses = 0
+        self.catalog_bytes = 0
+        self._entries: OrderedDict[tuple, tuple] = OrderedDict()
+        self._keys_by_user: dict[str, set[tuple]] = {}
+        self._keys_by_job: dict[str, set[tuple]] = {}
+        self._catalogs: OrderedDict[tuple, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(profile_id, profile_hash: str, job_id, updated_at, weights_version, index_fit) -> tuple:
+        return (str(profile_id), profile_hash, str(job_id), updated_at, weights_version, index_fit)
+
+    @staticmethod
+    def catalog_key(profile_id, profile_hash: str, catalog_id, weights_version, index_fit) -> tuple:
+        return (str(profile_id), profile_hash, catalog_id, weights_version, index_fit)
+
+    def get(self, key: tuple) -> Optional[tuple]:
+        with self._lock:
+            row = self._entries.get(key)
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            return row
+
+    def put(self, key: tuple, row: tuple):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            else:
+                self._keys_by_user.setdefault(key[0], set()).add(key)
+                self._keys_by_job.setdefault(key[2], set()).add(key)
+            self._entries[key] = row
+            while len(self._entries) > self.max_entries:
+                key, _ = self._entries.popitem(last=False)
+                self._unlink(key)
+                self.evictions += 1
+
+    def get_catalog(self, key: tuple) -> Optional[np.ndarray]:
+        """Read-only factor matrix of a catalog, or None"""
+        with self._lock:
+            factors = self._catalogs.get(key)
+            if factors is None:
+                self.catalog_misses += 1
+            else:
+                self.catalog_hits += 1
+                self._catalogs.move_to_end(key)
+            return factors
+
+    def put_catalog(self, key: tuple, factors: np.ndarray):
+        """Keeps factors, made read-only so callers sharing it cannot change it"""
+        if factors.nbytes > self.max_catalog_bytes:
+            return
+        factors.flags.writeable = False
+        with self._lock:
+            previous = self._catalogs.pop(key, None)
+            if previous is not None:
+                self.catalog_bytes -= previous.nbytes
+            self._catalogs[key] = factors
+            self.catalog_bytes += factors.nbytes
+            while self.catalog_bytes > self.max_catalog_bytes:
+                _, evicted = self._catalogs.popitem(last=False)
+                self.catalog_bytes -= evicted.nbytes
+                self.evictions += 1
+
+    def invalidate_user(self, profile_id):
+        with self._lock:
+            for key in list(self._keys_by_user.get(str(profile_id), ())):
+                self._entries.pop(key, None)
+                self._unlink(key)
+            for key in [key for key in self._catalogs if key[0] == str(profile_id)]:
+                self.catalog_bytes -= self._catalogs.pop(key).nbytes
+
+    def invalidate_job(self, job_id):
+        # Catalog matrices are keyed by snapshot, and a changed job is only seen in a new snapshot
+        with self._lock:
+            for key in list(self._keys_by_job.get(str(job_id), ())):
+                self._entries.pop(key, None)
+                self._unlink(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+            self._keys_by_job.clear()
+            self._catalogs.clear()
+            self.catalog_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            catalog_lookups = self.catalog_hits + self.catalog_misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'catalogs': len(self._catalogs),
+                'catalog_bytes': self.catalog_bytes,
+                'max_catalog_bytes': self.max_catalog_bytes,
+                'catalog_hits': self.catalog_hits,
+                'catalog_misses': self.catalog_misses,
+                'catalog_hit_rate': self.catalog_hits / catalog_lookups if catalog_lookups else 0.0
+            }
+
+    def _unlink(self, key: tuple):
+        user_keys = self._keys_by_user.get(key[0])
+        if user_keys is not None:
+            user_keys.discard(key)
+            if not user_keys:
+                del self._keys_by_user[key[0]]
+        job_keys = self._keys_by_job.get(key[2])
+        if job_keys is not None:
+            job_keys.discard(key)
+            if not job_keys:
+                del self._keys_by_job[key[2]]
+
+compatibility_cache = CompatibilityCache()
@@ -0,0 +1,112 @@
+import threading
+from typing import Callable, Optional
+
+import numpy as np
+
+from features.jobs.util.job_catalog import CatalogSnapshot
+
+class FacetBitmaps:
+    """
+    Bitmaps of one catalog snapshot, for each facet field and distinct value, marking the jobs that have it.
+    As in Roaring bitmaps, a value on at least 1/32 of the jobs is stored as a packed bit row (counted with
+    popcounts of row & mask); rarer values, where a position list is smaller, keep their int32 positions.
+    """
+
+    def __init__(self, snapshot: CatalogSnapshot, fields: list[str]):
+        self.version = snapshot.version
+        self.size = len(snapshot.rows)
+        self.values: dict[str, list] = {}
+        self.dense: dict[str, np.ndarray] = {}
+        self.sparse: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        self._lookup: dict[str, dict] = {}
+        for field in fields:
+            positions: dict = {}
+            for position, row in enumerate(snapshot.rows):
+                value = row.get(field)
+                for item in (value if isinstance(value, list) else [value]):
+                    if item is not None:
+                        positions.setdefault(item, []).append(position)
+            dense = [item for item in positions if len(positions[item]) * 32 >= self.size]
+            sparse = [item for item in positions if len(positions[item]) * 32 < self.size]
+            rows = np.zeros((len(dense), (self.size + 7) // 8), dtype=np.uint8)
+            for index, item in enumerate(dense):
+                rows[index] = self._pack(positions[item])
+            self.values[field] = dense + sparse
+            self.dense[field] = rows
+            # Positions of all sparse values back to back, with the value index of each position
+            self.sparse[field] = (
+                np.array([p for item in sparse for p in positions[item]], dtype=np.int32),
+                np.repeat(np.arange(len(sparse)), [len(positions[item]) for item in sparse])
+            )
+            self._lookup[field] = {item: positions[item] for item in sparse}
+            self._lookup[field].update({item: index for index, item in enumerate(dense)})
+
+    def all(self) -> np.ndarray:
+        return np.packbits(np.ones(self.size, dtype=bool))
+
+    def bitmap(self, field: str, value) -> np.ndarray:
+        """Jobs whose field equals value, or whose list field contains it"""
+        entry = self._lookup[field].get(value)
+        if entry is None:
+            return np.zeros((self.size + 7) // 8, dtype=np.uint8)
+        return self.dense[field][entry] if isinstance(entry, int) else self._pack(entry)
+
+    def counts(self, field: str, mask: np.ndarray, limit: Optional[int] = None) -> dict:
+        """Jobs under mask per value of field, largest first, without zero counts; at most limit values"""
+        dense = np.bitwise_count(self.dense[field] & mask).sum(axis=1)
+        positions, value_indices = self.sparse[field]
+        selected = np.unpackbits(mask, count=self.size).astype(bool)
+        sparse = np.bincount(value_indices[selected[positions]], minlength=len(self.values[field]) - len(dense))
+        counts = np.concatenate([dense, sparse])
+        order = np.argsort(-counts, kind='stable')[:limit]
+        return {self.values[field][index]: int(counts[index]) for index in order if counts[index]}
+
+    @staticmethod
+    def count(mask: np.ndarray) -> int:
+        return int(np.bitwise_count(mask).sum())
+
+    def _pack(self, positions: list[int]) -> np.ndarray:
+        bits = np.zeros(self.size, dtype=bool)
+        bits[positions] = True
+        return np.packbits(bits)
+
+class FacetIndex:
+    """Facet bitmaps of the latest catalog snapshot, rebuilt when the catalog publishes a new version"""
+
+    def __init__(self, fields: list[str]):
+        self.fields = fields
+        self._bitmaps: Optional[FacetBitmaps] = None
+        self._lock = threading.Lock()
+
+    def for_snapshot(self, snapshot: CatalogSnapshot) -> FacetBitmaps:
+        bitmaps = self._bitmaps
+        if bitmaps is not None and bitmaps.version == snapshot.version:
+            return bitmaps
+        with self._lock:
+            if self._bitmaps is None or self._bitmaps.version != snapshot.version:
+                self._bitmaps = FacetBitmaps(snapshot, self.fields)
+            return self._bitmaps
+
+    def facets(self, snapshot: CatalogSnapshot, filters: list[tuple[str, str, object]], fields: list[str],
+               row_matches: Callable[[dict, list], bool], limit: Optional[int] = None) -> tuple[int, dict[str, dict]]:
+        """
+        (matching jobs, {field: {value: count}}) under filters. Filters on facet fields are bitmap
+        intersections; any others are evaluated once per row with row_matches and packed into the mask.
+        """
+        bitmaps = self.for_snapshot(snapshot)
+        mask = bitmaps.all()
+        other_filters = []
+        for column, operator_name, value in filters:
+            if column in bitmaps.values and operator_name == 'contains':
+                for item in value:
+                    mask &= bitmaps.bitmap(column, item)
+            elif column in bitmaps.values and operator_name == 'eq':
+                # eq filters arrive as strings; match the stored value that prints the same
+                mask &= bitmaps.bitmap(column, next((v for v in bitmaps.values[column] if str(v) == value), value))
+            else:
+                other_filters.append((column, operator_name, value))
+        if other_filters:
+            mask &= np.packbits(np.fromiter(
+                (row_matches(row, other_filters) for row in snapshot.rows), dtype=bool, count=bitmaps.size
+            ))
+        return bitmaps.count(mask), {field: bitmaps.counts(field, mask, limit) for field in fields}
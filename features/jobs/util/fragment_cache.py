@@ -0,0 +1,91 @@
+from collections import OrderedDict
+import math
+import os
+import threading
+from typing import Optional
+
+from flask import render_template
+
+# Rendered cards are a few KB each, so the default holds tens of thousands of them
+MAX_BYTES = int(os.environ.get('FRAGMENT_CACHE_MAX_BYTES', 64 * 2**20))
+
+def score_bucket(job) -> tuple:
+    """The score values the card templates print, so jobs whose scores display the same share a fragment"""
+    score = getattr(job, 'compatibility_score', None)
+    factors = getattr(job, 'factors', None)
+    return (
+        math.floor(score * 100) if score else None,
+        tuple(factor['score'] for factor in factors.to_display_dict()) if factors else None,
+        getattr(job, 'overall_score', None)
+    )
+
+class FragmentCache:
+    """
+    LRU cache of rendered job card HTML keyed by (template, job id, job updated_at, score bucket,
+    extra context), bounded by the encoded size of the cached fragments.
+    """
+
+    def __init__(self, max_bytes: int = MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[tuple, tuple[str, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def render(self, template: str, job, **context) -> str:
+        """render_template(template, job=job, **context), reusing the HTML of an earlier render"""
+        key = self.key(template, job, context)
+        if key is None:
+            return render_template(template, job=job, **context)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        html = render_template(template, job=job, **context)
+        self._put(key, html)
+        return html
+
+    @staticmethod
+    def key(template: str, job, context: dict) -> Optional[tuple]:
+        # Without updated_at a changed job could not be told apart, so it is rendered every time
+        updated_at = getattr(job, 'updated_at', None)
+        if updated_at is None:
+            return None
+        return (template, str(job.id), updated_at, score_bucket(job), tuple(sorted(context.items())))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        return {
+            'entries': len(self._entries),
+            'bytes': self.bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
+
+    def _put(self, key: tuple, html: str):
+        size = len(html.encode())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[1]
+            self._entries[key] = (html, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+
+fragment_cache = FragmentCache()
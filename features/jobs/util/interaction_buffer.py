@@ -0,0 +1,190 @@
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+from postgrest.exceptions import APIError
+
+from services.supabase.supabase_client import get_service_supabase
+
+# Pending rows that trigger a flush; also the most rows sent in one upsert
+MAX_BATCH = int(os.environ.get('INTERACTION_BUFFER_MAX_BATCH', 500))
+# Seconds after which pending rows are flushed even if the batch is not full
+FLUSH_INTERVAL = float(os.environ.get('INTERACTION_BUFFER_FLUSH_SECONDS', 2))
+# Most distinct rows held in memory; further adds wait for a flush
+MAX_PENDING = int(os.environ.get('INTERACTION_BUFFER_MAX_PENDING', 10_000))
+# Seconds an add waits for room before it is rejected
+BLOCK_SECONDS = float(os.environ.get('INTERACTION_BUFFER_BLOCK_SECONDS', 1))
+
+class InteractionBuffer:
+    """
+    Write-behind buffer for upserts into one table. Rows are keyed by the table's conflict columns,
+    so repeated interactions collapse into one pending row, and a background thread flushes them in
+    multi-row upserts once MAX_BATCH rows are pending or FLUSH_INTERVAL has passed.
+    Rows are written with the service role key, which skips RLS, so callers must only queue rows they
+    have checked belong to the signed-in user. A batch the database rejects is split until the rejected
+    rows are found; those are dropped.
+    """
+
+    def __init__(self, table: str, key_columns: tuple[str, ...], client_factory: Callable = get_service_supabase,
+                 max_batch: int = MAX_BATCH, flush_interval: float = FLUSH_INTERVAL,
+                 max_pending: int = MAX_PENDING, block_seconds: float = BLOCK_SECONDS):
+        self.table = table
+        self.key_columns = key_columns
+        self.client_factory = client_factory
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.block_seconds = block_seconds
+        self._pending: dict[tuple, dict] = {}
+        self._client = None
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self.accepted = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self.flushed = 0
+        self.batches = 0
+        self.dropped = 0
+        self.invalid = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self.last_flush_seconds: Optional[float] = None
+
+    def add(self, row: dict) -> bool:
+        """Queue a row; False if the buffer stayed full for block_seconds or is closed"""
+        key = tuple(row[column] for column in self.key_columns)
+        with self._condition:
+            if self._closed:
+                return False
+            self._start_worker()
+            if key in self._pending:
+                self._pending[key] = row
+                self.accepted += 1
+                self.coalesced += 1
+                return True
+            deadline = time.monotonic() + self.block_seconds
+            while len(self._pending) >= self.max_pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._closed:
+                    self.rejected += 1
+                    return False
+                self._condition.notify_all()
+                self._condition.wait(remaining)
+            self._pending[key] = row
+            self.accepted += 1
+            if len(self._pending) >= self.max_batch:
+                self._condition.notify_all()
+            return True
+
+    def flush(self) -> int:
+        """Upsert every pending row now; returns the number written"""
+        with self._flush_lock:
+            with self._condition:
+                rows = list(self._pending.values())
+                self._pending = {}
+                self._condition.notify_all()
+            if not rows:
+                return 0
+            started = time.monotonic()
+            written = 0
+            start = 0
+            try:
+                if self._client is None:
+                    self._client = self.client_factory()
+                for start in range(0, len(rows), self.max_batch):
+                    # Keys are distinct, so one statement never upserts the same row twice
+                    written += self._upsert(self._client, rows[start:start + self.max_batch])
+            except Exception as e:
+                print(f"Error flushing {self.table}: {e}")
+                self.errors += 1
+                self.last_error = str(e)
+                self._requeue(rows[start:])
+            self.flushed += written
+            self.last_flush_seconds = time.monotonic() - started
+            return written
+
+    def close(self, timeout: float = 10):
+        """Stop the flush thread and write what is left"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        self.flush()
+
+    def stats(self) -> dict:
+        return {
+            'pending': len(self._pending),
+            'accepted': self.accepted,
+            'coalesced': self.coalesced,
+            'rejected': self.rejected,
+            'flushed': self.flushed,
+            'batches': self.batches,
+            'dropped': self.dropped,
+            'invalid': self.invalid,
+            'errors': self.errors,
+            'last_error': self.last_error,
+            'last_flush_seconds': self.last_flush_seconds
+        }
+
+    def _upsert(self, supabase, rows: list[dict]) -> int:
+        """Rows written; a rejected batch is halved until the rows rejected on their own are found and dropped"""
+        try:
+            supabase.table(self.table).upsert(rows, on_conflict=', '.join(self.key_columns)).execute()
+        except APIError as e:
+            if not _is_rejection(e):
+                raise
+            if len(rows) == 1:
+                print(f"Dropping row rejected by {self.table}: {e.message}")
+                self.invalid += 1
+                self.last_error = str(e)
+                return 0
+            middle = len(rows) // 2
+            return self._upsert(supabase, rows[:middle]) + self._upsert(supabase, rows[middle:])
+        self.batches += 1
+        return len(rows)
+
+    def _requeue(self, rows: list[dict]):
+        # Newer rows for the same key win; what does not fit is lost rather than blocking requests
+        with self._condition:
+            for row in rows:
+                key = tuple(row[column] for column in self.key_columns)
+                if key in self._pending:
+                    continue
+                if len(self._pending) >= self.max_pending:
+                    self.dropped += 1
+                    continue
+                self._pending[key] = row
+
+    def _start_worker(self):
+        # Started on first add, so a worker forked after import gets its own thread
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name=f'{self.table}-flush', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        failed = False
+        while True:
+            with self._condition:
+                deadline = time.monotonic() + self.flush_interval
+                # After a failed flush the requeued rows may fill a batch; wait out the interval before retrying
+                while not self._closed and (failed or len(self._pending) < self.max_batch):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                closed = self._closed
+            if closed:
+                return
+            errors = self.errors
+            self.flush()
+            failed = self.errors > errors
+
+def _is_rejection(error: APIError) -> bool:
+    """Whether the rows themselves were refused, so sending them again cannot succeed"""
+    # Postgres data (22), constraint (23) and syntax or privilege (42) errors
+    return (error.code or '')[:2] in ('22', '23', '42')
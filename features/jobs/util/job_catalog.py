@@ -0,0 +1,209 @@
+from dataclasses import dataclass, field
+import os
+import threading
+import time
+from typing import Callable, Optional
+import uuid
+
+from features.jobs.util.catalog_features import JobList
+from services.supabase.supabase_client import get_anon_supabase
+from util.models.job_model import Job
+
+# Seconds after which a read triggers a background delta sync of rows updated since the watermark
+REFRESH_INTERVAL = float(os.environ.get('JOB_CATALOG_REFRESH_SECONDS', 60))
+# Seconds between sweeps of every id, to notice deleted jobs when the row count does not give them away
+ID_SWEEP_INTERVAL = float(os.environ.get('JOB_CATALOG_ID_SWEEP_SECONDS', 600))
+# Seconds between full reloads, a safety net for writes whose updated_at is behind the watermark
+FULL_RELOAD_INTERVAL = float(os.environ.get('JOB_CATALOG_FULL_RELOAD_SECONDS', 3600))
+PAGE_SIZE = 1000
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """Immutable view of the jobs table at one version: rows and decoded jobs ordered by id"""
+    rows: list[dict]
+    jobs: JobList
+    positions: dict[str, int]
+    version: int
+    _orders: dict[str, list[int]] = field(default_factory=dict, compare=False, repr=False)
+
+    def get(self, job_id) -> Optional[Job]:
+        position = self.positions.get(str(job_id))
+        return self.jobs[position] if position is not None else None
+
+    def get_row(self, job_id) -> Optional[dict]:
+        position = self.positions.get(str(job_id))
+        return self.rows[position] if position is not None else None
+
+    def order(self, column: str) -> list[int]:
+        """Row positions ordered by column then id, NULLs last as in Postgres; sorted once per snapshot"""
+        order = self._orders.get(column)
+        if order is None:
+            order = sorted(range(len(self.rows)), key=lambda position: sort_key(self.rows[position], column))
+            self._orders[column] = order
+        return order
+
+def sort_key(row: dict, column: str) -> tuple:
+    value = row.get(column)
+    return (value is None, value if value is not None else '', row['id'])
+
+class JobCatalog:
+    """
+    Process-wide copy of the jobs table. Loaded once, then kept current by delta syncs of rows
+    with updated_at at or past the watermark, run in the background when a read finds the copy stale.
+    Deletions are found by comparing row counts and by periodic id sweeps.
+    Every user is served the same copy, so it is read as the anon role: only rows and columns RLS
+    shows to anonymous visitors are cached.
+    """
+
+    def __init__(self, columns: str, decode: Callable[[dict], Job], client_factory: Callable = get_anon_supabase):
+        self.columns = columns
+        self.decode = decode
+        self.client_factory = client_factory
+        # Snapshot versions count from 0 in every process; with this they name one snapshot across processes
+        self.instance_id = uuid.uuid4().hex
+        self._rows: dict[str, dict] = {}
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._watermark: Optional[str] = None
+        self._stale = False
+        self._refreshing = False
+        self._refresh_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self.loaded_at: Optional[float] = None
+        self.refreshed_at: Optional[float] = None
+        self.swept_at: Optional[float] = None
+        self.refreshes = 0
+        self.full_loads = 0
+        self.upserts = 0
+        self.deletions = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self.last_refresh_seconds: Optional[float] = None
+
+    def snapshot(self) -> CatalogSnapshot:
+        """The current snapshot; loads synchronously on first use and schedules a refresh when stale"""
+        if self._snapshot is None:
+            self.refresh()
+            if self._snapshot is None:
+                raise RuntimeError(f"Job catalog could not be loaded: {self.last_error}")
+        elif self._stale or time.monotonic() - self.refreshed_at >= REFRESH_INTERVAL:
+            self._refresh_in_background()
+        return self._snapshot
+
+    def mark_stale(self):
+        """Refresh on the next read, e.g. after a job was written through the CMS"""
+        self._stale = True
+
+    def refresh(self):
+        with self._refresh_lock:
+            started = time.monotonic()
+            self._stale = False
+            try:
+                supabase = self.client_factory()
+                if self._snapshot is None or started - self.loaded_at >= FULL_RELOAD_INTERVAL:
+                    self._load_all(supabase)
+                else:
+                    changed = self._sync_updated(supabase)
+                    deleted = self._sync_deleted(supabase, force=started - self.swept_at >= ID_SWEEP_INTERVAL)
+                    if changed or deleted:
+                        self._publish()
+                self.refreshes += 1
+                self.refreshed_at = time.monotonic()
+            except Exception as e:
+                print(f"Error refreshing job catalog: {e}")
+                self.errors += 1
+                self.last_error = str(e)
+                # Try again on the next interval rather than on every read
+                if self.refreshed_at is not None:
+                    self.refreshed_at = time.monotonic()
+            finally:
+                self.last_refresh_seconds = time.monotonic() - started
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        snapshot = self._snapshot
+        return {
+            'jobs': len(snapshot.jobs) if snapshot else 0,
+            'version': snapshot.version if snapshot else None,
+            'watermark': self._watermark,
+            'staleness_seconds': now - self.refreshed_at if self.refreshed_at is not None else None,
+            'last_refresh_seconds': self.last_refresh_seconds,
+            'refreshing': self._refreshing,
+            'refreshes': self.refreshes,
+            'full_loads': self.full_loads,
+            'upserts': self.upserts,
+            'deletions': self.deletions,
+            'errors': self.errors,
+            'last_error': self.last_error
+        }
+
+    def _refresh_in_background(self):
+        with self._state_lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.refresh()
+            finally:
+                self._refreshing = False
+        threading.Thread(target=run, name='job-catalog-refresh', daemon=True).start()
+
+    def _load_all(self, supabase):
+        rows = self._fetch_pages(lambda: supabase.table('jobs').select(self.columns).order('id'))
+        self._rows = {str(row['id']): row for row in rows}
+        self._watermark = max((row['updated_at'] for row in rows if row.get('updated_at')), default=None)
+        self.loaded_at = self.swept_at = time.monotonic()
+        self.full_loads += 1
+        self._publish()
+
+    def _sync_updated(self, supabase) -> bool:
+        if self._watermark is None:
+            query = lambda: supabase.table('jobs').select(self.columns).order('updated_at').order('id')
+        else:
+            # gte: rows sharing the watermark's timestamp may have landed after the last sync
+            query = lambda: supabase.table('jobs').select(self.columns).gte(
+                'updated_at', self._watermark
+            ).order('updated_at').order('id')
+        changed = False
+        for row in self._fetch_pages(query):
+            job_id = str(row['id'])
+            if self._rows.get(job_id) != row:
+                self._rows[job_id] = row
+                self.upserts += 1
+                changed = True
+            if row.get('updated_at') and (self._watermark is None or row['updated_at'] > self._watermark):
+                self._watermark = row['updated_at']
+        return changed
+
+    def _sync_deleted(self, supabase, force: bool) -> bool:
+        if not force:
+            count_resp = supabase.table('jobs').select('id', count='exact').limit(1).execute()
+            if count_resp.count == len(self._rows):
+                return False
+        ids = {str(row['id']) for row in self._fetch_pages(lambda: supabase.table('jobs').select('id').order('id'))}
+        self.swept_at = time.monotonic()
+        deleted = [job_id for job_id in self._rows if job_id not in ids]
+        for job_id in deleted:
+            del self._rows[job_id]
+        self.deletions += len(deleted)
+        return bool(deleted)
+
+    def _publish(self):
+        rows = sorted(self._rows.values(), key=lambda row: row['id'])
+        version = self._snapshot.version + 1 if self._snapshot else 0
+        self._snapshot = CatalogSnapshot(
+            rows=rows,
+            jobs=JobList(self.decode(row) for row in rows),
+            positions={str(row['id']): position for position, row in enumerate(rows)},
+            version=version
+        )
+
+    @staticmethod
+    def _fetch_pages(query: Callable) -> list[dict]:
+        rows: list[dict] = []
+        while True:
+            page = query().range(len(rows), len(rows) + PAGE_SIZE - 1).execute().data or []
+            rows.extend(page)
+            if len(page) < PAGE_SIZE:
+                return rows
@@ -1,8 +1,20 @@
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.feature_extraction.text import TfidfVectorizer
+import dataclasses
+from dataclasses import dataclass
+import hashlib
+import json
+from typing import Optional
 
+import numpy as np
+from scipy import sparse
+
+from features.jobs.util import parallel_scoring
+from features.jobs.util.accommodations_index import match_postings, normalize_accommodation
+from features.jobs.util.compatibility_cache import compatibility_cache
+from features.jobs.util.catalog_features import WORK_MODE_MISSING, WORK_MODE_OTHER, CatalogFeatures, parse_hours
+from features.jobs.util.locations import MISSING, location_similarity, location_table, normalize_location
+from features.jobs.util.qualifications_index import QualificationsIndex, get_qualifications_index
 from util.classes.result import Result
-from util.models.job_model import Job, JobFactors, JobWithCompatibility, JobWithCompatibilityFactors
+from util.models.job_model import Job, JobFactors, ScoredJob
 from util.models.user_profile_model import UserProfile
 
 WEIGHTS = {
@@ -13,87 +25,192 @@ WEIGHTS = {
     "qualifications_score": 0.3
 }
 
+FACTOR_NAMES = list(WEIGHTS)
+# Factor rows are turned into JobFactors positionally
+assert FACTOR_NAMES == [field.name for field in dataclasses.fields(JobFactors)]
+QUALIFICATIONS_FACTOR = FACTOR_NAMES.index("qualifications_score")
+_FACTOR_COLUMNS = {name: col for col, name in enumerate(FACTOR_NAMES)}
+# Stable across processes, unlike hash(), so it can be part of cache keys shared with clients
+WEIGHTS_VERSION = hashlib.sha256(json.dumps(WEIGHTS, sort_keys=True).encode()).hexdigest()[:16]
+
+@dataclass
+class ProfileQuery:
+    """A profile resolved once against a catalog's vocabularies, in the form the batch kernels take"""
+    location_ids: np.ndarray
+    hours: Optional[float]
+    work_mode_scores: np.ndarray
+    accommodation_terms: Optional[list[list[int]]]
+    qualifications: sparse.csr_matrix
+
 # Public (should return Result or list[Result])
 
-def calculate_jobs_compatibility(jobs: list[Job], user_profile: UserProfile) -> list[Result[JobWithCompatibility]]:
-    jobs_with_compatibility: list[Result[JobWithCompatibility]] = []
-    for job in jobs:
-        compatibility_result = calculate_job_compatibility(job, user_profile)
-        if compatibility_result.is_success():
-            job_with_compatibility = JobWithCompatibility(
-                **job.__dict__,
-                compatibility_score=compatibility_result.data
+def calculate_jobs_compatibility(jobs: list[Job], user_profile: UserProfile) -> list[Result[ScoredJob]]:
+    catalog = CatalogFeatures.for_jobs(jobs)
+    scores_res = calculate_catalog_compatibility(catalog, user_profile)
+    if not scores_res.is_success():
+        return [Result[ScoredJob](success=False, error=scores_res.error) for _ in jobs]
+    return [
+        Result[ScoredJob](success=True, data=ScoredJob(job, score)) if error is None
+        else Result[ScoredJob](success=False, error=error)
+        for job, score, error in zip(jobs, scores_res.data.tolist(), catalog.errors)
+    ]
+
+def calculate_jobs_compatibility_factors(jobs: list[Job], user_profile: UserProfile) -> list[Result[ScoredJob]]:
+    catalog = CatalogFeatures.for_jobs(jobs)
+    factors_res = calculate_catalog_factors(catalog, user_profile)
+    if not factors_res.is_success():
+        return [Result[ScoredJob](success=False, error=factors_res.error) for _ in jobs]
+    factors = factors_res.data
+    scores = _calculate_total_compatibilities(factors).tolist()
+    return [
+        Result[ScoredJob](success=True, data=ScoredJob(job, score, JobFactors(*row))) if error is None
+        else Result[ScoredJob](success=False, error=error)
+        for job, row, score, error in zip(jobs, factors.tolist(), scores, catalog.errors)
+    ]
+
+def calculate_top_jobs_compatibility_factors(jobs: list[Job], user_profile: UserProfile, k: int) -> Result[list[ScoredJob]]:
+    """The k most compatible jobs, best first. Jobs that fail to score are left out."""
+    catalog = CatalogFeatures.for_jobs(jobs)
+    top_res = calculate_catalog_top_k(catalog, user_profile, k)
+    if not top_res.is_success():
+        return Result(success=False, error=top_res.error, data=[])
+    indices, factors, scores = top_res.data
+    top_jobs = [
+        ScoredJob(jobs[i], score, JobFactors(*row))
+        for i, row, score in zip(indices.tolist(), factors.tolist(), scores.tolist())
+    ]
+    return Result(success=True, data=top_jobs)
+
+def calculate_catalog_factors(catalog: CatalogFeatures, user_profile: UserProfile) -> Result[np.ndarray]:
+    """Factor matrix of shape (jobs, factors), columns ordered as WEIGHTS. Rows of invalid jobs are zero."""
+    try:
+        cache_key = _catalog_cache_key(catalog, user_profile)
+        if cache_key is not None:
+            cached = compatibility_cache.get_catalog(cache_key)
+            if cached is not None:
+                return Result(success=True, data=cached)
+        query = _build_profile_query(catalog, user_profile)
+        if parallel_scoring.should_parallelize(catalog.size):
+            factors = parallel_scoring.calculate_factors(catalog, query, _calculate_shard_factors)
+        else:
+            factors = _calculate_shard_factors(query, catalog.arrays(), 0, catalog.size)
+        if cache_key is not None:
+            compatibility_cache.put_catalog(cache_key, factors)
+        return Result(success=True, data=factors)
+    except Exception as e:
+        return Result(success=False, error=str(e))
+
+def calculate_catalog_top_k(catalog: CatalogFeatures, user_profile: UserProfile, k: int, use_cache: bool = True) -> Result[tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Catalog indices, factor rows and totals of the k best valid jobs, best first (ties keep catalog order).
+    Ranks the cached factor matrix of the catalog when there is one. Otherwise the qualifications factor
+    is only computed for jobs whose cheap factors plus the best possible qualifications score can still
+    reach the k-th best lower bound.
+    """
+    try:
+        weights = _normalized_weights()
+        candidates = np.flatnonzero(catalog.valid)
+        cache_key = _catalog_cache_key(catalog, user_profile) if use_cache else None
+        factors = compatibility_cache.get_catalog(cache_key) if cache_key is not None else None
+        if factors is None:
+            query = _build_profile_query(catalog, user_profile)
+            factors = _calculate_shard_factors(query, catalog.arrays(), 0, catalog.size, include_qualifications=False)
+            if 0 < k < len(candidates):
+                lower = factors[candidates] @ weights
+                threshold = np.partition(lower, -k)[-k]
+                candidates = candidates[lower + weights[QUALIFICATIONS_FACTOR] >= threshold]
+            factors[candidates, QUALIFICATIONS_FACTOR] = _calculate_qualifications_matches(
+                query.qualifications, catalog.qualification_matrix[candidates]
             )
-            jobs_with_compatibility.append(Result[JobWithCompatibility](success=True, data=job_with_compatibility))
+        if k <= 0 or not len(candidates):
+            return Result(success=True, data=(candidates[:0], factors[:0], np.zeros(0)))
+        totals = factors[candidates] @ weights
+        if len(candidates) > k:
+            kth = np.partition(totals, -k)[-k]
+            above = np.flatnonzero(totals > kth)
+            top = np.concatenate([above, np.flatnonzero(totals == kth)[:k - len(above)]])
         else:
-            jobs_with_compatibility.append(Result[JobWithCompatibility](success=False, error=compatibility_result.error))
-    return jobs_with_compatibility
+            top = np.arange(len(candidates))
+        top = top[np.lexsort((candidates[top], -totals[top]))]
+        indices = candidates[top]
+        return Result(success=True, data=(indices, factors[indices], totals[top]))
+    except Exception as e:
+        return Result(success=False, error=str(e))
+
+def calculate_catalog_compatibility(catalog: CatalogFeatures, user_profile: UserProfile) -> Result[np.ndarray]:
+    factors_res = calculate_catalog_factors(catalog, user_profile)
+    if not factors_res.is_success():
+        return Result(success=False, error=factors_res.error)
+    return Result(success=True, data=_calculate_total_compatibilities(factors_res.data))
 
 def calculate_job_compatibility(job: Job, user_profile: UserProfile) -> Result[float]:
     data_res = calculate_job_compatibility_factors(job, user_profile)
     if not data_res.is_success():
         return Result[float](success=False, error=data_res.error)
-    data = data_res.data
-    total_score = _calculate_total_compatibility(data)
-    return Result(success=True, data=total_score)
+    return Result(success=True, data=data_res.data.compatibility_score)
 
-def calculate_job_compatibility_factors(job: Job, user_profile: UserProfile) -> Result[JobWithCompatibilityFactors]:
+def calculate_job_compatibility_factors(job: Job, user_profile: UserProfile) -> Result[ScoredJob]:
     try:
-        user_prefs = (
-            user_profile.remote_preference,
-            user_profile.hybrid_preference,
-            user_profile.in_person_preference
-        )
-        
-        job_qualifications = ','.join(job.qualifications)
-
-        location_score = _calculate_location_similarity(user_profile.location, job.location)
-        hours_score = _calculate_hours_compatibility(user_profile.hours_per_week, job.weekly_hours)
-        accommodations_score = _calculate_accommodations_match(user_profile.accommodations, job.accommodations)
-        work_mode_score = _calculate_work_mode_compatibility(user_prefs, job.work_mode)
-        qualifications_score = _calculate_qualifications_match(user_profile.educational_background, job_qualifications)
-
-        overall_score: float = _calculate_total_compatibility_from_scores(
-            JobFactors(
-                location_score=location_score,
-                hours_score=hours_score,
-                work_mode_score=work_mode_score,
-                accommodations_score=accommodations_score,
-                qualifications_score=qualifications_score
-            )
-        )
+        # Merged into the index fitted over the whole catalog, so the score agrees with batch scoring
+        qualifications_index = get_qualifications_index({job.id: ','.join(job.qualifications)})
+        cache_key = _cache_key(job, user_profile, qualifications_index)
+        cached = compatibility_cache.get(cache_key)
+        if cached is not None:
+            factors = JobFactors(*cached)
+        else:
+            factors = _calculate_job_factors(job, user_profile, qualifications_index)
+            compatibility_cache.put(cache_key, dataclasses.astuple(factors))
+        overall_score: float = _calculate_total_compatibility_from_scores(factors)
+        return Result[ScoredJob](success=True, data=ScoredJob(job, overall_score, factors))
+    except Exception as e:
+        return Result[ScoredJob](success=False, error=str(e))
 
-        factors: JobFactors = JobFactors(
-            location_score=location_score,
-            hours_score=hours_score,
-            work_mode_score=work_mode_score,
-            accommodations_score=accommodations_score,
-            qualifications_score=qualifications_score
-        )
+# Private
 
-        job_with_factors = JobWithCompatibilityFactors(
-            **job.__dict__,
-            compatibility_score=overall_score,
-            factors=factors
-        )
+def _calculate_job_factors(job: Job, user_profile: UserProfile, qualifications_index: QualificationsIndex) -> JobFactors:
+    user_prefs = (
+        user_profile.remote_preference,
+        user_profile.hybrid_preference,
+        user_profile.in_person_preference
+    )
 
-        return Result[JobWithCompatibilityFactors](success=True, data=job_with_factors)
-    except Exception as e:
-        return Result[JobWithCompatibilityFactors](success=False, error=str(e))
+    location_score = _calculate_location_similarity(user_profile.location, job.location)
+    hours_score = _calculate_hours_compatibility(user_profile.hours_per_week, job.weekly_hours)
+    accommodations_score = _calculate_accommodations_match(user_profile.accommodations, job.accommodations)
+    work_mode_score = _calculate_work_mode_compatibility(user_prefs, job.work_mode)
+    qualifications_score = _calculate_qualifications_match(user_profile.educational_background, qualifications_index, job.id)
 
-# Private
+    return JobFactors(
+        location_score=location_score,
+        hours_score=hours_score,
+        work_mode_score=work_mode_score,
+        accommodations_score=accommodations_score,
+        qualifications_score=qualifications_score
+    )
+
+def _cache_key(job: Job, user_profile: UserProfile, qualifications_index: QualificationsIndex) -> tuple:
+    return compatibility_cache.key(
+        user_profile.id, user_profile.content_hash(), job.id, getattr(job, 'updated_at', None),
+        WEIGHTS_VERSION, qualifications_index.fit_id
+    )
+
+def _catalog_cache_key(catalog: CatalogFeatures, user_profile: UserProfile) -> Optional[tuple]:
+    """Key of the catalog's factor matrix for the profile; None for catalogs built for one request"""
+    if catalog.catalog_id is None:
+        return None
+    return compatibility_cache.catalog_key(
+        user_profile.id, user_profile.content_hash(), catalog.catalog_id,
+        WEIGHTS_VERSION, catalog.qualifications_index.fit_id
+    )
 
 def _calculate_location_similarity(user_location: str, job_location: str) -> float:
-    """Calculate location similarity based on city/state/country match"""    
-    user_loc_parts = user_location.lower().split(', ')
-    job_loc_parts = job_location.lower().split(', ')
-    
-    matches = sum(p1 == p2 for p1, p2 in zip(user_loc_parts, job_loc_parts))
-    return matches / max(len(user_loc_parts), len(job_loc_parts))
+    """Calculate location similarity based on city/state/country match"""
+    return location_similarity(normalize_location(user_location), normalize_location(job_location))
 
 def _calculate_hours_compatibility(user_hours, job_hours):
     """Calculate hours compatibility"""
-    if not user_hours or not job_hours:
+    user_hours, job_hours = parse_hours(user_hours), parse_hours(job_hours)
+    if user_hours is None or job_hours is None:
         return 0.5 # Neutral score if data is missing
         
     # Simple formula - difference of more than 10 hours is considered incompatible
@@ -121,9 +238,9 @@ def _calculate_accommodations_match(user_accommodations, job_accommodations):
     if not user_accommodations:
         return 1.0 # No specific accommodations needed
         
-    # Convert all to lowercase for better matching
-    user_acc = [acc.lower() for acc in user_accommodations]
-    job_acc = [acc.lower() for acc in job_accommodations]
+    # Normalize case and whitespace for better matching
+    user_acc = [normalize_accommodation(acc) for acc in user_accommodations]
+    job_acc = [normalize_accommodation(acc) for acc in job_accommodations]
     
     # Count matches
     matches = sum(any(ua in ja for ja in job_acc) for ua in user_acc)
@@ -131,11 +248,10 @@ def _calculate_accommodations_match(user_accommodations, job_accommodations):
 
 # BETA FUNCTION, NOT PARTICULARLY ACCURATE
 # TODO: Improve qualifications matching
-def _calculate_qualifications_match(user_qualifications, job_qualifications):
-    try: 
-        vectorizer = TfidfVectorizer()
-        tfidf_matrix = vectorizer.fit_transform([user_qualifications, job_qualifications])
-        qualification_score = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0]
+def _calculate_qualifications_match(user_qualifications, index: QualificationsIndex, job_id):
+    """TF-IDF cosine similarity, weighted by the catalog-wide idf"""
+    try:
+        qualification_score = float(index.similarities(user_qualifications, index.select([job_id]))[0])
     except:
         qualification_score = 0.0
     return qualification_score if qualification_score else 0.0
@@ -149,13 +265,75 @@ def _calculate_total_compatibility_from_scores(scores: JobFactors) -> float:
     normalized_weights = {k: w / total_weight for k, w in present_weights.items()}
     return sum(present[k] * normalized_weights[k] for k in present)
 
-def _calculate_total_compatibility(job: JobWithCompatibilityFactors) -> float:
-    return _calculate_total_compatibility_from_scores(
-        JobFactors(
-            location_score=job.factors.location_score,
-            hours_score=job.factors.hours_score,
-            work_mode_score=job.factors.work_mode_score,
-            accommodations_score=job.factors.accommodations_score,
-            qualifications_score=job.factors.qualifications_score
+def _normalized_weights() -> np.ndarray:
+    weights = np.array([WEIGHTS[name] for name in FACTOR_NAMES])
+    return weights / weights.sum()
+
+def _calculate_total_compatibilities(factors: np.ndarray) -> np.ndarray:
+    """Weighted totals for a factor matrix, in one matrix-vector product"""
+    return factors @ _normalized_weights()
+
+# Private, batch (kernels over a row range of CatalogFeatures.arrays(), same results as the per-job functions above)
+
+def _build_profile_query(catalog: CatalogFeatures, user_profile: UserProfile) -> ProfileQuery:
+    user_prefs = (
+        user_profile.remote_preference,
+        user_profile.hybrid_preference,
+        user_profile.in_person_preference
+    )
+    work_mode_scores = np.full(WORK_MODE_OTHER + 1, 0.2)
+    work_mode_scores[WORK_MODE_MISSING] = 0.5
+    for code, pref in enumerate(user_prefs, start=1):
+        if pref:
+            work_mode_scores[code] = 1.0
+    accommodations = user_profile.accommodations
+    return ProfileQuery(
+        location_ids=location_table.lookup(user_profile.location),
+        hours=parse_hours(user_profile.hours_per_week),
+        work_mode_scores=work_mode_scores,
+        accommodation_terms=[catalog.accommodations_index.resolve(ua) for ua in accommodations] if accommodations else None,
+        qualifications=catalog.qualifications_index.transform(user_profile.educational_background)
+    )
+
+def _calculate_shard_factors(query: ProfileQuery, arrays: dict, start: int, end: int, include_qualifications: bool = True) -> np.ndarray:
+    """Factor rows for catalog rows [start, end). Rows of invalid jobs are zero."""
+    factors = np.zeros((end - start, len(FACTOR_NAMES)))
+    factors[:, _FACTOR_COLUMNS["location_score"]] = _calculate_location_similarities(query.location_ids, arrays['locations'][start:end])
+    factors[:, _FACTOR_COLUMNS["hours_score"]] = _calculate_hours_compatibilities(query.hours, arrays['hours'][start:end])
+    factors[:, _FACTOR_COLUMNS["work_mode_score"]] = query.work_mode_scores[arrays['work_modes'][start:end]]
+    factors[:, _FACTOR_COLUMNS["accommodations_score"]] = _calculate_accommodations_matches(
+        query.accommodation_terms, arrays['accommodation_indices'], arrays['accommodation_indptr'], start, end
+    )
+    if include_qualifications:
+        indptr = arrays['qualification_indptr']
+        lo, hi = indptr[start], indptr[end]
+        job_matrix = sparse.csr_matrix(
+            (arrays['qualification_data'][lo:hi], arrays['qualification_indices'][lo:hi], indptr[start:end + 1] - lo),
+            shape=(end - start, query.qualifications.shape[1])
         )
-    )
\ No newline at end of file
+        factors[:, QUALIFICATIONS_FACTOR] = _calculate_qualifications_matches(query.qualifications, job_matrix)
+    factors[~arrays['valid'][start:end]] = 0.0
+    return factors
+
+def _calculate_location_similarities(user_ids: np.ndarray, locations: np.ndarray) -> np.ndarray:
+    job_present = locations != MISSING
+    matches = ((locations == user_ids) & job_present).sum(axis=1)
+    present = (job_present | (user_ids != MISSING)).sum(axis=1)
+    return np.divide(matches, present, out=np.zeros(len(locations)), where=present > 0)
+
+def _calculate_hours_compatibilities(user_hours: Optional[float], hours: np.ndarray) -> np.ndarray:
+    if user_hours is None:
+        return np.full(len(hours), 0.5)
+    difference = np.abs(user_hours - hours)
+    return np.where(np.isnan(hours), 0.5, np.maximum(0, 1 - (difference / 10)))
+
+def _calculate_accommodations_matches(user_terms: Optional[list[list[int]]], indices: np.ndarray, indptr: np.ndarray, start: int, end: int) -> np.ndarray:
+    if not user_terms:
+        return np.ones(end - start)
+    matches = np.zeros(end - start)
+    for term_ids in user_terms:
+        matches += match_postings(indices, indptr, term_ids, start, end)
+    return matches / len(user_terms)
+
+def _calculate_qualifications_matches(user_vector: sparse.csr_matrix, job_matrix: sparse.csr_matrix) -> np.ndarray:
+    return (job_matrix @ user_vector.T).toarray().ravel()
@@ -0,0 +1,95 @@
+from functools import lru_cache
+import threading
+from typing import Optional
+
+import numpy as np
+
+US_STATES = {
+    'alabama': 'al', 'alaska': 'ak', 'arizona': 'az', 'arkansas': 'ar', 'california': 'ca', 'colorado': 'co',
+    'connecticut': 'ct', 'delaware': 'de', 'district of columbia': 'dc', 'florida': 'fl', 'georgia': 'ga',
+    'hawaii': 'hi', 'idaho': 'id', 'illinois': 'il', 'indiana': 'in', 'iowa': 'ia', 'kansas': 'ks',
+    'kentucky': 'ky', 'louisiana': 'la', 'maine': 'me', 'maryland': 'md', 'massachusetts': 'ma',
+    'michigan': 'mi', 'minnesota': 'mn', 'mississippi': 'ms', 'missouri': 'mo', 'montana': 'mt',
+    'nebraska': 'ne', 'nevada': 'nv', 'new hampshire': 'nh', 'new jersey': 'nj', 'new mexico': 'nm',
+    'new york': 'ny', 'north carolina': 'nc', 'north dakota': 'nd', 'ohio': 'oh', 'oklahoma': 'ok',
+    'oregon': 'or', 'pennsylvania': 'pa', 'rhode island': 'ri', 'south carolina': 'sc', 'south dakota': 'sd',
+    'tennessee': 'tn', 'texas': 'tx', 'utah': 'ut', 'vermont': 'vt', 'virginia': 'va', 'washington': 'wa',
+    'west virginia': 'wv', 'wisconsin': 'wi', 'wyoming': 'wy'
+}
+US_STATE_CODES = set(US_STATES.values())
+
+COUNTRIES = {
+    'us': 'us', 'usa': 'us', 'u.s.': 'us', 'u.s.a.': 'us', 'united states': 'us', 'united states of america': 'us',
+    'ca': 'ca', 'can': 'ca', 'canada': 'ca',
+    'gb': 'gb', 'uk': 'gb', 'united kingdom': 'gb', 'great britain': 'gb', 'england': 'gb',
+    'in': 'in', 'ind': 'in', 'india': 'in',
+    'au': 'au', 'aus': 'au', 'australia': 'au',
+    'de': 'de', 'germany': 'de',
+    'fr': 'fr', 'france': 'fr',
+    'ie': 'ie', 'ireland': 'ie',
+    'mx': 'mx', 'mexico': 'mx',
+    'ae': 'ae', 'uae': 'ae', 'united arab emirates': 'ae',
+    'sa': 'sa', 'saudi arabia': 'sa'
+}
+
+# Component slots of a normalized location
+CITY, REGION, COUNTRY = 0, 1, 2
+MISSING = -1
+UNKNOWN = -2
+
+@lru_cache(maxsize=65536)
+def normalize_location(raw: str) -> tuple[Optional[str], Optional[str], Optional[str]]:
+    """Split a free-form location into (city, region, country), mapping US state and country names to codes"""
+    parts = [part.strip() for part in raw.lower().split(',') if part.strip()]
+    city = region = country = None
+    # A trailing country is only trusted with three parts or an unambiguous name ("CA" alone is California)
+    if parts and parts[-1] in COUNTRIES and (len(parts) >= 3 or parts[-1] not in US_STATE_CODES):
+        country = COUNTRIES[parts.pop()]
+    if len(parts) >= 2 or (parts and (parts[-1] in US_STATES or parts[-1] in US_STATE_CODES)):
+        region = US_STATES.get(parts[-1], parts[-1])
+        parts.pop()
+    if parts:
+        city = parts[-1]
+    if region in US_STATE_CODES and country is None:
+        country = 'us'
+    return city, region, country
+
+def location_similarity(user_location: tuple, job_location: tuple) -> float:
+    """Share of the components present in either location that match"""
+    present = [(u, j) for u, j in zip(user_location, job_location) if u is not None or j is not None]
+    if not present:
+        return 0.0
+    return sum(u == j for u, j in present) / len(present)
+
+class LocationTable:
+    """Interns raw location strings to normalized (city, region, country) integer ids"""
+
+    def __init__(self):
+        self._components: dict[str, int] = {}
+        self._locations: dict[str, tuple[int, int, int]] = {}
+        self._lock = threading.Lock()
+
+    def intern(self, raw: str) -> tuple[int, int, int]:
+        ids = self._locations.get(raw)
+        if ids is None:
+            normalized = normalize_location(raw)
+            with self._lock:
+                ids = tuple(
+                    MISSING if component is None else self._components.setdefault(component, len(self._components))
+                    for component in normalized
+                )
+                self._locations[raw] = ids
+        return ids
+
+    def lookup(self, raw: str) -> np.ndarray:
+        """Ids for a location without interning it; components never seen in the catalog are UNKNOWN"""
+        return np.array([
+            MISSING if component is None else self._components.get(component, UNKNOWN)
+            for component in normalize_location(raw)
+        ], dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+# Shared so ids are comparable across catalogs
+location_table = LocationTable()
@@ -0,0 +1,153 @@
+import atexit
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+from multiprocessing import shared_memory
+import os
+import threading
+from typing import Callable, Optional
+import weakref
+
+import numpy as np
+
+# 0 keeps scoring in the request process. Shards only pay off on large catalogs,
+# smaller ones are scored in-process even when workers are configured.
+WORKERS = int(os.environ.get('SCORING_WORKERS', 0))
+SHARD_SIZE = int(os.environ.get('SCORING_SHARD_SIZE', 25_000))
+MIN_PARALLEL_JOBS = int(os.environ.get('SCORING_PARALLEL_MIN_JOBS', 50_000))
+
+class SharedArrays:
+    """
+    Named numpy arrays copied once into shared memory blocks. Workers map the blocks by name
+    from `handles`, so a catalog is not pickled with every shard.
+    """
+
+    def __init__(self, arrays: dict[str, np.ndarray]):
+        self.handles: dict[str, tuple[str, tuple, str]] = {}
+        self._blocks: list[shared_memory.SharedMemory] = []
+        self._users = 0
+        self._retired = False
+        for name, array in arrays.items():
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+            self._blocks.append(block)
+            self.handles[name] = (block.name, array.shape, array.dtype.str)
+
+    def acquire(self):
+        self._users += 1
+
+    def release(self):
+        self._users -= 1
+        if self._retired and not self._users:
+            self.close()
+
+    def retire(self):
+        """Free the blocks once no scoring call is still reading them"""
+        self._retired = True
+        if not self._users:
+            self.close()
+
+    def close(self):
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks.clear()
+
+_pool: Optional[ProcessPoolExecutor] = None
+_published: Optional[tuple[weakref.ref, SharedArrays]] = None
+_lock = threading.Lock()
+
+def configure(workers: Optional[int] = None, shard_size: Optional[int] = None, min_jobs: Optional[int] = None):
+    """Override the environment settings; changing the worker count restarts the pool"""
+    global WORKERS, SHARD_SIZE, MIN_PARALLEL_JOBS
+    if workers is not None and workers != WORKERS:
+        shutdown()
+        WORKERS = workers
+    if shard_size is not None:
+        SHARD_SIZE = shard_size
+    if min_jobs is not None:
+        MIN_PARALLEL_JOBS = min_jobs
+
+def should_parallelize(size: int) -> bool:
+    return WORKERS > 0 and size >= MIN_PARALLEL_JOBS and size > SHARD_SIZE
+
+def calculate_factors(catalog, query, kernel: Callable) -> np.ndarray:
+    """
+    Run kernel(query, arrays, start, end) over SHARD_SIZE row ranges of catalog in the worker pool
+    and stack the resulting factor blocks in catalog order.
+    """
+    shared = _publish(catalog)
+    try:
+        pool = _get_pool()
+        futures = [
+            pool.submit(_score_shard, kernel, query, shared.handles, start, min(start + SHARD_SIZE, catalog.size))
+            for start in range(0, catalog.size, SHARD_SIZE)
+        ]
+        return np.vstack([future.result() for future in futures])
+    finally:
+        with _lock:
+            shared.release()
+
+def shutdown():
+    global _pool, _published
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+        if _published is not None:
+            _published[1].retire()
+            _published = None
+
+atexit.register(shutdown)
+
+def _publish(catalog) -> SharedArrays:
+    """Shared copy of the catalog's arrays, made once per catalog; the previous catalog's copy is retired"""
+    global _published
+    with _lock:
+        if _published is None or _published[0]() is not catalog:
+            if _published is not None:
+                _published[1].retire()
+            _published = (weakref.ref(catalog), SharedArrays(catalog.arrays()))
+        shared = _published[1]
+        shared.acquire()
+        return shared
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _lock:
+        if _pool is None:
+            # spawn: forking a threaded server process is unsafe
+            _pool = ProcessPoolExecutor(max_workers=WORKERS, mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+# Worker side. Mappings of the last catalog seen are kept between shards.
+_attached: Optional[tuple[tuple, list, dict]] = None
+
+def _score_shard(kernel: Callable, query, handles: dict, start: int, end: int) -> np.ndarray:
+    return kernel(query, _attach(handles), start, end)
+
+def _attach(handles: dict) -> dict[str, np.ndarray]:
+    global _attached
+    key = tuple(sorted(handle[0] for handle in handles.values()))
+    if _attached is not None and _attached[0] == key:
+        return _attached[2]
+    if _attached is not None:
+        _, blocks, arrays = _attached
+        _attached = None
+        arrays.clear()
+        for block in blocks:
+            block.close()
+    blocks, arrays = [], {}
+    for name, (block_name, shape, dtype) in handles.items():
+        block = _open_block(block_name)
+        blocks.append(block)
+        arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+    _attached = (key, blocks, arrays)
+    return arrays
+
+def _open_block(name: str) -> shared_memory.SharedMemory:
+    # The creating process owns and unlinks the block. Before Python 3.13 attaching registers it again,
+    # but spawned workers report to the parent's resource tracker, where the name is already registered.
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
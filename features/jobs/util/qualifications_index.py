@@ -0,0 +1,173 @@
+from dataclasses import dataclass
+import itertools
+import threading
+from typing import Callable, Optional
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+# New or edited documents are transformed with the fitted vocabulary and idf and appended.
+# Once appended rows exceed this share of the fitted corpus, the index is refit from scratch.
+REFIT_FRACTION = 0.1
+
+# Every fit gets a new id. Appends keep it, since they leave the vocabulary, idf and existing rows as they were.
+_fit_ids = itertools.count()
+
+def qualifications_document(job) -> str:
+    return ','.join(job.qualifications)
+
+@dataclass(frozen=True)
+class QualificationsIndex:
+    """TF-IDF matrix of job qualifications, fitted once over the job catalog. Immutable; updates return a new index."""
+    vectorizer: Optional[TfidfVectorizer]
+    matrix: sparse.csr_matrix
+    rows: dict
+    documents: dict
+    version: int
+    fitted_size: int
+    fit_id: int
+
+    @property
+    def appended(self) -> int:
+        return self.matrix.shape[0] - self.fitted_size
+
+    @classmethod
+    def fit(cls, documents: dict, version: int = 0) -> 'QualificationsIndex':
+        ids = list(documents)
+        vectorizer = TfidfVectorizer()
+        try:
+            matrix = vectorizer.fit_transform([documents[job_id] for job_id in ids]).tocsr()
+        except ValueError:
+            # Empty vocabulary, nothing to match against
+            vectorizer = None
+            matrix = sparse.csr_matrix((len(ids), 0))
+        return cls(
+            vectorizer=vectorizer,
+            matrix=matrix,
+            rows={job_id: row for row, job_id in enumerate(ids)},
+            documents=dict(documents),
+            version=version,
+            fitted_size=len(ids),
+            fit_id=next(_fit_ids)
+        )
+
+    def extend(self, documents: dict) -> 'QualificationsIndex':
+        """Add or replace documents without refitting the vocabulary or idf"""
+        ids = list(documents)
+        rows = dict(self.rows)
+        start = self.matrix.shape[0]
+        for offset, job_id in enumerate(ids):
+            rows[job_id] = start + offset
+        return QualificationsIndex(
+            vectorizer=self.vectorizer,
+            matrix=sparse.vstack([self.matrix, self._transform([documents[job_id] for job_id in ids])], format='csr'),
+            rows=rows,
+            documents={**self.documents, **documents},
+            version=self.version,
+            fitted_size=self.fitted_size,
+            fit_id=self.fit_id
+        )
+
+    def transform(self, user_qualifications) -> sparse.csr_matrix:
+        """Row vector for a profile's educational background, normalized like the job rows"""
+        if not isinstance(user_qualifications, str):
+            return sparse.csr_matrix((1, self.matrix.shape[1]))
+        return self._transform([user_qualifications])
+
+    def select(self, job_ids: list) -> sparse.csr_matrix:
+        """Job rows in the given order; ids not in the index get an empty row"""
+        if not self.matrix.shape[0]:
+            return sparse.csr_matrix((len(job_ids), self.matrix.shape[1]))
+        rows = np.fromiter((self.rows.get(job_id, -1) for job_id in job_ids), dtype=np.int64, count=len(job_ids))
+        selected = self.matrix[np.maximum(rows, 0)]
+        missing = rows < 0
+        if missing.any():
+            selected = sparse.diags((~missing).astype(np.float64)) @ selected
+        return selected.tocsr()
+
+    def similarities(self, user_qualifications, job_matrix: Optional[sparse.csr_matrix] = None) -> np.ndarray:
+        """Cosine similarity of the profile against every row of job_matrix (default: the whole index)"""
+        job_matrix = self.matrix if job_matrix is None else job_matrix
+        user_vec = self.transform(user_qualifications)
+        return np.asarray((job_matrix @ user_vec.T).todense()).ravel()
+
+    def _transform(self, documents: list[str]) -> sparse.csr_matrix:
+        if self.vectorizer is None:
+            return sparse.csr_matrix((len(documents), 0))
+        return self.vectorizer.transform(documents).tocsr()
+
+_index: Optional[QualificationsIndex] = None
+_version = 0
+_lock = threading.Lock()
+# Held while the catalog is loaded and fitted, so one request fits and the rest wait for its index.
+# _lock is not held meanwhile, so reads of the version and of a current index carry on.
+_fit_lock = threading.Lock()
+# Returns the document of every job in the catalog, or None where the catalog cannot be read (offline
+# jobs, which pass the whole catalog themselves). Set by the jobs API so fits never cover only the jobs
+# being scored, whose idf would disagree with every other score.
+_catalog_documents: Optional[Callable[[], Optional[dict]]] = None
+
+def set_catalog_documents(loader: Callable[[], Optional[dict]]):
+    global _catalog_documents
+    _catalog_documents = loader
+
+def get_qualifications_index(documents: dict) -> QualificationsIndex:
+    """
+    Shared index covering the job catalog and every (job id -> qualifications document) given. Unknown
+    or changed documents are appended; the index is refit when it was invalidated or has drifted too far.
+    """
+    global _index
+    with _lock:
+        if _index is not None and _index.version == _version:
+            return _merge(_index, documents)
+    with _fit_lock:
+        with _lock:
+            # Fitted by another request while this one waited
+            if _index is not None and _index.version == _version:
+                return _merge(_index, documents)
+            index, version = _index, _version
+        catalog = _catalog_documents() if _catalog_documents is not None else None
+        if catalog is None:
+            catalog = index.documents if index else {}
+        fitted = QualificationsIndex.fit({**catalog, **documents}, version=version)
+        with _lock:
+            _index = fitted
+        return fitted
+
+def _merge(index: QualificationsIndex, documents: dict) -> QualificationsIndex:
+    """Index with documents appended, refit when appends have drifted too far; called holding _lock"""
+    global _index
+    changed = {job_id: doc for job_id, doc in documents.items() if index.documents.get(job_id) != doc}
+    if not changed:
+        return index
+    if index.appended + len(changed) > REFIT_FRACTION * index.fitted_size:
+        _index = QualificationsIndex.fit({**index.documents, **changed}, version=index.version)
+    else:
+        _index = index.extend(changed)
+    return _index
+
+def update_qualifications_index(documents: dict):
+    """
+    Add or replace documents of written jobs in the shared index without refitting it, so scores of every
+    other job stay cached. An index that is not fitted yet reads them from the catalog when it is.
+    """
+    with _lock:
+        if _index is not None and _index.version == _version:
+            _merge(_index, documents)
+
+def is_current(index: QualificationsIndex) -> bool:
+    """Whether index is a fit of the shared index as it is now; appends since keep it current"""
+    with _lock:
+        return _index is not None and index.version == _version and index.fit_id == _index.fit_id
+
+def qualifications_index_version() -> tuple[int, Optional[int]]:
+    """(invalidation version, fit id) of the shared index, changing whenever scores computed with it may"""
+    with _lock:
+        return _version, _index.fit_id if _index is not None else None
+
+def invalidate_qualifications_index():
+    """Bump the index version so the next lookup refits over the catalog"""
+    global _version
+    with _lock:
+        _version += 1
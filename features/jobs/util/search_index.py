@@ -0,0 +1,238 @@
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+import math
+import re
+import threading
+from typing import Callable, Optional
+
+import numpy as np
+
+from features.jobs.util.job_catalog import CatalogSnapshot
+
+# Term frequency multiplier per indexed field, so a word in the title outranks one in the description
+FIELD_WEIGHTS = {'role_name': 3, 'qualifications': 2, 'job_description': 1}
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:[+#]+|'[a-z]+)?")
+_STOP_WORDS = frozenset(
+    'a an and are as at be by for from has have in is it its of on or our that the this to was we will with you your'.split()
+)
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased words without stop words, with plural s and possessives stripped"""
+    return [term for term in map(_normalize, _TOKEN.findall(text.lower())) if term]
+
+@lru_cache(maxsize=200_000)
+def _normalize(token: str) -> Optional[str]:
+    if token in _STOP_WORDS:
+        return None
+    if token.endswith("'s"):
+        return token[:-2]
+    if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+        return token[:-1]
+    return token
+
+@dataclass
+class SearchPage:
+    hits: list[tuple[str, float]]
+    next_offset: Optional[int]
+
+class SearchIndex:
+    """
+    Inverted index with BM25 ranking over role_name, qualifications and job_description.
+    Kept in step with the job catalog: each search first applies the rows that were added,
+    changed or removed since the snapshot it last saw.
+    """
+
+    def __init__(self, fields: dict[str, int] = FIELD_WEIGHTS):
+        self.fields = fields
+        self.version: Optional[int] = None
+        self._slots: dict[str, int] = {}
+        self._job_ids: list[Optional[str]] = []
+        self._rows: list[Optional[dict]] = []
+        self._doc_terms: list[Optional[dict[str, int]]] = []
+        self._free: list[int] = []
+        self._doc_lengths = np.zeros(0, dtype=np.float32)
+        self._total_length = 0
+        self._postings: dict[str, dict[int, int]] = {}
+        # Array form of a term's postings, rebuilt on the first query after a sync changed the index
+        self._arrays: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        self._lock = threading.Lock()
+        self._building = False
+        self.indexed = 0
+        self.removed = 0
+
+    def __len__(self):
+        return len(self._slots)
+
+    @property
+    def ready(self) -> bool:
+        return self.version is not None
+
+    def build_in_background(self, snapshot: CatalogSnapshot):
+        """Run the first sync, which indexes every job, off the request thread"""
+        with self._lock:
+            if self._building or self.ready:
+                return
+            self._building = True
+
+        def run():
+            try:
+                with self._lock:
+                    self.sync(snapshot)
+            except Exception as e:
+                print(f"Error building search index: {e}")
+            finally:
+                self._building = False
+        threading.Thread(target=run, name='search-index-build', daemon=True).start()
+
+    def search(self, snapshot: CatalogSnapshot, query: str, offset: int = 0, limit: int = 50,
+               matches: Optional[Callable[[dict], bool]] = None) -> SearchPage:
+        """(job id, score) of the best matches of query after offset; matches narrows rows, e.g. to request filters"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        with self._lock:
+            self.sync(snapshot)
+            scores = self._score(terms)
+            if scores is None:
+                return SearchPage(hits=[], next_offset=None)
+            candidates = np.flatnonzero(scores)
+            wanted = offset + limit + 1
+            if matches is None and len(candidates) > wanted:
+                # Only the top offset + limit + 1 need ordering
+                candidates = candidates[np.argpartition(-scores[candidates], wanted - 1)[:wanted]]
+            # Highest score first, ties by slot so pages are stable within a version
+            ordered = candidates[np.lexsort((candidates, -scores[candidates]))]
+            hits = []
+            skipped = 0
+            for slot in ordered:
+                if matches is not None and not matches(self._rows[slot]):
+                    continue
+                if skipped < offset:
+                    skipped += 1
+                    continue
+                hits.append((self._job_ids[slot], float(scores[slot])))
+                if len(hits) == limit + 1:
+                    break
+        has_more = len(hits) > limit
+        return SearchPage(hits=hits[:limit], next_offset=offset + limit if has_more else None)
+
+    def sync(self, snapshot: CatalogSnapshot):
+        """Index rows added or changed since the last synced snapshot and drop deleted ones"""
+        if snapshot.version == self.version:
+            return
+        indexed, removed = self.indexed, self.removed
+        for job_id in [job_id for job_id in self._slots if job_id not in snapshot.positions]:
+            self._remove(job_id)
+        for row in snapshot.rows:
+            job_id = str(row['id'])
+            slot = self._slots.get(job_id)
+            if slot is None:
+                self._add(job_id, row)
+            elif self._rows[slot] is not row:
+                # A full catalog reload replaces every dict, so only rows whose indexed fields differ are reindexed
+                if self._indexed_fields_changed(self._rows[slot], row):
+                    self._remove(job_id)
+                    self._add(job_id, row)
+                else:
+                    self._rows[slot] = row
+        if (indexed, removed) != (self.indexed, self.removed):
+            self._arrays.clear()
+        self.version = snapshot.version
+
+    def stats(self) -> dict:
+        return {
+            'jobs': len(self._slots),
+            'terms': len(self._postings),
+            'version': self.version,
+            'building': self._building,
+            'indexed': self.indexed,
+            'removed': self.removed
+        }
+
+    def _score(self, terms: list[str]) -> Optional[np.ndarray]:
+        docs = len(self._slots)
+        if not docs or not terms:
+            return None
+        average_length = self._total_length / docs or 1.0
+        length_norm = K1 * (1 - B + B * self._doc_lengths / average_length)
+        scores = None
+        for term in terms:
+            postings = self._term_arrays(term)
+            if postings is None:
+                continue
+            slots, frequencies = postings
+            idf = math.log(1 + (docs - len(slots) + 0.5) / (len(slots) + 0.5))
+            if scores is None:
+                scores = np.zeros(len(self._job_ids), dtype=np.float32)
+            # A term has one posting per document, so slots are unique and += does not drop updates
+            scores[slots] += idf * frequencies * (K1 + 1) / (frequencies + length_norm[slots])
+        return scores
+
+    def _term_arrays(self, term: str) -> Optional[tuple[np.ndarray, np.ndarray]]:
+        arrays = self._arrays.get(term)
+        if arrays is None:
+            postings = self._postings.get(term)
+            if not postings:
+                return None
+            arrays = (
+                np.fromiter(postings.keys(), dtype=np.int64, count=len(postings)),
+                np.fromiter(postings.values(), dtype=np.float32, count=len(postings))
+            )
+            self._arrays[term] = arrays
+        return arrays
+
+    def _indexed_fields_changed(self, old: dict, new: dict) -> bool:
+        return any(old.get(field) != new.get(field) for field in self.fields)
+
+    def _document_terms(self, row: dict) -> dict[str, int]:
+        frequencies: dict[str, int] = {}
+        for field, weight in self.fields.items():
+            value = row.get(field)
+            if not value:
+                continue
+            text = ' '.join(map(str, value)) if isinstance(value, list) else str(value)
+            for term, count in Counter(filter(None, map(_normalize, _TOKEN.findall(text.lower())))).items():
+                frequencies[term] = frequencies.get(term, 0) + count * weight
+        return frequencies
+
+    def _add(self, job_id: str, row: dict):
+        if self._free:
+            slot = self._free.pop()
+        else:
+            slot = len(self._job_ids)
+            self._job_ids.append(None)
+            self._rows.append(None)
+            self._doc_terms.append(None)
+            if slot >= len(self._doc_lengths):
+                doc_lengths = np.zeros(max(1024, 2 * len(self._doc_lengths)), dtype=np.float32)
+                doc_lengths[:slot] = self._doc_lengths
+                self._doc_lengths = doc_lengths
+        terms = self._document_terms(row)
+        self._slots[job_id] = slot
+        self._job_ids[slot] = job_id
+        self._rows[slot] = row
+        self._doc_terms[slot] = terms
+        length = sum(terms.values())
+        self._doc_lengths[slot] = length
+        self._total_length += length
+        for term, frequency in terms.items():
+            self._postings.setdefault(term, {})[slot] = frequency
+        self.indexed += 1
+
+    def _remove(self, job_id: str):
+        slot = self._slots.pop(job_id)
+        for term in self._doc_terms[slot]:
+            postings = self._postings[term]
+            del postings[slot]
+            if not postings:
+                del self._postings[term]
+        self._total_length -= int(self._doc_lengths[slot])
+        self._doc_lengths[slot] = 0
+        self._job_ids[slot] = None
+        self._rows[slot] = None
+        self._doc_terms[slot] = None
+        self._free.append(slot)
+        self.removed += 1
@@ -1,12 +1,13 @@
 from flask import Blueprint, jsonify, render_template, request
 
-from features.jobs.api import InteractionType
+from features.jobs.api import InteractionType, record_interaction
 from features.jobs.util.parse_response import parse_jobs_response
 from services.api.jobspy import jobspy_fetch_jobs
 from services.supabase.supabase_client import get_supabase
 from util.decorators import sb_login_required
 from util.models.common import Site
 from util.models.job_model import Job
+from util.user_profile import load_user_profile
 
 preview_bp = Blueprint('preview', __name__, template_folder='templates', static_folder='static')
 
@@ -65,20 +66,9 @@ def handle_interaction(job: Job, interaction_type: InteractionType):
     existing_job = supabase.table('new_jobs').select('id').eq('id', job.id).single().execute()
     if not existing_job.data:
       supabase.table('new_jobs').insert(job.to_supabase_dict()).execute()
-    user_profile_resp = supabase.table('user_profiles').select('id').limit(1).execute()
-    if not user_profile_resp:
+    profile_res = load_user_profile()
+    if not profile_res.is_success():
         return jsonify({'error': 'User profile not found'}), 404
-    user_profile_id = user_profile_resp.data[0]['id']
-    interaction_data = {
-      'job_id': job.id,
-      'user_profile_id': user_profile_id,
-      'interaction_type': interaction_type.value
-    } 
-    try:
-      supabase.table('job_clicks').upsert(interaction_data, on_conflict='job_id, user_profile_id, interaction_type').execute()
-    except Exception as e:
-        print(f"Error upserting job click: {e}")
-        return jsonify({'error': 'Failed to record job click'}), 500
-    return jsonify({'success': True})
+    return record_interaction(job.id, profile_res.data.id, interaction_type)
   except Exception as e:
     return jsonify({'error': str(e)}), 500
\ No newline at end of file
@@ -1,8 +1,10 @@
 from flask import Blueprint, render_template, redirect, request, url_for, flash
 
+from features.jobs.util.compatibility_cache import compatibility_cache
 from services.supabase.supabase_client import get_supabase
 from util.auth import check_has_profile, refresh_access_token
 from util.decorators import sb_login_required
+from util.user_profile import invalidate_user_profile
 
 user_bp = Blueprint('users', __name__, template_folder='templates', static_folder='static', static_url_path='/static/user')
 
@@ -43,6 +45,9 @@ def profile():
                 profile_data['id'] = profile['id']
 
             resp = supabase.table('user_profiles').upsert(profile_data).execute()
+            invalidate_user_profile()
+            if resp.data:
+                compatibility_cache.invalidate_user(resp.data[0]['id'])
             flash('User profile updated successfully!', 'message')
             try:
                 access_token = request.cookies.get('supabase.auth.token')
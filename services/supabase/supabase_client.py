@@ -10,6 +10,7 @@ load_dotenv(find_dotenv())
 
 url = os.environ.get("SUPABASE_URL")
 key = os.environ.get("SUPABASE_ANON_KEY")
+service_key = os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
 
 def get_supabase() -> Client:
     if not url or not key:
@@ -26,4 +27,16 @@ def get_supabase() -> Client:
         )
     return g.supabase
 
+def get_anon_supabase() -> Client:
+    """Client with the anon key and no user session, so RLS applies as the anon role. Usable outside requests."""
+    if not url or not key:
+        raise ValueError("Supabase URL and Anon Key must be set in environment variables.")
+    return Client(url, key, options=ClientOptions(auto_refresh_token=False, persist_session=False))
+
+def get_service_supabase() -> Client:
+    """Client with the service role key, bypassing RLS. Only for offline jobs, never request handlers."""
+    if not url or not service_key:
+        raise ValueError("Supabase URL and Service Role Key must be set in environment variables.")
+    return Client(url, service_key, options=ClientOptions(auto_refresh_token=False, persist_session=False))
+
 supabase: LocalProxy[Client] = LocalProxy(get_supabase)
\ No newline at end of file
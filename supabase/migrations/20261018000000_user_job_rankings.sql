@@ -0,0 +1,35 @@
+-- Each user's top jobs, written by `flask materialize-rankings` and read by the recommendations page
+create table if not exists public.user_job_rankings (
+    user_profile_id bigint not null references public.user_profiles (id) on delete cascade,
+    rank integer not null check (rank > 0),
+    job_id bigint not null references public.jobs (id) on delete cascade,
+    compatibility_score double precision not null,
+    -- UserProfile.content_hash() and job_scoring.WEIGHTS_VERSION at computation, so readers can tell stale rankings
+    profile_hash text not null,
+    weights_version text not null,
+    computed_at timestamptz not null,
+    primary key (user_profile_id, rank)
+);
+
+alter table public.user_job_rankings enable row level security;
+
+-- user_profiles is under RLS too, so the subquery only returns the caller's own profile
+create policy "Users read their own rankings" on public.user_job_rankings
+    for select to authenticated
+    using (user_profile_id in (select id from public.user_profiles));
+
+-- Replaces every ranking of the given profiles in one transaction, dropping ranks a shorter list no longer has
+create or replace function public.replace_user_job_rankings(p_user_profile_ids bigint[], p_rankings jsonb)
+returns void
+language sql
+security invoker
+as $$
+    delete from public.user_job_rankings where user_profile_id = any (p_user_profile_ids);
+    insert into public.user_job_rankings
+        (user_profile_id, rank, job_id, compatibility_score, profile_hash, weights_version, computed_at)
+    select user_profile_id, rank, job_id, compatibility_score, profile_hash, weights_version, computed_at
+    from jsonb_populate_recordset(null::public.user_job_rankings, p_rankings);
+$$;
+
+-- Only the service role (the materialize-rankings command) writes rankings
+revoke execute on function public.replace_user_job_rankings(bigint[], jsonb) from public, anon, authenticated;
@@ -0,0 +1,125 @@
+import os
+from types import SimpleNamespace
+
+from flask import Flask
+import pytest
+
+from debug.util.synthetic_data import generate_jobs, generate_profiles
+from features.jobs import api
+from features.jobs.routes import jobs_bp
+from features.jobs.util.catalog_features import JobList
+from features.jobs.util.job_catalog import CatalogSnapshot
+from features.jobs.util import qualifications_index
+from features.jobs.util import job_scoring
+from features.jobs.util.compatibility_cache import CompatibilityCache
+from features.jobs.util.qualifications_index import invalidate_qualifications_index, qualifications_document
+from util.json_provider import AppJSONProvider
+from util.models.user_profile_model import UserProfile
+
+CATALOG_SIZE = 300
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def jobs() -> list[SimpleNamespace]:
+    # Same attributes the scoring code reads from a jobs row, without the Job model's validation
+    return [SimpleNamespace(**row) for row in generate_jobs(CATALOG_SIZE, seed=1)]
+
+@pytest.fixture
+def profiles() -> list[UserProfile]:
+    return [UserProfile.from_supabase_dict(row) for row in generate_profiles(3, seed=1)]
+
+@pytest.fixture
+def profile(profiles) -> UserProfile:
+    return profiles[0]
+
+@pytest.fixture(autouse=True)
+def catalog(jobs, monkeypatch):
+    """Every test starts with an invalidated index that refits over `jobs`"""
+    documents = {job.id: qualifications_document(job) for job in jobs}
+    monkeypatch.setattr(qualifications_index, '_catalog_documents', lambda: documents)
+    invalidate_qualifications_index()
+    return documents
+
+@pytest.fixture(autouse=True)
+def cache(monkeypatch) -> CompatibilityCache:
+    """Empty cache with zeroed stats, used by scoring for the test"""
+    cache = CompatibilityCache()
+    monkeypatch.setattr(job_scoring, 'compatibility_cache', cache)
+    return cache
+
+def make_snapshot(rows: list[dict], version: int = 1) -> CatalogSnapshot:
+    """Catalog snapshot of rows as JobCatalog builds it, with SimpleNamespace jobs"""
+    rows = sorted(rows, key=lambda row: row['id'])
+    return CatalogSnapshot(
+        rows=rows,
+        jobs=JobList(SimpleNamespace(**row) for row in rows),
+        positions={str(row['id']): position for position, row in enumerate(rows)},
+        version=version
+    )
+
+@pytest.fixture
+def catalog_rows() -> list[dict]:
+    # Integer ids, as the jobs table returns them
+    return [{**row, 'id': int(row['id'])} for row in generate_jobs(CATALOG_SIZE, seed=2)]
+
+@pytest.fixture
+def job_catalog(catalog_rows, monkeypatch) -> SimpleNamespace:
+    """Serves api reads from an in-memory snapshot of catalog_rows; replace .snapshot_value to change it"""
+    catalog = SimpleNamespace(snapshot_value=make_snapshot(catalog_rows), instance_id='test')
+    catalog.snapshot = lambda: catalog.snapshot_value
+    monkeypatch.setattr(api, 'job_catalog', catalog)
+    return catalog
+
+class JSONProvider(AppJSONProvider):
+    """Also serializes the SimpleNamespace jobs tests use in place of Job"""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, SimpleNamespace):
+            return vars(o)
+        return AppJSONProvider.default(o)
+
+@pytest.fixture
+def app() -> Flask:
+    # Blueprints of create_app, without its supabase auth hook, which needs credentials
+    from features.auth.routes import auth_bp
+    from features.user.routes import user_bp
+    from routes import main_bp
+    app = Flask(__name__, root_path=REPO_ROOT)
+    app.json = JSONProvider(app)
+    app.config['SECRET_KEY'] = 'test'
+    app.register_blueprint(main_bp)
+    app.register_blueprint(user_bp)
+    app.register_blueprint(auth_bp, url_prefix='/auth')
+    app.register_blueprint(jobs_bp)
+    app.register_blueprint(api.jobs_api_bp, url_prefix='/api')
+    return app
+
+@pytest.fixture
+def client(app):
+    """Test client with a session, so sb_login_required lets requests through"""
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['supabase.auth.token'] = '{"access_token": "token"}'
+    return client
+
+class EmptyTable:
+    """Supabase client whose tables hold no rows: any chain of query builder calls, then execute()"""
+
+    def __init__(self):
+        self._single = False
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            if name == 'maybe_single':
+                self._single = True
+            return self
+        return call
+
+    def execute(self):
+        # maybe_single() answers None when no row matches
+        return None if self._single else SimpleNamespace(data=[], count=0)
+
+@pytest.fixture
+def empty_supabase(monkeypatch):
+    monkeypatch.setattr(api, 'get_supabase', lambda: SimpleNamespace(table=lambda name: EmptyTable()))
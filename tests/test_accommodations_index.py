@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from features.jobs import api
+from features.jobs.util.accommodations_index import AccommodationsIndex, match_postings, normalize_accommodation
+
+def _index(jobs) -> tuple[AccommodationsIndex, list[set[str]]]:
+    lists = [[normalize_accommodation(acc) for acc in job.accommodations] for job in jobs]
+    return AccommodationsIndex.from_lists(lists), [set(terms) for terms in lists]
+
+def test_rows_with_all_matches_brute_force(jobs):
+    index, terms = _index(jobs)
+    common = sorted(index.terms, key=lambda term: -len(index.postings(index.term_ids[term])))
+    for wanted in ([], common[:1], common[:2], common[1:4], [common[0], 'no such accommodation']):
+        expected = [row for row, offered in enumerate(terms) if all(term in offered for term in wanted)]
+        assert index.rows_with_all(wanted).tolist() == expected
+
+def test_rows_with_all_normalizes_the_query(jobs):
+    index, _ = _index(jobs)
+    term = index.terms[0]
+    assert np.array_equal(index.rows_with_all([f'  {term.upper()} ']), index.rows_with_all([term]))
+
+def test_match_postings_covers_the_window(jobs):
+    index, terms = _index(jobs)
+    term_ids = index.resolve(index.terms[0].split()[0])
+    wanted = {index.terms[t] for t in term_ids}
+    mask = match_postings(index.indices, index.indptr, term_ids, 50, 120)
+    assert mask.tolist() == [bool(offered & wanted) for offered in terms[50:120]]
+
+@pytest.mark.parametrize('count', [1, 2])
+def test_accommodations_filter_matches_a_row_scan(app, job_catalog, catalog_rows, count):
+    snapshot = job_catalog.snapshot()
+    wanted = next(row for row in catalog_rows if len(row['accommodations']) >= count)['accommodations'][:count]
+    with app.test_request_context(f"/api/jobs?accommodations={','.join(wanted)}"):
+        filters = api._job_filters()
+        scanned = [position for position, row in enumerate(snapshot.rows) if api._row_matches(row, filters)]
+        candidates = api._candidate_positions(snapshot, filters)
+        assert [position for position in candidates if api._row_matches(snapshot.rows[position], filters)] == scanned
+    assert scanned
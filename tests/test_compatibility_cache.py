@@ -0,0 +1,72 @@
+from features.cms import routes as cms_routes
+from features.jobs.util import job_scoring as scoring
+from features.jobs.util.catalog_features import JobList
+from features.jobs.util.compatibility_cache import CompatibilityCache
+from features.jobs.util.qualifications_index import get_qualifications_index, invalidate_qualifications_index
+
+def test_single_job_scores_are_cached(jobs, profile, cache):
+    scoring.calculate_job_compatibility_factors(jobs[0], profile)
+    scoring.calculate_job_compatibility_factors(jobs[0], profile)
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 1, 1)
+
+def test_refit_of_qualifications_index_misses_the_cache(jobs, profile, catalog, cache):
+    scoring.calculate_job_compatibility_factors(jobs[0], profile)
+    # A new fit must not serve scores of the one before
+    catalog['an-added-job'] = 'Doctorate in Astrophysics,Experience with telescopes'
+    invalidate_qualifications_index()
+    scoring.calculate_job_compatibility_factors(jobs[0], profile)
+    assert (cache.stats()['hits'], cache.stats()['misses']) == (0, 2)
+
+def test_catalog_factors_are_cached_per_catalog_and_fit(jobs, profile, cache):
+    catalog_jobs = JobList(jobs)
+    first = scoring.calculate_catalog_factors(catalog_jobs.features(), profile).data
+    assert scoring.calculate_catalog_factors(catalog_jobs.features(), profile).data is first
+    # Another snapshot of the same jobs is another catalog
+    scoring.calculate_catalog_factors(JobList(jobs).features(), profile)
+    stats = cache.stats()
+    assert (stats['catalog_hits'], stats['catalog_misses'], stats['catalogs']) == (1, 2, 2)
+    assert not first.flags.writeable
+
+def test_invalidate_user_drops_only_their_entries(jobs, profiles, cache):
+    for profile in profiles[:2]:
+        scoring.calculate_job_compatibility_factors(jobs[0], profile)
+        scoring.calculate_catalog_factors(JobList(jobs).features(), profile)
+    cache.invalidate_user(profiles[0].id)
+    stats = cache.stats()
+    assert (stats['entries'], stats['catalogs']) == (1, 1)
+    assert stats['catalog_bytes'] == len(jobs) * len(scoring.WEIGHTS) * 8
+
+def test_changed_profile_misses_the_cache(jobs, profile, cache):
+    scoring.calculate_job_compatibility_factors(jobs[0], profile)
+    profile.hours_per_week = (profile.hours_per_week or 0) + 5
+    scoring.calculate_job_compatibility_factors(jobs[0], profile)
+    assert cache.stats()['misses'] == 2
+
+def test_clear_and_eviction():
+    cache = CompatibilityCache(max_entries=2)
+    keys = [cache.key('user', 'hash', job_id, None, 1, 0) for job_id in ('a', 'b', 'c')]
+    for key in keys:
+        cache.put(key, (1.0,))
+    assert cache.get(keys[0]) is None
+    assert cache.stats()['evictions'] == 1
+    cache.invalidate_job('b')
+    assert cache.get(keys[1]) is None and cache.get(keys[2]) == (1.0,)
+    cache.clear()
+    assert cache.stats()['entries'] == 0
+
+def test_cms_write_keeps_the_fit_and_other_jobs_cached(jobs, profile, cache, monkeypatch):
+    monkeypatch.setattr(cms_routes, 'compatibility_cache', cache)
+    monkeypatch.setattr(cms_routes, 'job_catalog', None)
+    for job in jobs[:3]:
+        scoring.calculate_job_compatibility_factors(job, profile)
+    fit_id = get_qualifications_index({}).fit_id
+    jobs[0].qualifications = ['Forklift certification']
+    cms_routes._job_written(jobs[0].id, jobs[0].qualifications)
+    index = get_qualifications_index({})
+    assert index.fit_id == fit_id
+    assert index.documents[jobs[0].id] == 'Forklift certification'
+    for job in jobs[:3]:
+        scoring.calculate_job_compatibility_factors(job, profile)
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses']) == (2, 4)
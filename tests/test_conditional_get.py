@@ -0,0 +1,53 @@
+import pytest
+
+from features.jobs import api
+from tests.conftest import make_snapshot
+
+def test_unchanged_jobs_answer_304(client, job_catalog):
+    response = client.get('/api/jobs?limit=5')
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    assert client.get('/api/jobs?limit=5', headers={'If-None-Match': etag}).status_code == 304
+    assert client.get('/api/jobs?limit=6', headers={'If-None-Match': etag}).status_code == 200
+
+def test_changed_job_changes_the_etag(client, job_catalog, catalog_rows):
+    etag = client.get('/api/jobs?limit=5').headers['ETag']
+    changed = min(catalog_rows, key=lambda row: row['id'])
+    changed['updated_at'] = '2030-01-01T00:00:00+00:00'
+    job_catalog.snapshot_value = make_snapshot(catalog_rows, version=2)
+    assert client.get('/api/jobs?limit=5', headers={'If-None-Match': etag}).status_code == 200
+
+def test_page_is_fetched_once_per_request(client, job_catalog, monkeypatch):
+    calls = []
+    fetch = api._fetch_jobs_page
+    monkeypatch.setattr(api, '_fetch_jobs_page', lambda *args: calls.append(args) or fetch(*args))
+    client.get('/api/jobs?limit=5')
+    assert len(calls) == 1
+
+def test_ndjson_streams_are_not_tagged(client, job_catalog, monkeypatch):
+    monkeypatch.setattr(api, '_job_versions', lambda *args: pytest.fail('ETag read the jobs before streaming'))
+    response = client.get('/api/jobs?format=ndjson&limit=50')
+    assert response.status_code == 200
+    assert 'ETag' not in response.headers
+    assert len(response.get_data(as_text=True).splitlines()) == len(job_catalog.snapshot().rows)
+
+@pytest.mark.parametrize('job_id', ['999999', 'not-a-number'])
+def test_missing_job_is_404(client, job_catalog, empty_supabase, job_id):
+    response = client.get(f'/api/jobs/{job_id}')
+    assert response.status_code == 404
+    assert 'ETag' not in response.headers
+
+@pytest.mark.parametrize('job_id', ['999999', 'not-a-number'])
+def test_missing_job_details_page_is_404(client, job_catalog, empty_supabase, profiles, monkeypatch, job_id):
+    monkeypatch.setattr(api, 'load_user_profile', lambda: api.Result(success=True, data=profiles[0]))
+    response = client.get(f'/jobs/{job_id}')
+    assert response.status_code == 404
+    assert 'ETag' not in response.headers
+
+def test_job_details_page_is_tagged(client, job_catalog, catalog_rows, profiles, monkeypatch):
+    monkeypatch.setattr(api, 'load_user_profile', lambda: api.Result(success=True, data=profiles[0]))
+    # The first request fits the qualifications index, whose fit is part of the scored ETag
+    client.get(f"/jobs/{catalog_rows[0]['id']}")
+    response = client.get(f"/jobs/{catalog_rows[0]['id']}")
+    assert response.status_code == 200
+    assert client.get(f"/jobs/{catalog_rows[0]['id']}", headers={'If-None-Match': response.headers['ETag']}).status_code == 304
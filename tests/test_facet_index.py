@@ -0,0 +1,53 @@
+from collections import Counter
+
+import pytest
+
+from features.jobs import api
+from features.jobs.util.facet_index import FacetIndex
+from tests.conftest import make_snapshot
+
+def _brute_force(rows: list[dict], filters: list, field: str) -> tuple[int, dict]:
+    matching = [row for row in rows if api._row_matches(row, filters)]
+    counts = Counter()
+    for row in matching:
+        value = row.get(field)
+        counts.update(item for item in (value if isinstance(value, list) else [value]) if item is not None)
+    return len(matching), dict(counts)
+
+@pytest.mark.parametrize('filters', [
+    [],
+    [('work_mode', 'eq', 'remote')],
+    [('accommodations', 'contains', ['Flexible work hours', 'Quiet workspace'])],
+    [('industry', 'contains', ['Technology']), ('weekly_hours', 'gte', 30)],
+    [('accommodations', 'contains', ['No such accommodation'])],
+])
+def test_counts_match_a_scan(catalog_rows, filters):
+    snapshot = make_snapshot(catalog_rows)
+    total, facets = FacetIndex(api.FACET_FIELDS).facets(snapshot, filters, api.FACET_FIELDS, api._row_matches)
+    for field in api.FACET_FIELDS:
+        expected_total, expected = _brute_force(snapshot.rows, filters, field)
+        assert total == expected_total
+        assert facets[field] == expected
+        assert list(facets[field].values()) == sorted(expected.values(), reverse=True)
+
+def test_limit_keeps_the_largest_counts(catalog_rows):
+    snapshot = make_snapshot(catalog_rows)
+    _, facets = FacetIndex(api.FACET_FIELDS).facets(snapshot, [], ['accommodations'], api._row_matches, limit=3)
+    _, expected = _brute_force(snapshot.rows, [], 'accommodations')
+    assert list(facets['accommodations'].values()) == sorted(expected.values(), reverse=True)[:3]
+
+def test_bitmaps_are_rebuilt_for_a_new_snapshot(catalog_rows):
+    index = FacetIndex(['work_mode'])
+    first = index.for_snapshot(make_snapshot(catalog_rows, version=1))
+    assert index.for_snapshot(make_snapshot(catalog_rows, version=1)) is first
+    assert index.for_snapshot(make_snapshot(catalog_rows[:10], version=2)).size == 10
+
+def test_facets_etag_reads_no_rows(client, job_catalog, monkeypatch):
+    monkeypatch.setattr(api, 'facet_index', FacetIndex(api.FACET_FIELDS))
+    monkeypatch.setattr(api, '_job_versions', lambda *args: pytest.fail('ETag scanned the catalog'))
+    response = client.get('/api/jobs/facets?work_mode=remote')
+    assert response.status_code == 200
+    assert response.json['total'] == sum(row['work_mode'] == 'remote' for row in job_catalog.snapshot().rows)
+    etag = response.headers['ETag']
+    assert client.get('/api/jobs/facets?work_mode=remote', headers={'If-None-Match': etag}).status_code == 304
+    assert client.get('/api/jobs/facets?work_mode=hybrid', headers={'If-None-Match': etag}).status_code == 200
@@ -0,0 +1,70 @@
+from types import SimpleNamespace
+
+import pytest
+
+from features.jobs.util import fragment_cache as fragment_cache_module
+from features.jobs.util.fragment_cache import FragmentCache, score_bucket
+
+@pytest.fixture
+def renders(monkeypatch) -> list:
+    """Renders recorded instead of run, each producing HTML naming the job and its score"""
+    calls = []
+    def render_template(template, job, **context):
+        calls.append((template, job.id))
+        return f"<div>{template} {job.id} {getattr(job, 'compatibility_score', '')} {context}</div>"
+    monkeypatch.setattr(fragment_cache_module, 'render_template', render_template)
+    return calls
+
+def _job(job_id='1', updated_at='2024-05-01T00:00:00+00:00', **scores) -> SimpleNamespace:
+    return SimpleNamespace(id=job_id, updated_at=updated_at, **scores)
+
+def test_unchanged_job_is_rendered_once(renders):
+    cache = FragmentCache()
+    html = cache.render('card.html', _job())
+    assert cache.render('card.html', _job()) == html
+    assert len(renders) == 1
+    assert (cache.stats()['hits'], cache.stats()['misses']) == (1, 1)
+
+@pytest.mark.parametrize('changed', [
+    _job(updated_at='2024-06-01T00:00:00+00:00'),
+    _job(job_id='2'),
+    _job(compatibility_score=0.5),
+])
+def test_changed_job_or_score_is_rendered_again(renders, changed):
+    cache = FragmentCache()
+    cache.render('card.html', _job())
+    cache.render('card.html', changed)
+    assert len(renders) == 2
+
+def test_template_and_context_are_part_of_the_key(renders):
+    cache = FragmentCache()
+    cache.render('card.html', _job())
+    cache.render('detailed_card.html', _job())
+    cache.render('card.html', _job(), include_compatibility=True)
+    cache.render('card.html', _job(), include_compatibility=True)
+    assert len(renders) == 3
+
+def test_job_without_updated_at_is_never_cached(renders):
+    cache = FragmentCache()
+    cache.render('card.html', _job(updated_at=None))
+    cache.render('card.html', _job(updated_at=None))
+    assert len(renders) == 2
+    assert cache.stats()['entries'] == 0
+
+def test_scores_that_display_the_same_share_a_bucket():
+    # Cards print the score as a whole percentage
+    assert score_bucket(_job(compatibility_score=0.8712)) == score_bucket(_job(compatibility_score=0.8749))
+    assert score_bucket(_job(compatibility_score=0.87)) != score_bucket(_job(compatibility_score=0.88))
+    assert score_bucket(_job()) == (None, None, None)
+
+def test_size_bound_evicts_least_recently_used(renders):
+    size = len(f"<div>card.html 1  {{}}</div>".encode())
+    cache = FragmentCache(max_bytes=2 * size)
+    for job_id in ('1', '2'):
+        cache.render('card.html', _job(job_id))
+    cache.render('card.html', _job('1'))
+    cache.render('card.html', _job('3'))
+    stats = cache.stats()
+    assert (stats['entries'], stats['evictions'], stats['bytes']) == (2, 1, 2 * size)
+    cache.render('card.html', _job('1'))
+    assert renders[-1] == ('card.html', '3')
@@ -0,0 +1,112 @@
+from types import SimpleNamespace
+
+from postgrest.exceptions import APIError
+import pytest
+
+from features.jobs import api
+from features.jobs.util.interaction_buffer import InteractionBuffer
+
+KEY = ('job_id', 'user_profile_id', 'interaction_type')
+
+class FakeTable:
+    """Records upserted batches; rows with job_id in bad fail as a foreign key violation would"""
+
+    def __init__(self, bad=(), down=False):
+        self.bad = set(bad)
+        self.down = down
+        self.batches = []
+        self.rows = {}
+
+    def table(self, name):
+        return self
+
+    def upsert(self, rows, on_conflict):
+        self._rows = rows
+        return self
+
+    def execute(self):
+        if self.down:
+            raise ConnectionError('database is down')
+        if any(row['job_id'] in self.bad for row in self._rows):
+            raise APIError({'code': '23503', 'message': 'violates foreign key constraint'})
+        self.batches.append(len(self._rows))
+        self.rows.update({tuple(row[column] for column in KEY): row for row in self._rows})
+        return SimpleNamespace(data=self._rows)
+
+def _buffer(client, **kwargs) -> InteractionBuffer:
+    buffer = InteractionBuffer('job_clicks', KEY, client_factory=lambda: client, **kwargs)
+    # Flushed by the tests instead of the worker thread
+    buffer._start_worker = lambda: None
+    return buffer
+
+def _click(job_id, profile_id=1, interaction_type='apply_click') -> dict:
+    return {'job_id': job_id, 'user_profile_id': profile_id, 'interaction_type': interaction_type}
+
+def test_repeated_clicks_coalesce_into_one_upsert():
+    client = FakeTable()
+    buffer = _buffer(client, max_batch=100)
+    for _ in range(3):
+        for job_id in range(10):
+            assert buffer.add(_click(job_id))
+    assert buffer.flush() == 10
+    assert client.batches == [10]
+    assert buffer.stats()['coalesced'] == 20
+
+def test_rows_are_upserted_in_batches_with_one_client():
+    clients = []
+    buffer = InteractionBuffer('job_clicks', KEY, client_factory=lambda: clients.append(FakeTable()) or clients[-1], max_batch=4)
+    buffer._start_worker = lambda: None
+    for job_id in range(10):
+        buffer.add(_click(job_id))
+    buffer.flush()
+    buffer.add(_click(99))
+    buffer.flush()
+    assert len(clients) == 1
+    assert clients[0].batches == [4, 4, 2, 1]
+
+def test_rejected_rows_are_isolated_and_dropped():
+    client = FakeTable(bad={3, 11})
+    buffer = _buffer(client, max_batch=16)
+    for job_id in range(16):
+        buffer.add(_click(job_id))
+    assert buffer.flush() == 14
+    assert sorted(key[0] for key in client.rows) == [i for i in range(16) if i not in (3, 11)]
+    stats = buffer.stats()
+    assert (stats['invalid'], stats['dropped'], stats['errors'], stats['pending']) == (2, 0, 0, 0)
+
+def test_failed_flush_requeues_the_rows():
+    client = FakeTable(down=True)
+    buffer = _buffer(client, max_batch=4)
+    for job_id in range(6):
+        buffer.add(_click(job_id))
+    assert buffer.flush() == 0
+    assert buffer.stats()['pending'] == 6 and buffer.stats()['errors'] == 1
+    client.down = False
+    assert buffer.flush() == 6
+    assert buffer.stats()['pending'] == 0
+
+def test_requeue_drops_what_does_not_fit():
+    client = FakeTable(down=True)
+    buffer = _buffer(client, max_batch=10, max_pending=5, block_seconds=0)
+    execute = client.execute
+
+    def clicks_during_flush():
+        # Clicks that arrive while the failing upsert is in flight fill the buffer first
+        for job_id in range(100, 103):
+            buffer.add(_click(job_id))
+        return execute()
+    client.execute = clicks_during_flush
+    for job_id in range(5):
+        buffer.add(_click(job_id))
+    buffer.flush()
+    stats = buffer.stats()
+    assert (stats['pending'], stats['dropped'], stats['rejected']) == (5, 3, 0)
+
+def test_clicks_for_another_profile_are_refused(app, profiles, monkeypatch):
+    buffer = _buffer(FakeTable())
+    monkeypatch.setattr(api, 'interaction_buffer', buffer)
+    monkeypatch.setattr(api, 'load_user_profile', lambda: api.Result(success=True, data=profiles[0]))
+    with app.test_request_context():
+        assert api.record_interaction(5, profiles[1].id, api.InteractionType.APPLY_CLICK)[1] == 403
+        assert api.record_interaction(5, profiles[0].id, api.InteractionType.APPLY_CLICK)[1] == 202
+    assert buffer.stats()['pending'] == 1
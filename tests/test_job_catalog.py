@@ -0,0 +1,119 @@
+from types import SimpleNamespace
+
+import pytest
+
+from debug.util.synthetic_data import generate_jobs
+from features.jobs.util import job_catalog as job_catalog_module
+from features.jobs.util.job_catalog import JobCatalog
+
+class FakeQuery:
+    """The PostgREST query builder calls JobCatalog makes, run over a list of rows"""
+
+    def __init__(self, table: 'FakeTable', count: bool):
+        self.table = table
+        self.count = count
+        self.filters = []
+        self.orders = []
+        self.bounds = None
+
+    def order(self, column):
+        self.orders.append(column)
+        return self
+
+    def gte(self, column, value):
+        self.filters.append(lambda row: row.get(column) is not None and row[column] >= value)
+        return self
+
+    def limit(self, n):
+        self.bounds = (0, n - 1)
+        return self
+
+    def range(self, start, end):
+        self.bounds = (start, end)
+        return self
+
+    def execute(self):
+        self.table.queries += 1
+        rows = [row for row in self.table.rows if all(f(row) for f in self.filters)]
+        for column in reversed(self.orders):
+            rows.sort(key=lambda row: row[column])
+        count = len(rows) if self.count else None
+        if self.bounds:
+            rows = rows[self.bounds[0]:self.bounds[1] + 1]
+        return SimpleNamespace(data=[dict(row) for row in rows], count=count)
+
+class FakeTable:
+    def __init__(self, rows: list[dict]):
+        self.rows = rows
+        self.queries = 0
+
+    def select(self, columns, count=None):
+        return FakeQuery(self, count == 'exact')
+
+@pytest.fixture
+def table(monkeypatch) -> FakeTable:
+    monkeypatch.setattr(job_catalog_module, 'PAGE_SIZE', 7)
+    rows = [{**row, 'id': int(row['id'])} for row in generate_jobs(40, seed=3)]
+    return FakeTable(rows)
+
+@pytest.fixture
+def catalog(table) -> JobCatalog:
+    client = SimpleNamespace(table=lambda name: table)
+    return JobCatalog('*', lambda row: SimpleNamespace(**row), client_factory=lambda: client)
+
+def _ids(snapshot) -> list:
+    return [row['id'] for row in snapshot.rows]
+
+def test_first_read_loads_every_page(catalog, table):
+    snapshot = catalog.snapshot()
+    assert _ids(snapshot) == sorted(row['id'] for row in table.rows)
+    assert snapshot.version == 0
+    assert catalog.stats()['full_loads'] == 1
+
+def test_delta_sync_applies_updated_and_new_rows(catalog, table):
+    first = catalog.snapshot()
+    watermark = catalog.stats()['watermark']
+    table.rows[5] = {**table.rows[5], 'role_name': 'Edited', 'updated_at': '2099-01-01T00:00:00+00:00'}
+    # Written after the last sync at the watermark's own timestamp
+    table.rows.append({**table.rows[0], 'id': 1000, 'updated_at': watermark})
+    catalog.refresh()
+    snapshot = catalog.snapshot()
+    assert snapshot.version == first.version + 1
+    assert snapshot.get_row(table.rows[5]['id'])['role_name'] == 'Edited'
+    assert snapshot.get_row(1000) is not None
+    stats = catalog.stats()
+    assert (stats['full_loads'], stats['upserts'], stats['watermark']) == (1, 2, '2099-01-01T00:00:00+00:00')
+    # The published snapshot is not changed under its readers
+    assert first.get_row(1000) is None
+
+def test_unchanged_table_keeps_the_snapshot(catalog):
+    first = catalog.snapshot()
+    catalog.refresh()
+    assert catalog.snapshot() is first
+
+def test_deleted_rows_are_dropped_when_the_count_changes(catalog, table):
+    catalog.snapshot()
+    deleted = table.rows.pop(3)
+    catalog.refresh()
+    assert catalog.snapshot().get_row(deleted['id']) is None
+    assert catalog.stats()['deletions'] == 1
+
+def test_delete_hidden_by_an_insert_is_found_by_the_id_sweep(catalog, table, monkeypatch):
+    catalog.snapshot()
+    deleted = table.rows.pop(3)
+    # An old row inserted late: same count, and its updated_at is behind the watermark
+    table.rows.append({**deleted, 'id': 2000, 'updated_at': None})
+    catalog.refresh()
+    assert catalog.snapshot().get_row(deleted['id']) is not None
+    monkeypatch.setattr(job_catalog_module, 'ID_SWEEP_INTERVAL', 0)
+    catalog.refresh()
+    assert catalog.snapshot().get_row(deleted['id']) is None
+
+def test_failed_refresh_keeps_serving_the_last_snapshot(catalog, table):
+    first = catalog.snapshot()
+    def select(*args, **kwargs):
+        raise RuntimeError('connection reset')
+    table.select = select
+    catalog.refresh()
+    assert catalog.snapshot() is first
+    assert catalog.stats()['errors'] == 1
@@ -0,0 +1,54 @@
+import base64
+import json
+
+import pytest
+
+from features.jobs import api
+
+def _cursor(*parts) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(parts)).encode()).decode().rstrip('=')
+
+def _all_pages(app, sort: str, limit: int, query: str = '') -> list:
+    ids, cursor = [], None
+    while True:
+        args = f'/api/jobs?limit={limit}&sort={sort}{query}' + (f'&cursor={cursor}' if cursor else '')
+        with app.test_request_context(args):
+            page = api.fetch_jobs_page(limit=limit, cursor=cursor, sort=sort).data
+        ids.extend(job.id for job in page.jobs)
+        cursor = page.next_cursor
+        if cursor is None:
+            return ids
+
+@pytest.mark.parametrize('sort', ['id', 'updated_at'])
+def test_pages_cover_every_job_once_in_order(app, job_catalog, catalog_rows, sort):
+    for row in catalog_rows[::7]:
+        row['updated_at'] = None
+    for row in catalog_rows[::5]:
+        row['updated_at'] = catalog_rows[0]['updated_at']
+    expected = [row['id'] for row in sorted(catalog_rows, key=lambda row: api.sort_key(row, sort))]
+    assert _all_pages(app, sort, limit=17) == expected
+
+def test_pages_apply_filters(app, job_catalog, catalog_rows):
+    remote = [row for row in catalog_rows if row['work_mode'] == 'remote']
+    expected = [row['id'] for row in sorted(remote, key=lambda row: api.sort_key(row, 'updated_at'))]
+    assert _all_pages(app, 'updated_at', limit=9, query='&work_mode=remote') == expected
+
+@pytest.mark.parametrize('sort, value, job_id', [
+    ('updated_at', '2024-01-01",id.gt.0),or(id.gt.0', 1),
+    ('updated_at', '2024-01-01T00:00:00', '1),or(id.gt.0'),
+    ('id', '1",x', '1'),
+    ('id', 1, True),
+    ('updated_at', ['2024-01-01'], 1),
+    ('updated_at', 'not a date', 1),
+])
+def test_crafted_cursor_is_rejected(client, sort, value, job_id):
+    cursor = _cursor(sort, value, job_id)
+    response = client.get(f'/api/jobs?limit=5&sort={sort}&cursor={cursor}')
+    assert response.status_code == 400
+    assert response.json == {'error': 'Invalid cursor'}
+
+def test_issued_cursors_are_accepted(catalog_rows):
+    row = catalog_rows[3]
+    for sort in api.SORT_KEYS:
+        assert api.decode_cursor(api.encode_cursor(row, sort), sort) == (row[sort], row['id'])
+    assert api.decode_cursor(api.encode_cursor({**row, 'updated_at': None}, 'updated_at'), 'updated_at') == (None, row['id'])
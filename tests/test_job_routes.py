@@ -0,0 +1,8 @@
+def test_streamed_jobs_page_consumes_flashes(client, job_catalog):
+    with client.session_transaction() as session:
+        session['_flashes'] = [('warning', 'Profile saved')]
+    response = client.get('/jobs')
+    assert 'Profile saved' in response.get_data(as_text=True)
+    with client.session_transaction() as session:
+        assert '_flashes' not in session
+    assert 'Profile saved' not in client.get('/jobs').get_data(as_text=True)
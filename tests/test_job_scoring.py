@@ -0,0 +1,85 @@
+import dataclasses
+
+import numpy as np
+import pytest
+
+from features.jobs.util import job_scoring as scoring
+from features.jobs.util import qualifications_index
+from features.jobs.util.catalog_features import CatalogFeatures, JobList
+from features.jobs.util.qualifications_index import invalidate_qualifications_index, qualifications_index_version
+
+def _factors(result) -> tuple:
+    return dataclasses.astuple(result.data.factors)
+
+def test_batch_scores_match_single_job_scores(jobs, profile):
+    batch = scoring.calculate_jobs_compatibility_factors(jobs, profile)
+    assert sum(result.is_success() for result in batch) > len(jobs) // 2
+    for job, batch_res in zip(jobs, batch):
+        single_res = scoring.calculate_job_compatibility_factors(job, profile)
+        assert batch_res.is_success() == single_res.is_success()
+        if batch_res.is_success():
+            assert batch_res.data.compatibility_score == pytest.approx(single_res.data.compatibility_score)
+            assert _factors(batch_res) == pytest.approx(_factors(single_res))
+
+def test_single_job_scored_cold_matches_batch(jobs, profile):
+    # A cold process fits over the catalog, not over the one job being scored
+    single_res = scoring.calculate_job_compatibility_factors(jobs[7], profile)
+    batch_res = scoring.calculate_jobs_compatibility_factors(jobs, profile)[7]
+    assert single_res.data.compatibility_score == pytest.approx(batch_res.data.compatibility_score)
+
+def test_batch_totals_match_compatibility_scores(jobs, profile):
+    scores = scoring.calculate_jobs_compatibility(jobs, profile)
+    factors = scoring.calculate_jobs_compatibility_factors(jobs, profile)
+    assert [r.is_success() for r in scores] == [r.is_success() for r in factors]
+    assert [r.data.compatibility_score for r in scores if r.is_success()] == pytest.approx(
+        [r.data.compatibility_score for r in factors if r.is_success()]
+    )
+
+def _full_sort(jobs, profile, k) -> list[tuple[str, float]]:
+    results = scoring.calculate_jobs_compatibility_factors(jobs, profile)
+    ranked = [(i, r.data.compatibility_score) for i, r in enumerate(results) if r.is_success()]
+    ranked.sort(key=lambda item: (-item[1], item[0]))
+    return [(jobs[i].id, score) for i, score in ranked[:k]]
+
+@pytest.mark.parametrize('k', [1, 10, 50, 1000])
+def test_top_k_matches_full_sort(jobs, profile, k):
+    expected = _full_sort(jobs, profile, k)
+    top_res = scoring.calculate_top_jobs_compatibility_factors(jobs, profile, k)
+    assert top_res.is_success()
+    assert [job.id for job in top_res.data] == [job_id for job_id, _ in expected]
+    assert [job.compatibility_score for job in top_res.data] == pytest.approx([score for _, score in expected])
+
+def test_top_k_ranks_cached_factors_the_same(jobs, profile, cache):
+    catalog_jobs = JobList(jobs)
+    uncached = scoring.calculate_catalog_top_k(catalog_jobs.features(), profile, 20, use_cache=False).data
+    scoring.calculate_catalog_factors(catalog_jobs.features(), profile)
+    cached = scoring.calculate_catalog_top_k(catalog_jobs.features(), profile, 20).data
+    assert cache.stats()['catalog_hits'] == 1
+    assert np.array_equal(uncached[0], cached[0])
+    assert np.allclose(uncached[2], cached[2])
+
+def test_top_k_of_nothing_is_empty(jobs, profile):
+    indices, factors, totals = scoring.calculate_catalog_top_k(CatalogFeatures.for_jobs(jobs), profile, 0).data
+    assert len(indices) == len(factors) == len(totals) == 0
+
+@pytest.mark.parametrize('job_hours, user_hours', [('40', 35), (40, '35'), ('0', 40), ('', 40), (None, '40'), ('37.5', 40)])
+def test_text_hours_score_the_same_in_batch_and_single_job(jobs, profile, job_hours, user_hours):
+    job = jobs[0]
+    job.weekly_hours = job_hours
+    profile.hours_per_week = user_hours
+    batch_res = scoring.calculate_jobs_compatibility_factors([job], profile)[0]
+    single_res = scoring.calculate_job_compatibility_factors(job, profile)
+    assert batch_res.is_success() and single_res.is_success()
+    assert batch_res.data.factors.hours_score == pytest.approx(single_res.data.factors.hours_score)
+    assert batch_res.data.compatibility_score == pytest.approx(single_res.data.compatibility_score)
+
+def test_catalog_scores_follow_a_refit_of_the_shared_index(jobs, profile, catalog, monkeypatch):
+    catalog_jobs = JobList(jobs)
+    catalog_jobs.features()
+    # A changed catalog refits the shared index, which per-job scoring reads from
+    monkeypatch.setattr(qualifications_index, '_catalog_documents', lambda: {**catalog, 'extra': 'Welding ' * 50})
+    invalidate_qualifications_index()
+    single_res = scoring.calculate_job_compatibility_factors(jobs[7], profile)
+    batch_res = scoring.calculate_jobs_compatibility_factors(catalog_jobs, profile)[7]
+    assert catalog_jobs.features().qualifications_index.fit_id == qualifications_index_version()[1]
+    assert batch_res.data.factors.qualifications_score == pytest.approx(single_res.data.factors.qualifications_score)
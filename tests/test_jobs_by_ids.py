@@ -0,0 +1,54 @@
+from types import SimpleNamespace
+
+from features.jobs import api
+from tests.conftest import EmptyTable
+
+class RecordingTable(EmptyTable):
+    """Empty jobs table that fails like Postgres when in_ is given an id that is not an integer"""
+
+    def __init__(self, queries: list):
+        super().__init__()
+        self.queries = queries
+
+    def in_(self, column, values):
+        self.queries.append(list(values))
+        if not all(value.isdigit() for value in values):
+            raise RuntimeError('invalid input syntax for type bigint')
+        return self
+
+def _recording_supabase(monkeypatch) -> list:
+    queries = []
+    monkeypatch.setattr(api, 'get_supabase', lambda: SimpleNamespace(table=lambda name: RecordingTable(queries)))
+    return queries
+
+def test_items_follow_the_requested_ids(client, job_catalog, catalog_rows, monkeypatch):
+    queries = _recording_supabase(monkeypatch)
+    first, second = catalog_rows[4]['id'], catalog_rows[1]['id']
+    response = client.get(f'/api/jobs?ids={first},999999,{second},{first}')
+    assert response.status_code == 200
+    assert [item.get('id', item.get('job_id')) for item in response.json] == [first, '999999', second]
+    assert response.json[1] == {'job_id': '999999', 'error': 'Job not found'}
+    assert queries == [['999999']]
+
+def test_invalid_ids_are_reported_per_item(client, job_catalog, catalog_rows, monkeypatch):
+    queries = _recording_supabase(monkeypatch)
+    job_id = catalog_rows[0]['id']
+    response = client.get(f'/api/jobs?ids=abc,{job_id},1);drop,888888')
+    assert response.status_code == 200
+    assert response.json[0] == {'job_id': 'abc', 'error': 'Invalid job id'}
+    assert response.json[1]['id'] == job_id
+    assert response.json[2] == {'job_id': '1);drop', 'error': 'Invalid job id'}
+    assert response.json[3] == {'job_id': '888888', 'error': 'Job not found'}
+    # Only the valid id missing from the catalog reaches the database, once for the ETag and handler together
+    assert queries == [['888888']]
+
+def test_etag_and_handler_share_one_lookup(client, job_catalog, catalog_rows, monkeypatch):
+    calls = []
+    fetch = api._fetch_jobs_by_ids
+    monkeypatch.setattr(api, '_fetch_jobs_by_ids', lambda *args: calls.append(args) or fetch(*args))
+    ids = ','.join(str(row['id']) for row in catalog_rows[:3])
+    response = client.get(f'/api/jobs?ids={ids}&view=card')
+    assert response.status_code == 200
+    assert 'ETag' in response.headers
+    assert len(calls) == 1
+    assert client.get(f'/api/jobs?ids={ids}&view=card', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from features.jobs.util.locations import MISSING, UNKNOWN, LocationTable, location_similarity, normalize_location
+
+@pytest.mark.parametrize('raw, expected', [
+    ('Austin, TX', ('austin', 'tx', 'us')),
+    ('Austin, Texas', ('austin', 'tx', 'us')),
+    ('  austin ,  texas , USA ', ('austin', 'tx', 'us')),
+    ('Sacramento, CA', ('sacramento', 'ca', 'us')),
+    ('CA', (None, 'ca', 'us')),
+    ('Toronto, ON, Canada', ('toronto', 'on', 'ca')),
+    ('London, UK', ('london', None, 'gb')),
+    ('Canada', (None, None, 'ca')),
+    ('Springfield', ('springfield', None, None)),
+    ('', (None, None, None)),
+])
+def test_normalize_location(raw, expected):
+    assert normalize_location(raw) == expected
+
+def test_location_similarity_counts_present_components():
+    assert location_similarity(('austin', 'tx', 'us'), ('austin', 'tx', 'us')) == 1.0
+    assert location_similarity(('dallas', 'tx', 'us'), ('austin', 'tx', 'us')) == pytest.approx(2 / 3)
+    assert location_similarity((None, 'tx', 'us'), (None, 'tx', 'us')) == 1.0
+    assert location_similarity((None, None, None), (None, None, None)) == 0.0
+
+def test_table_interns_spellings_of_one_place_to_the_same_ids():
+    table = LocationTable()
+    ids = table.intern('Austin, TX')
+    assert table.intern('austin, texas') == ids
+    assert table.intern('Dallas, TX')[1:] == ids[1:]
+    assert table.intern('Springfield')[1:] == (MISSING, MISSING)
+    assert len(table) == 4
+
+def test_lookup_does_not_intern():
+    table = LocationTable()
+    austin = table.intern('Austin, TX')
+    assert np.array_equal(table.lookup('Austin, Texas'), austin)
+    assert table.lookup('Reno, NV').tolist() == [UNKNOWN, UNKNOWN, austin[2]]
+    assert len(table) == 1
@@ -0,0 +1,57 @@
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+from features.jobs.util import qualifications_index
+from features.jobs.util.qualifications_index import (
+    get_qualifications_index, invalidate_qualifications_index, qualifications_index_version
+)
+
+def test_cold_index_is_fit_over_the_catalog(jobs, catalog):
+    index = get_qualifications_index({jobs[0].id: catalog[jobs[0].id]})
+    assert index.documents == catalog
+    assert index.fitted_size == len(catalog)
+
+def test_index_is_reused_until_invalidated(jobs, catalog):
+    index = get_qualifications_index({})
+    assert get_qualifications_index({jobs[3].id: catalog[jobs[3].id]}) is index
+    version = qualifications_index_version()
+    invalidate_qualifications_index()
+    assert qualifications_index_version() != version
+    refit = get_qualifications_index({})
+    assert refit is not index and refit.fit_id != index.fit_id
+
+def test_new_documents_extend_the_fit(catalog):
+    index = get_qualifications_index({})
+    extended = get_qualifications_index({'new-job': 'Forklift certification'})
+    assert 'new-job' in extended.documents
+    assert extended.fit_id == index.fit_id
+
+def test_without_a_catalog_the_refit_keeps_the_indexed_documents(catalog, monkeypatch):
+    index = get_qualifications_index({})
+    # Offline jobs have no catalog loader; an invalidated index refits over what it already holds
+    monkeypatch.setattr(qualifications_index, '_catalog_documents', lambda: None)
+    invalidate_qualifications_index()
+    assert get_qualifications_index({}).documents == index.documents
+
+def test_catalog_is_loaded_outside_the_index_lock(catalog, monkeypatch):
+    held = []
+    def load():
+        held.append(qualifications_index._lock.locked())
+        return catalog
+    monkeypatch.setattr(qualifications_index, '_catalog_documents', load)
+    invalidate_qualifications_index()
+    get_qualifications_index({})
+    assert held == [False]
+
+def test_concurrent_cold_lookups_load_the_catalog_once(catalog, monkeypatch):
+    loads = []
+    def load():
+        loads.append(1)
+        time.sleep(0.05)
+        return catalog
+    monkeypatch.setattr(qualifications_index, '_catalog_documents', load)
+    invalidate_qualifications_index()
+    with ThreadPoolExecutor(4) as pool:
+        indexes = list(pool.map(lambda _: get_qualifications_index({}), range(4)))
+    assert len(loads) == 1
+    assert len({index.fit_id for index in indexes}) == 1
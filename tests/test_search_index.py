@@ -0,0 +1,84 @@
+from collections import Counter
+import math
+
+import pytest
+
+from features.jobs import api
+from features.jobs.util import search_index as search
+from features.jobs.util.search_index import SearchIndex, tokenize
+from tests.conftest import make_snapshot
+
+def _bm25(rows: list[dict], query: str) -> dict:
+    """Reference BM25 over the weighted fields, computed from scratch"""
+    documents = {}
+    for row in rows:
+        frequencies = Counter()
+        for field, weight in search.FIELD_WEIGHTS.items():
+            value = row.get(field) or ''
+            text = ' '.join(map(str, value)) if isinstance(value, list) else str(value)
+            for term in tokenize(text):
+                frequencies[term] += weight
+        documents[str(row['id'])] = frequencies
+    average = sum(sum(f.values()) for f in documents.values()) / len(documents)
+    scores = {}
+    for job_id, frequencies in documents.items():
+        score = 0.0
+        for term in dict.fromkeys(tokenize(query)):
+            containing = sum(1 for f in documents.values() if term in f)
+            if not frequencies[term]:
+                continue
+            idf = math.log(1 + (len(documents) - containing + 0.5) / (containing + 0.5))
+            norm = search.K1 * (1 - search.B + search.B * sum(frequencies.values()) / average)
+            score += idf * frequencies[term] * (search.K1 + 1) / (frequencies[term] + norm)
+        if score:
+            scores[job_id] = score
+    return scores
+
+def test_tokenize_drops_stop_words_and_plurals():
+    assert tokenize("The Nurse's skills in C++ and C#") == ['nurse', 'skill', 'c++', 'c#']
+
+@pytest.mark.parametrize('query', ['python', 'registered nurse license', 'teacher experience'])
+def test_ranking_matches_reference_bm25(catalog_rows, query):
+    snapshot = make_snapshot(catalog_rows)
+    expected = _bm25(snapshot.rows, query)
+    hits = SearchIndex().search(snapshot, query, limit=len(catalog_rows)).hits
+    assert {job_id for job_id, _ in hits} == set(expected)
+    for job_id, score in hits:
+        assert score == pytest.approx(expected[job_id], rel=1e-4)
+    scores = [score for _, score in hits]
+    assert scores == sorted(scores, reverse=True)
+
+def test_pages_and_filters(catalog_rows):
+    snapshot = make_snapshot(catalog_rows)
+    index = SearchIndex()
+    everything = index.search(snapshot, 'experience', limit=len(catalog_rows)).hits
+    first, second = index.search(snapshot, 'experience', 0, 10), index.search(snapshot, 'experience', 10, 10)
+    assert first.hits + second.hits == everything[:20] and first.next_offset == 10
+    remote = index.search(snapshot, 'experience', limit=len(catalog_rows), matches=lambda row: row['work_mode'] == 'remote')
+    assert [hit for hit in everything if snapshot.get_row(hit[0])['work_mode'] == 'remote'] == remote.hits
+
+def test_sync_reindexes_only_changed_rows(catalog_rows):
+    index = SearchIndex()
+    index.sync(make_snapshot(catalog_rows, version=1))
+    assert index.indexed == len(catalog_rows)
+    # A full reload brings new dicts for every row; only the changed and deleted ones are touched
+    reloaded = [dict(row) for row in catalog_rows[1:]]
+    reloaded[0]['role_name'] = 'Zookeeper'
+    index.sync(make_snapshot(reloaded, version=2))
+    assert (index.indexed, index.removed) == (len(catalog_rows) + 1, 2)
+    assert [job_id for job_id, _ in index.search(make_snapshot(reloaded, version=2), 'zookeeper').hits] == [str(reloaded[0]['id'])]
+    assert index.search(make_snapshot(reloaded, version=2), 'python').hits == SearchIndex().search(
+        make_snapshot(reloaded, version=2), 'python'
+    ).hits
+
+def test_search_etag_reads_no_rows(client, job_catalog, monkeypatch):
+    index = SearchIndex()
+    index.sync(job_catalog.snapshot())
+    monkeypatch.setattr(api, 'search_index', index)
+    monkeypatch.setattr(api, '_job_versions', lambda *args: pytest.fail('ETag scanned the catalog'))
+    response = client.get('/api/jobs/search?q=experience&limit=5')
+    assert response.status_code == 200 and response.json['results']
+    assert client.get('/api/jobs/search?q=experience&limit=5', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+    assert client.get('/api/jobs/search?q=python&limit=5', headers={'If-None-Match': response.headers['ETag']}).status_code == 200
+    job_catalog.snapshot_value = make_snapshot(job_catalog.snapshot_value.rows, version=2)
+    assert client.get('/api/jobs/search?q=experience&limit=5', headers={'If-None-Match': response.headers['ETag']}).status_code == 200
@@ -1,5 +1,5 @@
 from functools import wraps
-from flask import flash, redirect, url_for
+from flask import Response, flash, g, make_response, redirect, request, url_for
 
 from util.auth import check_has_profile, fetch_user_role, get_access_token, is_authenticated
 
@@ -40,4 +40,32 @@ def profile_required(fn):
             flash('You must complete your profile to access this page.', 'warning')
             return redirect(url_for('users.profile'))
         return fn(*args, **kwargs)
-    return wrapper
\ No newline at end of file
+    return wrapper
+
+def skip_etag():
+    """Keep conditional_get from tagging this request's response, e.g. when it holds an error fragment"""
+    g.skip_etag = True
+
+def conditional_get(compute_etag):
+    """
+    Answers If-None-Match with 304 when compute_etag(**view_args) matches, without calling the view.
+    Otherwise tags successful responses with the ETag. A None ETag leaves the response untouched,
+    as does a 200 that rendered an error and called skip_etag, so the error is not revalidated as current.
+    """
+    def wrapper(fn):
+        @wraps(fn)
+        def decorated_function(*args, **kwargs):
+            etag = compute_etag(**kwargs)
+            if etag is None:
+                return fn(*args, **kwargs)
+            if request.if_none_match.contains(etag):
+                response = Response(status=304)
+            else:
+                response = make_response(fn(*args, **kwargs))
+                if response.status_code != 200 or g.pop('skip_etag', False):
+                    return response
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return decorated_function
+    return wrapper
@@ -0,0 +1,19 @@
+from enum import Enum
+
+from flask.json.provider import DefaultJSONProvider
+
+from util.classes.result import Result
+from util.models.job_model import ScoredJob
+
+class AppJSONProvider(DefaultJSONProvider):
+    """Default provider plus the model types handlers pass straight to jsonify"""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, ScoredJob):
+            return o.to_dict()
+        if isinstance(o, Result):
+            return {'success': o.success, 'data': o.data, 'error': o.error}
+        if isinstance(o, Enum):
+            return o.value
+        return DefaultJSONProvider.default(o)
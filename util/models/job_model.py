@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+import dataclasses
 from dataclasses import dataclass
 from enum import Enum
 import hashlib
@@ -188,13 +189,34 @@ class Job(ABC):
       site_specific_fields=site_specific_fields,
     )
   
-@dataclass
-class JobWithCompatibility(Job):
-  compatibility_score: Optional[float] = None
+class ScoredJob:
+  """
+  A job with its compatibility score and, optionally, factors. Holds a reference to the job instead of
+  copying it; every other attribute is read from the job, so templates can use it as one.
+  """
+  __slots__ = ('job', 'compatibility_score', 'factors')
 
-@dataclass
-class JobWithCompatibilityFactors(JobWithCompatibility):
-  factors: Optional[JobFactors] = None
+  def __init__(self, job: Job, compatibility_score: float, factors: Optional[JobFactors] = None):
+    self.job = job
+    self.compatibility_score = compatibility_score
+    self.factors = factors
+
+  def __getattr__(self, name):
+    # Only reached for attributes missing here; unset slots (e.g. while unpickling) must not recurse
+    if name in ScoredJob.__slots__:
+      raise AttributeError(name)
+    return getattr(self.job, name)
+
+  def to_dict(self) -> dict:
+    """Flat job dict plus score and factors, the shape jsonify returns"""
+    data = dataclasses.asdict(self.job) if dataclasses.is_dataclass(self.job) else dict(vars(self.job))
+    data['compatibility_score'] = self.compatibility_score
+    if self.factors is not None:
+      data['factors'] = dataclasses.asdict(self.factors)
+    return data
+
+  def __repr__(self):
+    return f"ScoredJob(job={self.job!r}, compatibility_score={self.compatibility_score}, factors={self.factors})"
 
 @dataclass
 class JobLinkedInSpecific(JobSiteSpecific):
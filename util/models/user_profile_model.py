@@ -1,4 +1,6 @@
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
+import hashlib
+import json
 from typing import Optional
 
 
@@ -14,6 +16,10 @@ class UserProfile:
   accommodations: Optional[list[str]] = None
   educational_background: Optional[list[str]] = None
 
+  def content_hash(self) -> str:
+    """Stable hash of every profile field, changes whenever the profile does"""
+    return hashlib.sha256(json.dumps(asdict(self), sort_keys=True, default=str).encode()).hexdigest()
+
   @classmethod
   def from_supabase_dict(cls, data: dict):
     return cls(
@@ -0,0 +1,306 @@
+"""
+Fingerprinted, precompressed static assets.
+
+`flask build-static` writes every file of the app's static folders to a build/ folder inside each one,
+under names carrying a hash of their content, with .gz and .br variants of text files, WOFF2 copies of
+TrueType/OpenType fonts and narrower copies of raster images. References between stylesheets, and to
+fonts and images from them, are rewritten to the hashed names. A build/manifest.json maps each source
+path to its hashed path.
+
+At runtime url_for('static', filename=...) and its blueprint equivalents return the hashed path when a
+manifest lists the file, and hashed files are served precompressed with immutable cache headers.
+WOFF2 conversion needs fonttools and brotli, brotli variants need brotli and image sizes need Pillow;
+the build skips those outputs when the packages are missing.
+"""
+import gzip
+import hashlib
+import io
+import json
+import mimetypes
+import os
+import posixpath
+import re
+import shutil
+
+import click
+from flask import Flask, current_app, request, send_from_directory, url_for
+from flask.cli import with_appcontext
+from werkzeug.security import safe_join
+
+BUILD_DIR = 'build'
+MANIFEST = 'manifest.json'
+HASH_LENGTH = 12
+# A year, the longest max-age caches honour; hashed names change whenever the content does
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.svg', '.ico', '.json', '.txt', '.xml', '.ttf', '.otf', '.map'}
+FONT_EXTENSIONS = {'.ttf', '.otf'}
+RESPONSIVE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp'}
+RESPONSIVE_WIDTHS = (360, 720, 1080, 1600)
+JPEG_QUALITY = 82
+
+_CSS_REFERENCE = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)|@import\s+(['"])([^'"]+)\3""")
+_FONT_SOURCE = re.compile(r"""url\(\s*(['"]?)([^'")]+\.(?:ttf|otf))\1\s*\)\s*format\(\s*(['"])(?:truetype|opentype)\3\s*\)""")
+
+class StaticAssets:
+    """Serves the builds of the app's static folders; folders without a manifest are served as before"""
+
+    def __init__(self):
+        self.manifests: dict[str, dict] = {}
+
+    def init_app(self, app: Flask, use_builds: bool = True):
+        for endpoint, folder, _ in static_folders(app) if use_builds else ():
+            path = os.path.join(folder, BUILD_DIR, MANIFEST)
+            if not os.path.isfile(path):
+                continue
+            with open(path) as f:
+                self.manifests[endpoint] = json.load(f)
+            app.view_functions[endpoint] = self._view(folder, app.view_functions[endpoint])
+        app.url_defaults(self._hashed_filename)
+        app.jinja_env.globals['static_srcset'] = self.srcset
+
+    def srcset(self, filename: str, endpoint: str = 'static') -> str:
+        """srcset of the built widths of an image, empty when it has none"""
+        widths = self.manifests.get(endpoint, {}).get('srcsets', {}).get(filename, [])
+        prefix = self._url_prefix(endpoint)
+        return ', '.join(f"{prefix}/{path} {width}w" for width, path in widths)
+
+    def _url_prefix(self, endpoint: str) -> str:
+        # url_for of the build folder itself, which no manifest rewrites
+        return url_for(endpoint, filename=BUILD_DIR).rsplit('/', 1)[0]
+
+    def _hashed_filename(self, endpoint: str, values: dict):
+        manifest = self.manifests.get(endpoint)
+        if manifest is not None and 'filename' in values:
+            values['filename'] = manifest['files'].get(values['filename'], values['filename'])
+
+    @staticmethod
+    def _view(folder: str, send_static_file):
+        def view(filename):
+            if not filename.startswith(BUILD_DIR + '/'):
+                return send_static_file(filename=filename)
+            mimetype = mimetypes.guess_type(filename)[0]
+            for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+                if request.accept_encodings[encoding] and os.path.isfile(safe_join(folder, filename + suffix) or ''):
+                    response = send_from_directory(folder, filename + suffix, mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+                    response.headers['Content-Encoding'] = encoding
+                    break
+            else:
+                response = send_from_directory(folder, filename, max_age=IMMUTABLE_MAX_AGE)
+            response.vary.add('Accept-Encoding')
+            response.cache_control.public = True
+            response.cache_control.immutable = True
+            return response
+        return view
+
+static_assets = StaticAssets()
+
+def static_folders(app: Flask) -> list[tuple[str, str, str]]:
+    """(endpoint, folder, URL prefix) of the app's static folder and those of its registered blueprints"""
+    folders = []
+    if app.has_static_folder:
+        folders.append(('static', app.static_folder, app.static_url_path))
+    with app.test_request_context():
+        for name, blueprint in app.blueprints.items():
+            # has_static_folder only says one is configured; admin's does not exist
+            if blueprint.has_static_folder and os.path.isdir(blueprint.static_folder):
+                endpoint = f'{name}.static'
+                folders.append((endpoint, blueprint.static_folder, url_for(endpoint, filename='x')[:-2]))
+    return folders
+
+class StaticBuild:
+    """Build of one static folder into its build/ folder"""
+
+    def __init__(self, folder: str, url_prefix: str):
+        self.folder = folder
+        self.url_prefix = url_prefix.rstrip('/')
+        self.manifest: dict[str, dict] = {'files': {}, 'srcsets': {}}
+        self.source_bytes = 0
+        self.gzip_bytes = 0
+        self.brotli_bytes = 0
+        self.skipped: set[str] = set()
+        self._brotli = _optional_import('brotli')
+
+    def run(self) -> dict:
+        build = os.path.join(self.folder, BUILD_DIR)
+        shutil.rmtree(build, ignore_errors=True)
+        sources = self._sources()
+        # Stylesheets come last: their hashes depend on the rewritten names of what they reference
+        for path in sources:
+            extension = os.path.splitext(path)[1].lower()
+            if extension == '.css':
+                continue
+            if extension in FONT_EXTENSIONS:
+                self._font(path)
+            elif extension in RESPONSIVE_EXTENSIONS:
+                self._image(path)
+            else:
+                self._emit(path, self._read(path))
+        for path in sources:
+            if path.endswith('.css'):
+                self._stylesheet(path, ())
+        with open(os.path.join(build, MANIFEST), 'w') as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+        return self.manifest
+
+    def _sources(self) -> list[str]:
+        sources = []
+        for dirpath, dirnames, filenames in os.walk(self.folder):
+            if dirpath == self.folder and BUILD_DIR in dirnames:
+                dirnames.remove(BUILD_DIR)
+            dirnames.sort()
+            for filename in sorted(filenames):
+                sources.append(os.path.relpath(os.path.join(dirpath, filename), self.folder).replace(os.sep, '/'))
+        return sources
+
+    def _read(self, path: str) -> bytes:
+        with open(os.path.join(self.folder, path), 'rb') as f:
+            return f.read()
+
+    def _emit(self, path: str, data: bytes, source: str = None) -> str:
+        """Write data under path's hashed name with compressed variants; records it for source (default path)"""
+        name, extension = posixpath.splitext(path)
+        digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+        hashed = f'{BUILD_DIR}/{name}.{digest}{extension}'
+        target = os.path.join(self.folder, hashed)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as f:
+            f.write(data)
+        self.source_bytes += len(data)
+        compressed = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+        if self._brotli is not None:
+            compressed['.br'] = self._brotli.compress(data, quality=11)
+        else:
+            self.skipped.add('brotli variants (pip install brotli)')
+        for suffix, variant in compressed.items():
+            # Already-compressed formats gain nothing, so their variants are left out
+            if extension.lower() not in COMPRESSIBLE_EXTENSIONS or len(variant) >= 0.9 * len(data):
+                variant = None
+            if variant is not None:
+                with open(target + suffix, 'wb') as f:
+                    f.write(variant)
+            size = len(variant) if variant is not None else len(data)
+            if suffix == '.gz':
+                self.gzip_bytes += size
+            else:
+                self.brotli_bytes += size
+        self.manifest['files'][source or path] = hashed
+        return hashed
+
+    def _font(self, path: str):
+        self._emit(path, self._read(path))
+        ttlib = _optional_import('fontTools.ttLib')
+        if ttlib is None or self._brotli is None:
+            self.skipped.add('WOFF2 fonts (pip install fonttools brotli)')
+            return
+        font = ttlib.TTFont(os.path.join(self.folder, path), recalcTimestamp=False)
+        font.flavor = 'woff2'
+        buffer = io.BytesIO()
+        font.save(buffer)
+        woff2 = posixpath.splitext(path)[0] + '.woff2'
+        self._emit(woff2, buffer.getvalue())
+
+    def _image(self, path: str):
+        original = self._emit(path, self._read(path))
+        image_module = _optional_import('PIL.Image')
+        if image_module is None:
+            self.skipped.add('responsive image sizes (pip install Pillow)')
+            return
+        try:
+            image = image_module.open(os.path.join(self.folder, path))
+            image.load()
+        except OSError as e:
+            print(f"Skipping image sizes of {path}: {e}")
+            return
+        name, extension = posixpath.splitext(path)
+        srcset = []
+        for width in RESPONSIVE_WIDTHS:
+            if width >= image.width:
+                break
+            height = round(image.height * width / image.width)
+            resized = image.resize((width, height), image_module.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            options = {'quality': JPEG_QUALITY, 'progressive': True} if image.format == 'JPEG' else {}
+            resized.save(buffer, format=image.format, optimize=True, **options)
+            sized = f'{name}.{width}w{extension}'
+            srcset.append([width, self._emit(sized, buffer.getvalue())])
+        srcset.append([image.width, original])
+        self.manifest['srcsets'][path] = srcset
+
+    def _stylesheet(self, path: str, importing: tuple) -> str:
+        if path in self.manifest['files']:
+            return self.manifest['files'][path]
+        if path in importing:
+            raise click.ClickException(f"Stylesheets import each other: {' -> '.join(importing + (path,))}")
+        css = self._read(path).decode('utf-8')
+        directory = posixpath.join(BUILD_DIR, posixpath.dirname(path))
+
+        def hashed_url(reference: str):
+            source = self._resolve(reference, path)
+            if source is None:
+                return None
+            if source.endswith('.css'):
+                self._stylesheet(source, importing + (path,))
+            hashed = self.manifest['files'].get(source)
+            return posixpath.relpath(hashed, directory) if hashed else None
+
+        def font_source(match):
+            ttf = hashed_url(match.group(2))
+            woff2 = hashed_url(posixpath.splitext(match.group(2))[0] + '.woff2')
+            if ttf is None or woff2 is None:
+                return match.group(0)
+            return f"url('{woff2}') format('woff2'), url('{ttf}') format('truetype')"
+
+        def reference(match):
+            quote = match.group(1) if match.group(2) else match.group(3)
+            url = hashed_url(match.group(2) or match.group(4))
+            if url is None:
+                return match.group(0)
+            return f'url({quote}{url}{quote})' if match.group(2) else f'@import {quote}{url}{quote}'
+
+        css = _CSS_REFERENCE.sub(reference, _FONT_SOURCE.sub(font_source, css))
+        return self._emit(path, css.encode('utf-8'))
+
+    def _resolve(self, reference: str, stylesheet: str):
+        """Source path of a url() or @import target inside this folder, None for anything else"""
+        if reference.startswith(('#', 'data:', 'http:', 'https:', '//')):
+            return None
+        reference = reference.split('#')[0].split('?')[0]
+        if reference.startswith(self.url_prefix + '/'):
+            source = reference[len(self.url_prefix) + 1:]
+        elif reference.startswith('/'):
+            return None
+        else:
+            source = posixpath.normpath(posixpath.join(posixpath.dirname(stylesheet), reference))
+        # Generated files such as WOFF2 fonts are only in the manifest
+        if source in self.manifest['files'] or os.path.isfile(os.path.join(self.folder, source)):
+            return source
+        return None
+
+def _optional_import(name: str):
+    try:
+        module = __import__(name)
+        for part in name.split('.')[1:]:
+            module = getattr(module, part)
+        return module
+    except ImportError:
+        return None
+
+@click.command('build-static')
+@with_appcontext
+def build_static_command():
+    """Fingerprint, compress and resize the static assets of the app and its blueprints."""
+    built = set()
+    for endpoint, folder, url_prefix in static_folders(current_app):
+        # Blueprints such as main share the app's folder
+        if folder in built:
+            continue
+        built.add(folder)
+        build = StaticBuild(folder, url_prefix)
+        manifest = build.run()
+        click.echo(
+            f"{endpoint}: {len(manifest['files'])} files, {build.source_bytes:,} bytes "
+            f"({build.gzip_bytes:,} gzip, {build.brotli_bytes:,} brotli), "
+            f"{sum(len(widths) - 1 for widths in manifest['srcsets'].values())} image sizes"
+        )
+        for skipped in sorted(build.skipped):
+            click.echo(f"  skipped {skipped}", err=True)
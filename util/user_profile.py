@@ -0,0 +1,88 @@
+import os
+import threading
+import time
+from typing import Optional
+
+from flask import g
+
+from services.supabase.supabase_client import get_supabase
+from util.auth import decode_jwt, get_access_token
+from util.classes.result import Result
+from util.models.user_profile_model import UserProfile
+
+# Seconds a loaded profile is reused across requests of the same user; 0 disables the process cache
+PROFILE_CACHE_TTL = float(os.environ.get('PROFILE_CACHE_TTL_SECONDS', 0))
+
+class ProfileCache:
+    """Short-lived cache of parsed profiles keyed by auth user id, so back-to-back requests skip the query"""
+
+    def __init__(self, ttl: float = PROFILE_CACHE_TTL):
+        self.ttl = ttl
+        self._entries: dict[str, tuple[float, UserProfile]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str) -> Optional[UserProfile]:
+        if self.ttl <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[user_id]
+                return None
+            return entry[1]
+
+    def put(self, user_id: str, profile: UserProfile):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if len(self._entries) > 10_000:
+                self._entries = {k: v for k, v in self._entries.items() if v[0] >= now}
+            self._entries[user_id] = (now + self.ttl, profile)
+
+    def invalidate(self, user_id: str):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+profile_cache = ProfileCache()
+
+def load_user_profile() -> Result[UserProfile]:
+    """The signed-in user's profile, queried at most once per request"""
+    if 'user_profile' not in g:
+        g.user_profile = _load_user_profile(current_user_id())
+    return g.user_profile
+
+def invalidate_user_profile():
+    """Call after upserting the signed-in user's profile"""
+    g.pop('user_profile', None)
+    user_id = current_user_id()
+    if user_id:
+        profile_cache.invalidate(user_id)
+
+def current_user_id() -> Optional[str]:
+    access_token = get_access_token()
+    claims = decode_jwt(access_token) if access_token else None
+    return claims.get('sub') if claims else None
+
+def _load_user_profile(user_id: Optional[str]) -> Result[UserProfile]:
+    profile = profile_cache.get(user_id) if user_id else None
+    if profile is not None:
+        return Result(success=True, data=profile)
+    try:
+        user_profile_resp = get_supabase().table('user_profiles').select('*').limit(1).execute() # Secure (RLS)
+    except Exception as e:
+        print(f"Error fetching user profile: {e}")
+        return Result(success=False, error=str(e))
+    if not user_profile_resp or not user_profile_resp.data:
+        print("User profile not found.")
+        return Result(success=False, error="User profile not found")
+    profile = UserProfile.from_supabase_dict(user_profile_resp.data[0])
+    if user_id:
+        profile_cache.put(user_id, profile)
+    return Result(success=True, data=profile)